@@ -1,28 +1,111 @@
+"""Import the owned Steam library into _steam_game_list.json.
+
+Usage: python docs/asset/_venu/extract_steam_game.py [--key KEY] [--steamid ID] [--base-url URL] [--dry-run]
+
+Fetches GetOwnedGames and diffs it against the existing list by appid: new
+titles are appended, known ones get their playtime updated, and entries the
+response does not mention (hand-added titles, other storefronts' rows) are
+left alone. The existing list is read one entry at a time and each entry is
+written out as soon as it has been updated, into a temp file that replaces
+the list only when its bytes changed (OutputWriter.write_chunks); new titles
+follow at the end. The list is laid out by json_stream.dump_json_array, the
+same serializer parse_and_update.py writes the lists with.
+
+The API key and SteamID default to the STEAM_API_KEY / STEAM_ID environment
+variables and then to the constants below; --base-url (or STEAM_API_BASE)
+points the importer at a local stub for testing.
+"""
+import argparse
 import json
-import urllib.request
+import os
+import sys
+import urllib.parse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+from http_client import HttpClient  # noqa: E402
+from json_stream import dump_json_array, load_json_array  # noqa: E402
+from output_writer import OutputWriter  # noqa: E402
 
 API_KEY = "69DEE71CF152089BD5B6C405731190C4"
 STEAMID = "76561198098109174"
+API_BASE = "https://api.steampowered.com"
+LIST_PATH = os.path.join(ROOT, 'docs', 'asset', 'Game', '_steam_game_list.json')
 
-url = (
-    "https://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/"
-    f"?key={API_KEY}&steamid={STEAMID}"
-    "&include_appinfo=1&include_played_free_games=1&format=json"
-)
-
-with urllib.request.urlopen(url) as response:
-    data = json.loads(response.read().decode())
-
-games = []
-for g in data.get("response", {}).get("games", []):
-    appid = g.get("appid")
-    name = g.get("name")
-    store_link = f"https://store.steampowered.com/app/{appid}/"
-    games.append({
-        "name": name,
-        "appid": appid,
-        "store_link": store_link,
-        "playtime_minutes": g.get("playtime_forever", 0)
+
+def owned_games_url(base_url, key, steamid):
+    query = urllib.parse.urlencode({
+        'key': key,
+        'steamid': steamid,
+        'include_appinfo': 1,
+        'include_played_free_games': 1,
+        'format': 'json',
     })
+    return f"{base_url.rstrip('/')}/IPlayerService/GetOwnedGames/v0001/?{query}"
+
+
+def fetch_owned_games(url, timeout=30, client=None):
+    client = client or HttpClient(timeout=timeout)
+    data = json.loads(client.get(url).decode())
+    return data.get("response", {}).get("games", [])
+
+
+def merge_owned_games(existing, owned, counts):
+    """Yield the existing entries with the owned-games response applied, then
+    the owned games the list does not have yet. counts['added'] and
+    counts['updated'] are filled in as the entries go by."""
+    pending = {}
+    for g in owned:
+        if g.get("appid"):
+            pending.setdefault(int(g["appid"]), g)
+
+    for entry in existing:
+        g = pending.pop(int(entry['appid']), None) if entry.get('appid') else None
+        if g is not None:
+            playtime = g.get("playtime_forever", 0)
+            if entry.get("playtime_minutes") != playtime:
+                entry["playtime_minutes"] = playtime
+                counts['updated'] += 1
+        counts['entries'] += 1
+        yield entry
+
+    for appid, g in pending.items():
+        counts['added'] += 1
+        counts['entries'] += 1
+        yield {
+            "name": g.get("name"),
+            "appid": g["appid"],
+            "store_link": f"https://store.steampowered.com/app/{appid}/",
+            "playtime_minutes": g.get("playtime_forever", 0),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import owned Steam games into the Steam game list')
+    parser.add_argument('--key', default=os.environ.get('STEAM_API_KEY', API_KEY), help='Steam Web API key (default: $STEAM_API_KEY)')
+    parser.add_argument('--steamid', default=os.environ.get('STEAM_ID', STEAMID), help='64-bit SteamID of the library owner (default: $STEAM_ID)')
+    parser.add_argument('--base-url', dest='base_url', default=os.environ.get('STEAM_API_BASE', API_BASE),
+                        help='Steam Web API base URL, e.g. a local stub (default: $STEAM_API_BASE or the public API)')
+    parser.add_argument('--list', dest='list_path', default=LIST_PATH, help='Game list to update (default: docs/asset/Game/_steam_game_list.json)')
+    parser.add_argument('--dry-run', dest='dry_run', action='store_true', help='Report what would change without writing the list')
+    args = parser.parse_args()
+
+    owned = fetch_owned_games(owned_games_url(args.base_url, args.key, args.steamid))
+
+    existing = load_json_array(args.list_path) if os.path.exists(args.list_path) else ()
+    counts = {'added': 0, 'updated': 0, 'entries': 0}
+    entries = merge_owned_games(existing, owned, counts)
+    written = False
+    if args.dry_run:
+        for _ in entries:
+            pass
+    else:
+        written = OutputWriter().write_chunks(args.list_path, dump_json_array(entries))
+    status = 'dry run' if args.dry_run else ('written' if written else 'not changed')
+    print(f"{len(owned)} owned games: {counts['added']} added, {counts['updated']} playtimes updated, "
+          f"{counts['entries']} entries in {args.list_path} ({status})")
+
 
-print(json.dumps(games, indent=2, ensure_ascii=False))
+if __name__ == '__main__':
+    main()
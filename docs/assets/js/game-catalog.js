@@ -0,0 +1,138 @@
+/* ============================================================================
+   GAME CATALOG LOADER — Clockwork Production
+   Reads the sharded catalog written by
+   `generate_game_data.py --layout sharded`: the small index first, then only
+   the shards a view needs. Shard names change with their content, so the
+   browser may cache them forever. Shards of a `--production` build are in
+   the compact form of compact_catalog.py and are expanded back to full
+   entries here, so callers see the same shape either way.
+============================================================================ */
+
+const GameCatalog = (function () {
+  const BASE = '/assets/data/';
+  let indexPromise = null;
+  const shardPromises = {};
+
+  function fetchJson(path) {
+    return fetch(BASE + path).then(response => {
+      if (!response.ok) throw new Error(`${path}: HTTP ${response.status}`);
+      return response.json();
+    });
+  }
+
+  // Counts, shard list and each shard's first/last sort key
+  function index() {
+    if (!indexPromise) indexPromise = fetchJson('games-index.json');
+    return indexPromise;
+  }
+
+  // Full entry from a compact one: empty fields restored, store codes
+  // replaced by the names in the index's code table
+  function expand(game, stores) {
+    const links = game.storefronts || {};
+    return {
+      ...game,
+      description: game.description || '',
+      image: game.image || '',
+      image_width: game.image_width ?? null,
+      image_height: game.image_height ?? null,
+      image_variants: game.image_variants || [],
+      primary_store: stores[game.primary_store] || game.primary_store || '',
+      primary_link: game.primary_link || links[game.primary_store] || '',
+      storefronts: Object.entries(links).map(([code, url]) => ({ store: stores[code] || code, url })),
+    };
+  }
+
+  function shard(n) {
+    return index().then(idx => {
+      const entry = idx.shards[n];
+      if (!entry) return [];
+      if (!shardPromises[entry.file]) {
+        shardPromises[entry.file] = fetchJson(entry.file).then(games =>
+          idx.format === 'compact' ? games.map(g => expand(g, idx.stores)) : games);
+      }
+      return shardPromises[entry.file];
+    });
+  }
+
+  // Games of the n-th shard (0-based); with --shard-by page this is page n
+  function page(n) {
+    return shard(n);
+  }
+
+  // Every game whose name starts with `letter` ('#' for anything else)
+  function letter(l) {
+    return index().then(idx => {
+      const wanted = [];
+      idx.shards.forEach((entry, n) => {
+        if (entry.label === l) wanted.push(shard(n));
+      });
+      return Promise.all(wanted).then(parts => [].concat(...parts));
+    });
+  }
+
+  // The whole catalog in list order
+  function all() {
+    return index().then(idx => Promise.all(idx.shards.map((_, n) => shard(n))).then(parts => {
+      if (idx.shard_by !== 'letter') return [].concat(...parts);
+      const games = new Array(idx.count);
+      parts.forEach((part, n) => {
+        idx.shards[n].ordinals.forEach((ordinal, k) => { games[ordinal] = part[k]; });
+      });
+      return games;
+    }));
+  }
+
+  // ---- prebuilt search index (search-index.json) ----
+  let searchPromise = null;
+
+  function searchIndex() {
+    if (!searchPromise) searchPromise = fetchJson('search-index.json');
+    return searchPromise;
+  }
+
+  function intersect(a, b) {
+    const out = [];
+    let i = 0, j = 0;
+    while (i < a.length && j < b.length) {
+      if (a[i] === b[j]) { out.push(a[i]); i++; j++; }
+      else if (a[i] < b[j]) i++;
+      else j++;
+    }
+    return out;
+  }
+
+  // Games sharing most of the word's trigrams, for misspelt words
+  function fuzzyPostings(fields, word) {
+    const padded = ` ${word} `;
+    const votes = new Map();
+    let total = 0;
+    for (let i = 0; i + 3 <= padded.length; i++) {
+      total++;
+      (fields.trigram[padded.slice(i, i + 3)] || []).forEach(o => votes.set(o, (votes.get(o) || 0) + 1));
+    }
+    const needed = Math.ceil(total * 0.6);
+    return [...votes].filter(([, n]) => n >= needed).map(([o]) => o).sort((a, b) => a - b);
+  }
+
+  // Catalog ordinals of the games whose name matches every word of `query`
+  function search(query) {
+    return searchIndex().then(idx => {
+      const words = (query || '').toLowerCase().match(/[\p{L}\p{N}_]+/gu) || [];
+      let result = null;
+      for (const word of words) {
+        const postings = idx.fields.token[word] || fuzzyPostings(idx.fields, word);
+        result = result === null ? postings : intersect(result, postings);
+        if (!result.length) break;
+      }
+      return result || [];
+    });
+  }
+
+  // Catalog ordinals for a facet value, e.g. filter('platform', 'linux')
+  function filter(field, value) {
+    return searchIndex().then(idx => ((idx.fields[field] || {})[String(value).toLowerCase()] || []));
+  }
+
+  return { index, page, letter, all, search, filter };
+})();
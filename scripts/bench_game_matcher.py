@@ -0,0 +1,97 @@
+"""Benchmark: MatcherIndex against the linear find_best_match on a synthetic tree.
+
+Usage: python scripts/bench_game_matcher.py [--dirs 50000] [--games 300] [--check 15]
+
+The directory names mimic slug() output of real game titles. Game names are
+a mix of differently punctuated exact matches, typos, longer titles of
+existing folders and titles with no folder at all. The linear matcher is
+only run on the first --check games (it takes seconds per game at this
+size); its time is extrapolated and its answers compared with the index.
+"""
+import argparse
+import random
+import time
+
+from game_matcher import MatcherIndex
+from generate_game_data import find_best_match
+
+WORDS = ("dark shadow legend war star space raid craft hero tales kingdom quest empire dragon "
+         "night city lost soul iron blood fire storm moon sun ghost ninja pixel robot zombie "
+         "galaxy frontier island dungeon knight wizard battle arena racer simulator tycoon "
+         "escape horror mystery chronicles saga origins remastered deluxe edition online").split()
+
+
+def synthetic_dirs(n, rng):
+    seen = set()
+    dirs = []
+    while len(dirs) < n:
+        parts = [rng.choice(WORDS).title() for _ in range(rng.randint(1, 4))]
+        if rng.random() < 0.3:
+            parts.append(str(rng.randint(2, 9)))
+        name = '_'.join(parts)
+        if name not in seen:
+            seen.add(name)
+            dirs.append(name)
+    return dirs
+
+
+def synthetic_games(dirs, n, rng):
+    games = []
+    for k in range(n):
+        d = rng.choice(dirs)
+        title = d.replace('_', ' ')
+        kind = k % 4
+        if kind == 0:
+            games.append(title.upper() + ':')
+        elif kind == 1:
+            pos = rng.randrange(len(title))
+            games.append(title[:pos] + rng.choice('aeioust') + title[pos + 1:])
+        elif kind == 2:
+            games.append(f'{title} - {rng.choice(WORDS).title()} Edition')
+        else:
+            games.append(' '.join(rng.choice(WORDS).title() for _ in range(5)) + ' Zeta')
+    return games
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the indexed game directory matcher')
+    parser.add_argument('--dirs', type=int, default=50000, help='Number of synthetic game folders (default: 50000)')
+    parser.add_argument('--games', type=int, default=300, help='Number of game names to match (default: 300)')
+    parser.add_argument('--check', type=int, default=15, help='Games also matched with the linear scan (default: 15)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    dirs = synthetic_dirs(args.dirs, rng)
+    games = synthetic_games(dirs, args.games, rng)
+
+    t0 = time.perf_counter()
+    index = MatcherIndex(dirs)
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    indexed = [index.find(g) for g in games]
+    t_index = time.perf_counter() - t0
+
+    checked = games[:args.check]
+    t0 = time.perf_counter()
+    linear = [find_best_match(g, dirs) for g in checked]
+    t_linear = time.perf_counter() - t0
+    mismatches = [(g, a, b) for g, a, b in zip(checked, linear, indexed) if a != b]
+
+    per_linear = t_linear / max(1, len(checked))
+    per_index = t_index / max(1, len(games))
+    print(f"{len(dirs)} folders, {len(games)} game names")
+    print(f"index build:       {t_build:8.2f} s")
+    print(f"indexed lookups:   {t_index:8.2f} s  ({per_index * 1000:.2f} ms/game)")
+    print(f"linear lookups:    {per_linear * len(games):8.2f} s  ({per_linear * 1000:.2f} ms/game, "
+          f"extrapolated from {len(checked)} games)")
+    print(f"speedup:           {per_linear / per_index:8.1f}x")
+    print(f"matched:           {sum(1 for m in indexed if m)} of {len(games)}")
+    print(f"differences vs linear on checked games: {len(mismatches)}")
+    for g, a, b in mismatches:
+        print(f"  {g!r}: linear={a!r} index={b!r}")
+
+
+if __name__ == '__main__':
+    main()
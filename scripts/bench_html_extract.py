@@ -0,0 +1,225 @@
+"""Micro-benchmark: single-pass extract_page() against the per-field regex helpers.
+
+Usage: python scripts/bench_html_extract.py [--repeat N] [--scale N]
+
+The regex helpers below are the extractors the listing scripts used before
+extract_page(); they are kept here only as the baseline.
+
+The pages in fixtures/pages are synthetic, not saved store pages: each has
+the tags the extractors look for (og/meta tags, JSON-LD, the Steam
+description and details blocks, platform markers) as the stores lay them
+out, padded with script and markup filler to a realistic size. The timings
+show the relative cost of the two approaches on pages of that size; the
+field differences only show how the two disagree on this markup, and say
+nothing about coverage of live Steam, GOG or Epic pages (the GOG fixture,
+for one, has no platform markers at all, so extract_page() reads its
+platforms from the page text).
+
+--scale repeats each fixture's <body> N times to approximate the size of
+live store pages (real Steam app pages are several hundred KB).
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import time
+
+from store_html import extract_page, strip_tags
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pages')
+FIXTURE_URLS = {
+    'steam_app.html': 'https://store.steampowered.com/app/1808500/',
+    'epic_product.html': 'https://store.epicgames.com/en-US/p/amnesia-the-bunker',
+    'itch_game.html': 'https://mikeklubnika.itch.io/buckshot-roulette',
+    'gog_game.html': 'https://www.gog.com/game/frostpunk',
+}
+
+
+def platforms_from_html(html):
+    """Infer supported OS platforms from a store page's HTML."""
+    platforms = []
+    if re.search(r'Windows', html, re.I):
+        platforms.append('Windows')
+    if re.search(r'macOS|OS X|Mac OS X|Mac', html, re.I):
+        platforms.append('macOS')
+    if re.search(r'Linux', html, re.I):
+        platforms.append('Linux')
+    return list(dict.fromkeys(platforms))
+
+
+def find_og_image(html):
+    # search for og:image or twitter:image meta tag
+    m = re.search(r'''<meta[^>]+property=["']og:image["'][^>]+content=["']([^"']+)["']''', html, re.I)
+    if not m:
+        m = re.search(r'''<meta[^>]+name=["']twitter:image["'][^>]+content=["']([^"']+)["']''', html, re.I)
+    if not m:
+        m = re.search(r'''<meta[^>]+content=["']([^"']+)["'][^>]+property=["']og:image["']''', html, re.I)
+    return m.group(1) if m else None
+
+
+def find_description_from_html(html, url=None):
+    # Try JSON-LD description blocks first
+    for m in re.finditer(r"<script[^>]+type=[\"']application/ld\+json[\"'][^>]*>(.*?)</script>", html, re.I | re.S):
+        try:
+            data = json.loads(m.group(1))
+            if isinstance(data, dict) and data.get('description'):
+                return strip_tags(data.get('description'))
+        except Exception:
+            pass
+
+    # try common meta tags next
+    m = re.search(r'''<meta[^>]+property=["']og:description["'][^>]+content=["']([^"']+)["']''', html, re.I)
+    if not m:
+        m = re.search(r'''<meta[^>]+name=["']description["'][^>]+content=["']([^"']+)["']''', html, re.I)
+    if not m:
+        m = re.search(r'''<meta[^>]+name=["']twitter:description["'][^>]+content=["']([^"']+)["']''', html, re.I)
+    if m:
+        return strip_tags(m.group(1))
+
+    # steam-specific: try description blocks (id or class) and snippets
+    if url and 'store.steampowered.com' in (url or '').lower():
+        # id-based block
+        m = re.search(r"<div[^>]+id=[\"']game_area_description[\"'][^>]*>([\s\S]*?)</div>", html, re.I)
+        if not m:
+            # class-based variants
+            m = re.search(r"<div[^>]+class=[\"']game_area_description[\"'][^>]*>([\s\S]*?)</div>", html, re.I)
+        if not m:
+            m = re.search(r"<div[^>]+class=[\"']game_description_snippet[\"'][^>]*>([\s\S]*?)</div>", html, re.I)
+        if m:
+            return strip_tags(m.group(1))
+
+    # fallback: first sizeable paragraph-like chunk
+    m = re.search(r'<p[^>]*>(.{40,500})<\/p>', html, re.I | re.S)
+    if m:
+        return strip_tags(m.group(1))
+
+    return ''
+
+
+def find_metadata_from_html(html, url=None):
+    """Best-effort extraction of developer, publisher, releaseDate, genres, platforms, tags from page HTML.
+    Returns dict with keys: developer, publisher, releaseDate, genres(list), platforms(list), tags(list)
+    """
+    out = {'developer': '', 'publisher': '', 'releaseDate': '', 'genres': [], 'platforms': [], 'tags': []}
+
+    # try JSON-LD blocks first
+    for m in re.finditer(r"""<script[^>]+type=["']application/ld\+json["'][^>]*>(.*?)</script>""", html, re.I | re.S):
+        try:
+            data = json.loads(m.group(1))
+            if isinstance(data, dict):
+                if not out['developer'] and data.get('author'):
+                    if isinstance(data.get('author'), dict):
+                        out['developer'] = data['author'].get('name') or out['developer']
+                    elif isinstance(data.get('author'), str):
+                        out['developer'] = data.get('author')
+                if not out['publisher'] and data.get('publisher'):
+                    if isinstance(data.get('publisher'), dict):
+                        out['publisher'] = data['publisher'].get('name') or out['publisher']
+                    elif isinstance(data.get('publisher'), str):
+                        out['publisher'] = data.get('publisher')
+                if not out['releaseDate'] and data.get('datePublished'):
+                    out['releaseDate'] = data.get('datePublished')
+                if not out['genres'] and data.get('genre'):
+                    ge = data.get('genre')
+                    if isinstance(ge, list):
+                        out['genres'] = ge
+                    elif isinstance(ge, str):
+                        out['genres'] = [x.strip() for x in re.split(r'[,/|;]', ge) if x.strip()]
+        except Exception:
+            continue
+
+    # steam-specific: look for details_block content
+    if url and 'store.steampowered.com' in (url or '').lower():
+        m = re.search(r"<div[^>]+class=[\"']details_block[\"'][^>]*>(.*?)</div>", html, re.I | re.S)
+        block = m.group(1) if m else ''
+        if block:
+            # Developer
+            mdev = re.search(r'Developer:\s*</?[^>]*>\s*<a[^>]*>([^<]+)</a>', block, re.I)
+            if not mdev:
+                mdev = re.search(r'Developer:\s*([^<\n]+)<', block, re.I)
+            if mdev:
+                out['developer'] = strip_tags(mdev.group(1))
+            # Publisher
+            mpub = re.search(r'Publisher:\s*</?[^>]*>\s*<a[^>]*>([^<]+)</a>', block, re.I)
+            if not mpub:
+                mpub = re.search(r'Publisher:\s*([^<\n]+)<', block, re.I)
+            if mpub:
+                out['publisher'] = strip_tags(mpub.group(1))
+            # Release Date
+            mrel = re.search(r'Release Date:\s*([^<\n]+)<', block, re.I)
+            if mrel:
+                out['releaseDate'] = strip_tags(mrel.group(1))
+            # genres/tags
+            tags = re.findall(r"""<a[^>]+href=["'][^"']*(?:tag|genre|tags)[^"']*["'][^>]*>([^<]+)</a>""", block, re.I)
+            if tags:
+                out['genres'] = [t.strip() for t in tags]
+
+    # fallback: meta tags for publisher/author
+    if not out['publisher']:
+        m = re.search(r"""<meta[^>]+name=["']publisher["'][^>]+content=["']([^"']+)["']""", html, re.I)
+        if m:
+            out['publisher'] = strip_tags(m.group(1))
+
+    return out
+
+
+def scale_page(html, n):
+    if n <= 1 or '<body' not in html:
+        return html
+    start = html.index('<body')
+    end = html.rfind('</body>')
+    if end < start:
+        return html
+    return html[:end] + html[start:end] * (n - 1) + html[end:]
+
+
+def legacy_extract(html, url):
+    return {
+        'og_image': find_og_image(html),
+        'description': find_description_from_html(html, url),
+        'metadata': find_metadata_from_html(html, url),
+        'platforms': platforms_from_html(html),
+    }
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the store page extractors on the synthetic fixture pages')
+    parser.add_argument('--repeat', type=int, default=20, help='Timing repetitions per page, best is reported (default: 20)')
+    parser.add_argument('--scale', type=int, default=4, help='Repeat each page body this many times (default: 4)')
+    args = parser.parse_args()
+
+    total_old = total_new = 0.0
+    print(f"{'page':<20} {'size':>9} {'regex ms':>10} {'1-pass ms':>10} {'speedup':>8}")
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html'))):
+        fn = os.path.basename(path)
+        url = FIXTURE_URLS.get(fn)
+        with open(path, 'r', encoding='utf-8') as f:
+            html = scale_page(f.read(), args.scale)
+
+        t_old = best_of(lambda: legacy_extract(html, url), args.repeat)
+        t_new = best_of(lambda: extract_page(html, url), args.repeat)
+        total_old += t_old
+        total_new += t_new
+        print(f"{fn:<20} {len(html):>9} {t_old * 1000:>10.2f} {t_new * 1000:>10.2f} {t_old / t_new:>7.1f}x")
+
+        old = legacy_extract(html, url)
+        new = extract_page(html, url)
+        for key in ('og_image', 'description', 'metadata', 'platforms'):
+            if old[key] != new[key]:
+                print(f"    {key} differs:\n      regex:  {old[key]!r:.160}\n      1-pass: {new[key]!r:.160}")
+
+    print(f"{'total':<20} {'':>9} {total_old * 1000:>10.2f} {total_new * 1000:>10.2f} {total_old / total_new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
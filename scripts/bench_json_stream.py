@@ -0,0 +1,127 @@
+"""Memory benchmark: streaming store-export ingestion against json.load.
+
+Usage: python scripts/bench_json_stream.py [--mb 300] [--keep FILE]
+
+Writes a synthetic Epic-style library export of about --mb megabytes (every
+entry carries a metadata blob with keyImages, long descriptions and other
+fields the listing scripts never read), then aggregates it with
+create_game_listings.aggregate_games twice, each in a fresh child process:
+once from json.load and once from the streaming, projecting reader. Peak
+resident memory (ru_maxrss) and wall time of each child are reported, and
+the two aggregation results are checked for equality.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+LOREM = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore "
+         "et dolore magna aliqua ut enim ad minim veniam quis nostrud exercitation ullamco laboris").split()
+
+
+def synthetic_entry(i, rng):
+    title = f"Game {i} " + ' '.join(rng.choice(LOREM).title() for _ in range(3))
+    slug = title.lower().replace(' ', '-')
+    long_text = ' '.join(rng.choice(LOREM) for _ in range(rng.randint(300, 900)))
+    return {
+        'app_name': f'app{i:07d}',
+        'app_title': title,
+        'app_version_string': f'++Fortnite+Release-{rng.randint(1, 30)}.{rng.randint(0, 99)}-CL-{rng.randint(10**6, 10**7)}',
+        'asset_infos': {'Windows': {'build_version': str(rng.random()), 'catalog_item_id': hashlib.md5(title.encode()).hexdigest()}},
+        'metadata': {
+            'id': hashlib.sha1(title.encode()).hexdigest()[:32],
+            'title': title,
+            'description': long_text[:300],
+            'longDescription': long_text,
+            'technicalDetails': long_text[::-1],
+            'keyImages': [
+                {'type': t, 'url': f'https://cdn1.epicgames.com/{slug}/{t.lower()}-{w}x{h}.jpg', 'width': w, 'height': h,
+                 'size': rng.randint(10**5, 10**7), 'md5': hashlib.md5(f'{title}{t}'.encode()).hexdigest(),
+                 'uploadedDate': '2023-01-01T00:00:00.000Z'}
+                for t, w, h in (('DieselGameBox', 2560, 1440), ('DieselGameBoxTall', 1200, 1600),
+                                ('Thumbnail', 400, 400), ('DieselStoreFrontWide', 1920, 1080))
+            ],
+            'categories': [{'path': p} for p in ('games', 'applications', 'games/edition/base')],
+            'customAttributes': {f'attr{k}': {'type': 'STRING', 'value': rng.choice(LOREM) * 20} for k in range(12)},
+            'developer': rng.choice(['Epic Games', 'Frictional Games', 'Some Studio']),
+            'releaseInfo': [{'id': str(k), 'appId': f'app{i}', 'platform': ['Windows', 'Mac']} for k in range(3)],
+        },
+    }
+
+
+def write_export(path, target_mb, seed=1):
+    rng = random.Random(seed)
+    target = target_mb * 1024 * 1024
+    written = 0
+    i = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        while written < target:
+            chunk = json.dumps(synthetic_entry(i, rng), indent=2)
+            f.write((',\n' if i else '') + chunk)
+            written += len(chunk) + 2
+            i += 1
+        f.write('\n]\n')
+    return i
+
+
+def child(mode, path):
+    sys.path.insert(0, HERE)
+    import create_game_listings as cgl
+    t0 = time.perf_counter()
+    if mode == 'load':
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    else:
+        entries = cgl.load_json(path)
+    games = cgl.aggregate_games({'epic': entries})
+    elapsed = time.perf_counter() - t0
+    digest = hashlib.sha1(json.dumps(games, sort_keys=True).encode()).hexdigest()
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'games': len(games), 'seconds': elapsed, 'peak_kb': peak_kb, 'digest': digest}))
+
+
+def run_child(mode, path):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, path],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare peak memory of json.load and streaming export ingestion')
+    parser.add_argument('--mb', type=int, default=300, help='Approximate size of the synthetic export in MB (default: 300)')
+    parser.add_argument('--keep', help='Write the export to this path and keep it instead of using a temp file')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    path = args.keep or tempfile.mkstemp(suffix='.json')[1]
+    try:
+        n = write_export(path, args.mb)
+        size = os.path.getsize(path)
+        print(f"synthetic export: {n} entries, {size / 1024 / 1024:.0f} MB")
+        base = run_child('stream', os.devnull)
+        results = {mode: run_child(mode, path) for mode in ('load', 'stream')}
+        print(f"{'reader':<10} {'peak RSS MB':>12} {'over base':>10} {'seconds':>8}")
+        for mode, r in results.items():
+            print(f"{mode:<10} {r['peak_kb'] / 1024:>12.0f} {(r['peak_kb'] - base['peak_kb']) / 1024:>10.0f} {r['seconds']:>8.1f}")
+        same = results['load']['digest'] == results['stream']['digest']
+        print(f"aggregated games: {results['stream']['games']}, identical results: {same}")
+    finally:
+        if not args.keep:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
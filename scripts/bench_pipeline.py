@@ -0,0 +1,330 @@
+"""End-to-end benchmark of the listing pipeline on synthetic catalogs, offline.
+
+Usage: python scripts/bench_pipeline.py [--sizes 1000,10000,100000] [--latency 20] [--out FILE]
+
+For each catalog size a scratch copy of scripts/ gets a synthetic
+docs/asset/Game with Steam, Epic, itch.io and GOG source lists and a
+games.md table. A local stand-in server (one port per store, so the per-host
+limits apply per store as they would live) serves store pages, Steam
+appdetails JSON and cover images with the configured latency; every URL in
+the synthetic sources points at it, so nothing leaves the machine.
+
+Steps, each run as its own process and timed end to end:
+
+  parse_and_update    apply games.md to the source lists
+  create_cold         create_game_listings.py with empty cache and tree
+  create_warm         the same again; manifest and HTTP cache are warm
+  merge_duplicates    merge_duplicate_folders.py after seeding 1% duplicates
+  generate_single     generate_game_data.py, single games.json
+  generate_sharded    generate_game_data.py --layout sharded
+
+Results (wall and CPU seconds, peak RSS, requests served per store) are
+written as JSON, by default to .cache/bench/pipeline-<commit>.json, so runs
+from different commits can be compared.
+"""
+import argparse
+import http.server
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import Counter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(HERE, '..'))
+
+STORES = ('steam', 'epic', 'itch', 'gog', 'cdn')
+STEPS = ('parse_and_update', 'create_cold', 'create_warm', 'merge_duplicates', 'generate_single', 'generate_sharded')
+
+WORDS = ("dark shadow legend war star space raid craft hero tales kingdom quest empire dragon night "
+         "city lost soul iron blood fire storm moon sun ghost ninja pixel robot zombie galaxy frontier "
+         "island dungeon knight wizard battle arena racer simulator tycoon escape horror mystery").split()
+
+PAGE = """<!DOCTYPE html><html><head><title>{title}</title>
+<meta property="og:image" content="{image}">
+<meta name="description" content="{title}: {blurb}">
+<script type="application/ld+json">{{"@type": "VideoGame", "name": "{title}", "description": "{blurb}",
+"author": {{"name": "{dev}"}}, "publisher": {{"name": "{pub}"}}, "genre": ["Action", "Indie"],
+"gamePlatform": ["Windows", "Linux"]}}</script>
+<style>body {{ font-family: sans-serif; }}</style></head>
+<body><div class="game_area_description"><p>{blurb}</p></div>
+{filler}
+<div class="game_area_purchase_platform"><span class="platform_img win"></span><span class="platform_img linux"></span></div>
+</body></html>"""
+
+
+class StandIn:
+    """Local stand-ins for the store hosts, one ThreadingHTTPServer per store."""
+
+    def __init__(self, latency=0.0, image_bytes=30000, page_filler=20000):
+        self.latency = latency
+        self.image = b'\xff\xd8\xff\xe0' + random.Random(0).randbytes(image_bytes)
+        self.filler = '<div class="filler">' + ('lorem ipsum ' * (page_filler // 12)) + '</div>'
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self.servers = {}
+        for store in STORES:
+            self.servers[store] = self._start(store)
+        self.base = {store: f'http://127.0.0.1:{s.server_port}' for store, s in self.servers.items()}
+
+    def _start(self, store):
+        standin = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with standin._lock:
+                    standin.counts[store] += 1
+                if standin.latency:
+                    time.sleep(standin.latency)
+                body, ctype = standin.respond(store, self.path)
+                self.send_response(200)
+                self.send_header('Content-Type', ctype)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', f'"{len(body)}"')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def respond(self, store, path):
+        parts = urllib.parse.urlsplit(path)
+        if store == 'cdn':
+            return self.image, 'image/jpeg'
+        if parts.path == '/api/appdetails':
+            appid = urllib.parse.parse_qs(parts.query)['appids'][0]
+            data = {appid: {'success': True, 'data': {
+                'name': f'App {appid}', 'short_description': f'Synthetic Steam app {appid}.',
+                'developers': ['Bench Dev'], 'publishers': ['Bench Pub'],
+                'genres': [{'id': '1', 'description': 'Action'}],
+                'categories': [{'id': 2, 'description': 'Single-player'}],
+                'release_date': {'coming_soon': False, 'date': '1 Jan, 2020'},
+                'platforms': {'windows': True, 'mac': False, 'linux': True},
+                'header_image': f"{self.base['cdn']}/steam/{appid}/header.jpg"}}}
+            return json.dumps(data).encode(), 'application/json'
+        key = parts.path.strip('/').replace('/', '-')
+        html = PAGE.format(title=key, blurb=f'A synthetic {store} page for {key}.', dev='Bench Dev', pub='Bench Pub',
+                           image=f"{self.base['cdn']}/{store}/{key}.jpg", filler=self.filler)
+        return html.encode(), 'text/html; charset=utf-8'
+
+    def take_counts(self):
+        with self._lock:
+            counts = dict(self.counts)
+            self.counts.clear()
+        return counts
+
+    def close(self):
+        for server in self.servers.values():
+            server.shutdown()
+
+
+def synthetic_names(n, rng):
+    names = []
+    seen = set()
+    while len(names) < n:
+        name = ' '.join(rng.choice(WORDS).title() for _ in range(rng.randint(2, 4)))
+        if rng.random() < 0.3:
+            name += f' {rng.randint(2, 9)}'
+        name += f' {len(names)}'
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def url_slug(name):
+    return name.lower().replace(' ', '-')
+
+
+def write_sources(game_dir, names, base, rng):
+    lists = {'steam': [], 'epic': [], 'itch': [], 'gog': [], 'other': []}
+    for i, name in enumerate(names):
+        stores = [s for s, p in (('steam', 0.5), ('epic', 0.3), ('itch', 0.2), ('gog', 0.2)) if rng.random() < p]
+        for store in stores or ['steam']:
+            s = url_slug(name)
+            if store == 'steam':
+                appid = 100000 + i
+                lists['steam'].append({'name': name, 'appid': appid, 'store_link': f"{base['steam']}/steam/app/{appid}/",
+                                       'playtime_minutes': rng.randint(0, 5000)})
+            elif store == 'epic':
+                lists['epic'].append({'app_name': s, 'app_title': name, 'url': f"{base['epic']}/epic/store/p/{s}",
+                                      'metadata': {'description': f'{name} on Epic. ' * 20, 'developer': 'Bench Dev',
+                                                   'keyImages': [{'type': 'DieselGameBox', 'url': f"{base['cdn']}/epic/{s}.jpg",
+                                                                  'width': 2560, 'height': 1440}] * 4,
+                                                   'customAttributes': {f'a{k}': 'x' * 200 for k in range(10)}}})
+            elif store == 'itch':
+                lists['itch'].append({'name': name, 'url': f"{base['itch']}/itchio/{s}"})
+            else:
+                lists['gog'].append({'name': name, 'storeUrl': f"{base['gog']}/gog/game/{s}"})
+    for store, entries in lists.items():
+        with open(os.path.join(game_dir, f'_{store}_game_list.json'), 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2)
+
+    # games.md: a few new GOG titles and new Steam links for known games
+    rows = []
+    for k in range(max(1, len(names) // 50)):
+        name = rng.choice(names)
+        rows.append(f"| {name} | [{name}]({base['steam']}/steam/app/{900000 + k}/) | "
+                    f"[{name}]({base['gog']}/gog/game/md-{k}) |")
+    with open(os.path.join(game_dir, 'games.md'), 'w', encoding='utf-8') as f:
+        f.write('## Games\n\n| Game Title | Steam Link | GOG Link |\n| :--- | :--- | :--- |\n' + '\n'.join(rows) + '\n')
+
+
+def seed_tree(game_dir, names, image):
+    """Folders with meta.json and cover.jpg, for runs that skip create_cold."""
+    for name in names:
+        folder = os.path.join(game_dir, ''.join(c for c in name if c.isalnum() or c in ' _-').strip().replace(' ', '_'))
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'name': name, 'description': f'{name} description', 'genre': ['Action'], 'platforms': ['Windows'],
+                       'tags': [''], 'storeUrl': {'steam': 'https://store.steampowered.com/app/1/'}}, f, indent=2)
+        with open(os.path.join(folder, 'cover.jpg'), 'wb') as f:
+            f.write(image)
+
+
+def seed_duplicates(game_dir, rng, fraction=0.01):
+    """Copies of some folders under an underscore-free name, which
+    merge_duplicate_folders treats as the same game."""
+    folders = sorted(d for d in os.listdir(game_dir) if '_' in d and os.path.isdir(os.path.join(game_dir, d)))
+    picked = rng.sample(folders, max(1, int(len(folders) * fraction))) if folders else []
+    for d in picked:
+        shutil.copytree(os.path.join(game_dir, d), os.path.join(game_dir, d.replace('_', '')), dirs_exist_ok=True)
+    return len(picked)
+
+
+def run_step(cmd, cwd, log_path):
+    t0 = time.perf_counter()
+    with open(log_path, 'ab') as log:
+        log.write(('\n$ ' + ' '.join(cmd) + '\n').encode())
+        log.flush()
+        proc = subprocess.Popen(cmd, cwd=cwd, stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - t0
+    return {
+        'exit_code': os.waitstatus_to_exitcode(status),
+        'wall_seconds': round(wall, 3),
+        'cpu_seconds': round(usage.ru_utime + usage.ru_stime, 3),
+        'max_rss_kb': usage.ru_maxrss,
+    }
+
+
+def bench_size(n, args, standin):
+    rng = random.Random(args.seed)
+    work = tempfile.mkdtemp(prefix=f'bench-{n}-')
+    try:
+        shutil.copytree(HERE, os.path.join(work, 'scripts'),
+                        ignore=shutil.ignore_patterns('__pycache__', 'fixtures', 'tests'))
+        game_dir = os.path.join(work, 'docs', 'asset', 'Game')
+        os.makedirs(game_dir)
+        names = synthetic_names(n, rng)
+        write_sources(game_dir, names, standin.base, rng)
+        with open(os.path.join(work, 'game_list.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(names + [f'Unknown Title {k}' for k in range(max(1, n // 100))]) + '\n')
+
+        py = sys.executable
+        create = [py, 'scripts/create_game_listings.py', '--fetch-descriptions', '--jobs', str(args.jobs),
+                  '--per-host', str(args.per_host), '--host-rate', str(args.host_rate),
+                  '--steam-api-rate', str(args.host_rate), '--steam-api', f"{standin.base['steam']}/api/appdetails"]
+        commands = {
+            'parse_and_update': [py, 'scripts/parse_and_update.py'],
+            'create_cold': create,
+            'create_warm': create,
+            'merge_duplicates': [py, 'scripts/merge_duplicate_folders.py'],
+            'generate_single': [py, 'scripts/generate_game_data.py', 'game_list.txt'],
+            'generate_sharded': [py, 'scripts/generate_game_data.py', 'game_list.txt', '--layout', 'sharded'],
+        }
+        log_path = os.path.join(work, 'bench.log')
+        steps = {}
+        for step in args.steps:
+            if step == 'merge_duplicates':
+                if 'create_cold' not in args.steps:
+                    seed_tree(game_dir, names, standin.image)
+                seed_duplicates(game_dir, rng)
+            if step.startswith('generate') and not any(s.startswith('create') or s == 'merge_duplicates' for s in args.steps) \
+                    and not os.path.exists(os.path.join(game_dir, names[0].replace(' ', '_'))):
+                seed_tree(game_dir, names, standin.image)
+            standin.take_counts()
+            result = run_step(commands[step], work, log_path)
+            result['requests'] = standin.take_counts()
+            steps[step] = result
+            flag = '' if result['exit_code'] == 0 else f"  (exit {result['exit_code']}, see {log_path})"
+            print(f"{n:>8} {step:<18} {result['wall_seconds']:>9.2f} {result['cpu_seconds']:>9.2f} "
+                  f"{result['max_rss_kb'] / 1024:>8.0f} {sum(result['requests'].values()):>9}{flag}", flush=True)
+        return {'games': n, 'steps': steps}
+    finally:
+        if args.keep:
+            print(f"kept {work}")
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the listing pipeline end to end on synthetic catalogs')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='Comma separated catalog sizes (default: 1000,10000,100000)')
+    parser.add_argument('--steps', default=','.join(STEPS), help=f"Comma separated steps to run (default: {','.join(STEPS)})")
+    parser.add_argument('--latency', type=float, default=20, help='Stand-in server latency per request in ms (default: 20)')
+    parser.add_argument('--jobs', type=int, default=16, help='create_game_listings --jobs (default: 16)')
+    parser.add_argument('--per-host', dest='per_host', type=int, default=8, help='create_game_listings --per-host (default: 8)')
+    parser.add_argument('--host-rate', dest='host_rate', type=float, default=0, help='create_game_listings --host-rate (default: 0, uncapped)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', help='Result file (default: .cache/bench/pipeline-<commit>.json)')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch trees for inspection')
+    args = parser.parse_args()
+
+    args.steps = [s.strip() for s in args.steps.split(',') if s.strip()]
+    unknown = [s for s in args.steps if s not in STEPS]
+    if unknown:
+        parser.error(f"unknown steps: {', '.join(unknown)}")
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    commit = git_commit()
+    out = args.out or os.path.join(ROOT, '.cache', 'bench', f'pipeline-{commit}.json')
+
+    standin = StandIn(latency=args.latency / 1000.0)
+    runs = []
+    try:
+        print(f"{'games':>8} {'step':<18} {'wall s':>9} {'cpu s':>9} {'rss MB':>8} {'requests':>9}")
+        for n in sizes:
+            runs.append(bench_size(n, args, standin))
+    finally:
+        standin.close()
+
+    report = {
+        'commit': commit,
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {'latency_ms': args.latency, 'jobs': args.jobs, 'per_host': args.per_host,
+                   'host_rate': args.host_rate, 'seed': args.seed, 'steps': args.steps},
+        'runs': runs,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {out}")
+
+
+if __name__ == '__main__':
+    main()
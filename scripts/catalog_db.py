@@ -0,0 +1,387 @@
+"""SQLite catalog of every game, its store links, appids, tags and images.
+
+Usage: python scripts/catalog_db.py [--db PATH] import|export|duplicates|stats
+
+The catalog holds what is otherwise spread over one meta.json per folder
+under docs/asset/Game and the _*_game_list.json source lists, in indexed
+tables:
+
+  games          one row per folder: name, description, developer, ...
+  store_links    (game, store) -> url, indexed by url
+  appids         (game, store) -> appid, indexed by (store, appid)
+  tags           genre / platform / tag values in list order, indexed by value
+  images         cover and resized variants with hash and dimensions
+  source_entries every entry of the source lists, indexed by name and appid
+
+`import` loads the current files, `export` writes meta.json (and a missing
+synopsis.txt) for every game back out of the catalog; an import followed by
+an export leaves the tree byte-identical. `duplicates` lists folders that
+merge_duplicate_folders.py would merge, found through the norm_key index.
+generate_game_data.py --catalog and create_game_listings.py --catalog read
+from and write to the same database.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+
+from json_stream import load_json_array
+from optimize_covers import file_sha1, find_cover_file, load_variants
+from output_writer import OutputWriter
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+GAME_DIR = os.path.join(ROOT, 'docs', 'asset', 'Game')
+DB_PATH = os.path.join(ROOT, '.cache', 'catalog.sqlite')
+
+SCHEMA_VERSION = 1
+# appId / storeUrl keys in the order meta.json lists them
+STORE_KEYS = ('steam', 'itchIo', 'epicGames', 'gog', 'xbox', 'playstation', 'nintendo', 'newgrounds', 'other')
+# meta.json list fields and their tag kind
+TAG_FIELDS = {'genre': 'genre', 'platforms': 'platform', 'tags': 'tag'}
+# meta.json fields with a column of their own
+TEXT_FIELDS = {'image': 'image', 'description': 'description', 'developer': 'developer',
+               'publisher': 'publisher', 'releaseDate': 'release_date'}
+META_ORDER = ('name', 'image', 'appId', 'description', 'developer', 'publisher', 'releaseDate',
+              'genre', 'platforms', 'tags', 'storeUrl')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    folder TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    norm_key TEXT NOT NULL,
+    image TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    developer TEXT NOT NULL DEFAULT '',
+    publisher TEXT NOT NULL DEFAULT '',
+    release_date TEXT NOT NULL DEFAULT '',
+    synopsis TEXT,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS games_norm_key ON games (norm_key);
+CREATE INDEX IF NOT EXISTS games_name ON games (name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS store_links (
+    game_id INTEGER NOT NULL REFERENCES games (id) ON DELETE CASCADE,
+    store TEXT NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (game_id, store)
+);
+CREATE INDEX IF NOT EXISTS store_links_url ON store_links (url);
+CREATE TABLE IF NOT EXISTS appids (
+    game_id INTEGER NOT NULL REFERENCES games (id) ON DELETE CASCADE,
+    store TEXT NOT NULL,
+    appid NOT NULL,
+    PRIMARY KEY (game_id, store)
+);
+CREATE INDEX IF NOT EXISTS appids_lookup ON appids (store, appid);
+CREATE TABLE IF NOT EXISTS tags (
+    game_id INTEGER NOT NULL REFERENCES games (id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (game_id, kind, position)
+);
+CREATE INDEX IF NOT EXISTS tags_value ON tags (kind, value);
+CREATE TABLE IF NOT EXISTS images (
+    game_id INTEGER NOT NULL REFERENCES games (id) ON DELETE CASCADE,
+    role TEXT NOT NULL,
+    file TEXT NOT NULL,
+    type TEXT NOT NULL DEFAULT '',
+    width INTEGER,
+    height INTEGER,
+    sha1 TEXT NOT NULL DEFAULT '',
+    position INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (game_id, role, file)
+);
+CREATE TABLE IF NOT EXISTS source_entries (
+    id INTEGER PRIMARY KEY,
+    store TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    appid,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS source_entries_name ON source_entries (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS source_entries_appid ON source_entries (appid);
+'''
+
+
+def norm_key(folder):
+    """Duplicate key, the same normalisation merge_duplicate_folders.py uses."""
+    return folder.replace(' ', '').replace('_', '').lower()
+
+
+def source_store(path):
+    return os.path.basename(path).lstrip('_').split('_game_list.json')[0]
+
+
+class Catalog:
+    """The catalog database. Safe to share between threads: every call runs
+    under one lock on a single connection."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA foreign_keys = ON')
+        self._db.execute('PRAGMA journal_mode = WAL')
+        self._db.execute('PRAGMA synchronous = NORMAL')
+        version = self._db.execute('PRAGMA user_version').fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise ValueError(f'{path} has catalog schema {version}, expected {SCHEMA_VERSION}')
+        self._db.executescript(SCHEMA)
+        self._db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # -- writing
+
+    def put_game(self, folder, meta, synopsis=None, images=None):
+        """Insert or replace the game stored for folder from a meta.json dict.
+        images, when given, replaces the folder's image rows (see scan_images)."""
+        row = {col: meta.get(field) or '' for field, col in TEXT_FIELDS.items()}
+        extra = {k: v for k, v in meta.items() if k not in META_ORDER}
+        with self._lock, self._db:
+            cur = self._db.execute('SELECT id FROM games WHERE folder = ?', (folder,)).fetchone()
+            if cur is None:
+                game_id = self._db.execute(
+                    'INSERT INTO games (folder, name, norm_key, synopsis) VALUES (?, ?, ?, ?)',
+                    (folder, meta.get('name') or folder, norm_key(folder), synopsis)).lastrowid
+            else:
+                game_id = cur[0]
+                self._db.execute('UPDATE games SET name = ? WHERE id = ?', (meta.get('name') or folder, game_id))
+                if synopsis is not None:
+                    self._db.execute('UPDATE games SET synopsis = ? WHERE id = ?', (synopsis, game_id))
+            self._db.execute(
+                'UPDATE games SET image = ?, description = ?, developer = ?, publisher = ?, release_date = ?, '
+                'extra = ? WHERE id = ?',
+                (row['image'], row['description'], row['developer'], row['publisher'], row['release_date'],
+                 json.dumps(extra, ensure_ascii=False), game_id))
+            for table in ('store_links', 'appids', 'tags'):
+                self._db.execute(f'DELETE FROM {table} WHERE game_id = ?', (game_id,))
+            self._db.executemany(
+                'INSERT INTO appids (game_id, store, appid) VALUES (?, ?, ?)',
+                [(game_id, k, v) for k, v in (meta.get('appId') or {}).items() if v])
+            self._db.executemany(
+                'INSERT INTO store_links (game_id, store, url) VALUES (?, ?, ?)',
+                [(game_id, k, v) for k, v in (meta.get('storeUrl') or {}).items() if v])
+            for field, kind in TAG_FIELDS.items():
+                values = meta.get(field) or []
+                self._db.executemany(
+                    'INSERT INTO tags (game_id, kind, position, value) VALUES (?, ?, ?, ?)',
+                    [(game_id, kind, i, v) for i, v in enumerate(values)])
+            if images is not None:
+                self._db.execute('DELETE FROM images WHERE game_id = ?', (game_id,))
+                self._db.executemany(
+                    'INSERT INTO images (game_id, role, file, type, width, height, sha1, position) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(game_id, img['role'], img['file'], img.get('type', ''), img.get('width'),
+                      img.get('height'), img.get('sha1', ''), i) for i, img in enumerate(images)])
+            return game_id
+
+    def remove_missing(self, folders):
+        """Drop games whose folder is not in folders; returns how many."""
+        folders = set(folders)
+        with self._lock, self._db:
+            gone = [(f,) for (f,) in self._db.execute('SELECT folder FROM games') if f not in folders]
+            self._db.executemany('DELETE FROM games WHERE folder = ?', gone)
+        return len(gone)
+
+    def import_folders(self, game_dir=GAME_DIR):
+        """Load every game folder (meta.json, synopsis.txt, cover and variants).
+        Returns (imported, removed, skipped)."""
+        imported = skipped = 0
+        folders = []
+        for entry in sorted(os.scandir(game_dir), key=lambda e: e.name):
+            if not entry.is_dir():
+                continue
+            try:
+                with open(os.path.join(entry.path, 'meta.json'), 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                skipped += 1
+                continue
+            synopsis = None
+            try:
+                with open(os.path.join(entry.path, 'synopsis.txt'), 'r', encoding='utf-8') as f:
+                    synopsis = f.read()
+            except OSError:
+                pass
+            self.put_game(entry.name, meta, synopsis, scan_images(entry.path))
+            folders.append(entry.name)
+            imported += 1
+        return imported, self.remove_missing(folders), skipped
+
+    def import_source_lists(self, paths):
+        """Replace the stored entries of each source list; returns the entry count."""
+        count = 0
+        for path in paths:
+            store = source_store(path)
+            rows = []
+            for i, e in enumerate(load_json_array(path)):
+                if not isinstance(e, dict):
+                    continue
+                name = e.get('name') or e.get('app_title') or (e.get('metadata') or {}).get('title')
+                rows.append((store, i, name, e.get('appid'), json.dumps(e, ensure_ascii=False)))
+            with self._lock, self._db:
+                self._db.execute('DELETE FROM source_entries WHERE store = ?', (store,))
+                self._db.executemany(
+                    'INSERT INTO source_entries (store, position, name, appid, entry) VALUES (?, ?, ?, ?, ?)', rows)
+            count += len(rows)
+        return count
+
+    # -- reading
+
+    def folders(self):
+        with self._lock:
+            return [f for (f,) in self._db.execute('SELECT folder FROM games ORDER BY folder')]
+
+    def _game_id(self, folder):
+        row = self._db.execute('SELECT id FROM games WHERE folder = ?', (folder,)).fetchone()
+        return row[0] if row else None
+
+    def meta(self, folder):
+        """The folder's meta.json dict as exported, or None."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT id, name, image, description, developer, publisher, release_date, extra '
+                'FROM games WHERE folder = ?', (folder,)).fetchone()
+            if row is None:
+                return None
+            game_id = row[0]
+            appids = dict(self._db.execute('SELECT store, appid FROM appids WHERE game_id = ?', (game_id,)))
+            links = dict(self._db.execute('SELECT store, url FROM store_links WHERE game_id = ?', (game_id,)))
+            tags = {kind: [] for kind in TAG_FIELDS.values()}
+            for kind, value in self._db.execute(
+                    'SELECT kind, value FROM tags WHERE game_id = ? ORDER BY kind, position', (game_id,)):
+                tags[kind].append(value)
+        meta = {
+            'name': row[1],
+            'image': row[2],
+            'appId': dict({k: appids.pop(k, 0) for k in STORE_KEYS}, **appids),
+            'description': row[3],
+            'developer': row[4],
+            'publisher': row[5],
+            'releaseDate': row[6],
+        }
+        for field, kind in TAG_FIELDS.items():
+            meta[field] = tags[kind]
+        meta['storeUrl'] = dict({k: links.pop(k, '') for k in STORE_KEYS}, **links)
+        meta.update(json.loads(row[7]))
+        return meta
+
+    def synopsis(self, folder):
+        with self._lock:
+            row = self._db.execute('SELECT synopsis FROM games WHERE folder = ?', (folder,)).fetchone()
+        return row[0] if row else None
+
+    def cover(self, folder):
+        """(file, sha1, variants) for the folder's cover as recorded at import,
+        variants shaped like optimize_covers' index.json; (None, None, None)
+        when it has no cover."""
+        with self._lock:
+            game_id = self._game_id(folder)
+            rows = self._db.execute(
+                'SELECT role, file, type, width, height, sha1 FROM images WHERE game_id = ? ORDER BY position',
+                (game_id,)).fetchall()
+        cover = next((r for r in rows if r[0] == 'cover'), None)
+        if cover is None:
+            return None, None, None
+        variants = [{'file': r[1], 'type': r[2], 'width': r[3], 'height': r[4], 'sha1': r[5]}
+                    for r in rows if r[0] == 'variant']
+        index = None
+        if cover[3] is not None:
+            index = {'source': cover[1], 'source_hash': cover[5], 'width': cover[3], 'height': cover[4],
+                     'variants': variants}
+        return cover[1], cover[5], index
+
+    def duplicates(self):
+        """Groups of folders sharing a norm_key, in merge_duplicate_folders' sense."""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT norm_key, folder FROM games WHERE norm_key IN '
+                '(SELECT norm_key FROM games GROUP BY norm_key HAVING COUNT(*) > 1) ORDER BY norm_key, folder'
+            ).fetchall()
+        groups = {}
+        for key, folder in rows:
+            groups.setdefault(key, []).append(folder)
+        return groups
+
+    def stats(self):
+        with self._lock:
+            return {table: self._db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                    for table in ('games', 'store_links', 'appids', 'tags', 'images', 'source_entries')}
+
+    # -- exporting
+
+    def export_folders(self, game_dir=GAME_DIR, writer=None):
+        """Write meta.json for every game, and synopsis.txt where the folder
+        has none. Returns the writer, whose counts tell what changed."""
+        writer = writer or OutputWriter()
+        for folder in self.folders():
+            dest = os.path.join(game_dir, folder)
+            os.makedirs(dest, exist_ok=True)
+            writer.write_json(os.path.join(dest, 'meta.json'), self.meta(folder), indent=2, ensure_ascii=False)
+            syn_path = os.path.join(dest, 'synopsis.txt')
+            synopsis = self.synopsis(folder)
+            if synopsis is not None and not os.path.exists(syn_path):
+                writer.write_text(syn_path, synopsis)
+        return writer
+
+
+def scan_images(game_path):
+    """Image rows for a game folder: its cover and, when the variants index
+    was built from that cover, each variant."""
+    cover = find_cover_file(game_path)
+    if not cover:
+        return []
+    sha1 = file_sha1(os.path.join(game_path, cover))
+    index = load_variants(game_path, sha1)
+    images = [{'role': 'cover', 'file': cover, 'sha1': sha1,
+               'width': index['width'] if index else None, 'height': index['height'] if index else None}]
+    for v in (index or {}).get('variants', []):
+        images.append({'role': 'variant', 'file': v['file'], 'type': v['type'], 'width': v['width'],
+                       'height': v['height'], 'sha1': v.get('sha1', '')})
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintain the SQLite game catalog')
+    parser.add_argument('--db', default=DB_PATH, help='Catalog database (default: .cache/catalog.sqlite)')
+    parser.add_argument('--game-dir', dest='game_dir', default=GAME_DIR, help='Game folders (default: docs/asset/Game)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('import', help='Load meta.json folders and the _*_game_list.json source lists')
+    sub.add_parser('export', help='Write meta.json and missing synopsis.txt files from the catalog')
+    sub.add_parser('duplicates', help='List folders that normalise to the same name')
+    sub.add_parser('stats', help='Row counts per table')
+    args = parser.parse_args()
+
+    catalog = Catalog(args.db)
+    try:
+        if args.command == 'import':
+            imported, removed, skipped = catalog.import_folders(args.game_dir)
+            lists = sorted(os.path.join(args.game_dir, fn) for fn in os.listdir(args.game_dir)
+                           if fn.startswith('_') and fn.endswith('_game_list.json'))
+            entries = catalog.import_source_lists(lists)
+            print(f"Imported {imported} games ({removed} removed, {skipped} folders without a readable meta.json) "
+                  f"and {entries} entries from {len(lists)} source lists into {args.db}")
+        elif args.command == 'export':
+            print(catalog.export_folders(args.game_dir).summary())
+        elif args.command == 'duplicates':
+            groups = catalog.duplicates()
+            for key, folders in groups.items():
+                print(f"{key}: {', '.join(folders)}")
+            print(f"{len(groups)} duplicate groups")
+        else:
+            for table, count in catalog.stats().items():
+                print(f"{table:<15} {count:>8}")
+    finally:
+        catalog.close()
+
+
+if __name__ == '__main__':
+    main()
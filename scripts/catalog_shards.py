@@ -0,0 +1,107 @@
+"""Sharded catalog output for generate_game_data.
+
+The catalog is split into fixed-size shards, either pages in catalog order or
+one shard per first letter of the name, written minified under content-hashed
+names (games-<hash>.json) so they can be cached forever. A small index file
+with the counts, the shard list and each shard's first and last sort keys is
+the only file that has to be fetched before the first screen renders.
+"""
+import hashlib
+import json
+import os
+import re
+
+SHARD_PATTERN = re.compile(r'^games-[0-9a-f]{12}\.json$')
+INDEX_VERSION = 1
+
+
+def sort_key(game):
+    return re.sub(r'\s+', ' ', (game.get('name') or '').strip().lower())
+
+
+def letter_of(key):
+    c = key[:1]
+    return c if 'a' <= c <= 'z' else '#'
+
+
+def plan_shards(games, shard_size, shard_by):
+    """[(ordinals, label)] in the order the shards are listed in the index.
+    Ordinals index into `games`."""
+    if shard_by == 'letter':
+        order = sorted(range(len(games)), key=lambda i: (sort_key(games[i]), i))
+        groups = {}
+        for i in order:
+            groups.setdefault(letter_of(sort_key(games[i])), []).append(i)
+        shards = []
+        for letter in sorted(groups):
+            members = groups[letter]
+            # a letter bigger than a page is split so no shard exceeds shard_size
+            for start in range(0, len(members), shard_size):
+                shards.append((members[start:start + shard_size], letter))
+        return shards
+
+    return [(list(range(start, min(start + shard_size, len(games)))), str(n + 1))
+            for n, start in enumerate(range(0, len(games), shard_size))]
+
+
+def render_shards(games, shard_size=50, shard_by='page', extra=None):
+    """(shards, index) without writing anything: shards is a list of
+    (file name, bytes), index the dict listing them, with extra merged in."""
+    shards = []
+    listed = []
+    for ordinals, label in plan_shards(games, shard_size, shard_by):
+        payload = json.dumps([games[i] for i in ordinals], separators=(',', ':'), ensure_ascii=False)
+        data = payload.encode('utf-8')
+        name = f"games-{hashlib.sha1(data).hexdigest()[:12]}.json"
+        shards.append((name, data))
+        entry = {
+            'file': f"shards/{name}",
+            'label': label,
+            'count': len(ordinals),
+            'bytes': len(data),
+            'first': sort_key(games[ordinals[0]]),
+            'last': sort_key(games[ordinals[-1]]),
+        }
+        if shard_by == 'letter':
+            # catalog positions, so letter shards can still be shown in list order
+            entry['ordinals'] = ordinals
+        else:
+            entry['start'] = ordinals[0]
+        listed.append(entry)
+
+    index = {
+        'version': INDEX_VERSION,
+        'count': len(games),
+        'shard_by': shard_by,
+        'shard_size': shard_size,
+        'sort_key': 'name, lower-cased',
+        'shards': listed,
+    }
+    index.update(extra or {})
+    return shards, index
+
+
+def dump_index(index, minify=False):
+    if minify:
+        return json.dumps(index, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return json.dumps(index, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def write_shards(games, out_dir, writer, shard_size=50, shard_by='page', index_name='games-index.json',
+                 extra=None, minify=False):
+    """Write the shards to out_dir/shards/ and the index to out_dir/index_name
+    (minified with minify). Shards no longer listed in the index are deleted.
+    Returns the index."""
+    shard_dir = os.path.join(out_dir, 'shards')
+    os.makedirs(shard_dir, exist_ok=True)
+
+    shards, index = render_shards(games, shard_size, shard_by, extra)
+    for name, data in shards:
+        writer.write_bytes(os.path.join(shard_dir, name), data)
+    writer.write_bytes(os.path.join(out_dir, index_name), dump_index(index, minify))
+
+    keep = {name for name, _ in shards}
+    for fn in os.listdir(shard_dir):
+        if SHARD_PATTERN.match(fn) and fn not in keep:
+            os.remove(os.path.join(shard_dir, fn))
+    return index
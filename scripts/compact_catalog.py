@@ -0,0 +1,91 @@
+"""Compact production form of the catalog entries (generate_game_data.py --production).
+
+The development output is made to be read: games.json is indented and every
+entry carries every field, empty or not. The production form
+
+  - is minified,
+  - leaves out fields that are empty or null ('', null, [], {}, ['']),
+  - writes storefronts as an object of store code -> URL, with the short
+    codes of STORE_CODES, and primary_store as a code,
+  - leaves out primary_link when it is the primary store's storefront URL,
+    which is always the case for entries built by generate_game_data.
+
+expand_game() restores the development shape. The shard index of a
+production build carries "format": "compact" and the code table, and
+docs/assets/js/game-catalog.js expands the entries the same way in the browser.
+"""
+import gzip
+
+FORMAT = 'compact'
+
+STORE_CODES = {
+    'steam': 's',
+    'itchIo': 'i',
+    'epicGames': 'e',
+    'gog': 'g',
+    'xbox': 'x',
+    'playstation': 'p',
+    'nintendo': 'n',
+    'newgrounds': 'w',
+    'other': 'o',
+}
+STORE_NAMES = {code: name for name, code in STORE_CODES.items()}
+
+# field order and values of an entry as generate_game_data builds it
+FIELDS = {
+    'name': '',
+    'description': '',
+    'image': '',
+    'image_width': None,
+    'image_height': None,
+    'image_variants': [],
+    'primary_store': '',
+    'primary_link': '',
+    'storefronts': [],
+}
+
+
+def _empty(value):
+    return value is None or value == '' or value == [] or value == {} or value == ['']
+
+
+def compact_game(game):
+    # stores without a code keep their name; names are longer than any code
+    storefronts = {STORE_CODES.get(s['store'], s['store']): s['url'] for s in game.get('storefronts') or []}
+    primary = STORE_CODES.get(game.get('primary_store'), game.get('primary_store'))
+    out = {}
+    for key, value in game.items():
+        if key == 'storefronts':
+            value = storefronts
+        elif key == 'primary_store':
+            value = primary
+        elif key == 'primary_link' and value and value == storefronts.get(primary):
+            continue
+        if _empty(value) and key != 'name':
+            continue
+        out[key] = value
+    return out
+
+
+def expand_game(game):
+    """The development form of a compact entry."""
+    storefronts = game.get('storefronts') or {}
+    out = {}
+    for key, default in FIELDS.items():
+        value = game.get(key, default)
+        out[key] = list(value) if isinstance(value, list) else value
+    out['primary_store'] = STORE_NAMES.get(game.get('primary_store'), game.get('primary_store') or '')
+    out['primary_link'] = game.get('primary_link') or storefronts.get(game.get('primary_store'), '')
+    out['storefronts'] = [{'store': STORE_NAMES.get(code, code), 'url': url} for code, url in storefronts.items()]
+    for key, value in game.items():
+        out.setdefault(key, value)
+    return out
+
+
+def size_line(label, before, after):
+    """Development vs production size of an output, raw and gzipped; before
+    and after are lists of the bytes of each file."""
+    raw = (sum(len(b) for b in before), sum(len(a) for a in after))
+    gz = (sum(len(gzip.compress(b, mtime=0)) for b in before), sum(len(gzip.compress(a, mtime=0)) for a in after))
+    change = (raw[1] - raw[0]) / raw[0] if raw[0] else 0.0
+    return f"  {label:<28} {raw[0]:>12,} -> {raw[1]:>12,} bytes ({change:+.0%}), gzip {gz[0]:>10,} -> {gz[1]:>10,}"
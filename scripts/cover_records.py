@@ -0,0 +1,144 @@
+"""Where each downloaded cover came from, so it can be refreshed cheaply.
+
+CoverRecords keeps, per cover file, the image URL it was downloaded from,
+the ETag, Last-Modified and length the server sent with it, the SHA-1 of the
+bytes written and when it was last confirmed current. plan(path, url) picks
+the cheapest way to bring the file up to date:
+
+  fresh        confirmed less than `ttl` seconds ago; no request at all
+  conditional  GET with If-None-Match / If-Modified-Since, a 304 means the
+               file is current and costs only the response headers
+  head         the server sent no validators, or the file on disk has no
+               record (e.g. a fresh checkout without .cache): HEAD, and the
+               file is current when ETag or Content-Length match
+  download     nothing to compare against; a full GET
+
+A record only counts while the file on disk still has the recorded SHA-1,
+so a cover replaced by hand is checked again rather than trusted.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def file_digest(path):
+    """(size, sha1) of the file at path, or None if it cannot be read."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    return len(data), hashlib.sha1(data).hexdigest()
+
+
+class CoverRecords:
+    def __init__(self, path, root, ttl=0):
+        self.path = path
+        self.root = root
+        self.ttl = ttl
+        self.stats = {'fresh': 0, 'not_modified': 0, 'head_unchanged': 0, 'downloaded': 0, 'downloaded_bytes': 0}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._entries = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def _key(self, path):
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def _count(self, stat, nbytes=0):
+        with self._lock:
+            self.stats[stat] += 1
+            if nbytes:
+                self.stats['downloaded_bytes'] += nbytes
+
+    def _store(self, path, url, headers, size, sha1):
+        with self._lock:
+            self._entries[self._key(path)] = {
+                'url': url,
+                'etag': headers.get('ETag') or '',
+                'last_modified': headers.get('Last-Modified') or '',
+                'size': size,
+                'sha1': sha1,
+                'checked': time.time(),
+            }
+            self._dirty = True
+
+    def _matching(self, path, url):
+        """The record for path if it was downloaded from url and is unchanged on disk."""
+        with self._lock:
+            entry = self._entries.get(self._key(path))
+            entry = dict(entry) if entry else None
+        if not entry or entry.get('url') != url:
+            return None
+        if file_digest(path) != (entry.get('size'), entry.get('sha1')):
+            return None
+        return entry
+
+    def plan(self, path, url):
+        """(action, extra request headers) for refreshing path from url."""
+        entry = self._matching(path, url)
+        if entry is None:
+            return ('head', {}) if os.path.exists(path) else ('download', {})
+        if time.time() - entry.get('checked', 0) < self.ttl:
+            self._count('fresh')
+            return 'fresh', {}
+        validators = {}
+        if entry.get('etag'):
+            validators['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            validators['If-Modified-Since'] = entry['last_modified']
+        return ('conditional', validators) if validators else ('head', {})
+
+    def not_modified(self, path, url, headers):
+        """A conditional GET answered 304."""
+        entry = self._matching(path, url) or {}
+        merged = {'ETag': headers.get('ETag') or entry.get('etag', ''),
+                  'Last-Modified': headers.get('Last-Modified') or entry.get('last_modified', '')}
+        self._store(path, url, merged, entry.get('size'), entry.get('sha1'))
+        self._count('not_modified')
+
+    def unchanged(self, path, url, headers):
+        """Whether a HEAD response describes the file already at path; if so
+        its validators are recorded for the next conditional request."""
+        digest = file_digest(path)
+        if digest is None:
+            return False
+        entry = self._matching(path, url)
+        etag = headers.get('ETag') or ''
+        if entry and entry.get('etag') and etag:
+            same = entry['etag'] == etag
+        else:
+            length = headers.get('Content-Length')
+            same = length is not None and length.isdigit() and int(length) == digest[0]
+        if same:
+            self._store(path, url, headers, *digest)
+            self._count('head_unchanged')
+        return same
+
+    def downloaded(self, path, url, headers, data):
+        self._store(path, url, headers, len(data), hashlib.sha1(data).hexdigest())
+        self._count('downloaded', len(data))
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+    def summary(self):
+        s = self.stats
+        current = s['fresh'] + s['not_modified'] + s['head_unchanged']
+        return (f"Covers: {current} already current ({s['fresh']} checked recently, {s['not_modified']} not modified, "
+                f"{s['head_unchanged']} matched by HEAD), {s['downloaded']} downloaded "
+                f"({s['downloaded_bytes'] / 1024:.0f} KB)")
@@ -0,0 +1,163 @@
+"""Content-addressed store for cover images.
+
+Usage: python scripts/cover_store.py [--gc]
+
+Copies every game's cover and its optimized variants (see optimize_covers.py)
+into docs/asset/cas/ under the SHA-1 of their bytes, e.g.
+docs/asset/cas/3f2a...9c.jpg. Byte-identical images across folders end up as
+one blob, and since a blob's name changes whenever its content does it can be
+served with a long immutable cache lifetime. generate_game_data points
+games.json at these blobs when they exist and falls back to the per-folder
+files otherwise.
+
+The per-folder images (covers and variants/) are left out of the deploy by
+the hosting ignore rules in firebase.json, so each image is shipped once,
+as its blob; run this stage before generate_game_data and deploying, or the
+covers missing from the store are not served at all (generate_game_data
+warns about them, and --check, run by firebase.json before every deploy,
+refuses a catalog that still points at per-folder images). The summary compares the image bytes in the game folders
+with the blob bytes that are deployed instead.
+
+Only exact duplicates are merged; visually similar images with different
+bytes stay separate blobs.
+"""
+import argparse
+import glob
+import os
+import sys
+
+from optimize_covers import GAME_DIR, IMAGE_EXTS, ROOT, VARIANT_DIR, HashCache, find_cover_file, load_variants
+from output_writer import OutputWriter
+
+CAS_DIR = os.path.join(ROOT, 'docs', 'asset', 'cas')
+DATA_DIR = os.path.join(ROOT, 'docs', 'assets', 'data')
+CAS_URL = '/asset/cas'
+
+
+def blob_name(sha1, filename):
+    return sha1 + os.path.splitext(filename)[1].lower()
+
+
+def list_blobs(cas_dir=CAS_DIR):
+    """Names of the blobs currently in the store."""
+    try:
+        return {fn for fn in os.listdir(cas_dir) if not fn.startswith('.')}
+    except OSError:
+        return set()
+
+
+def game_images(game_path, hashes):
+    """(path, sha1) of a folder's cover and its current variants."""
+    cover = find_cover_file(game_path)
+    if not cover:
+        return []
+    cover_path = os.path.join(game_path, cover)
+    cover_hash = hashes.sha1(cover_path)
+    images = [(cover_path, cover_hash)]
+    variants = load_variants(game_path, cover_hash)
+    for v in (variants or {}).get('variants', []):
+        path = os.path.join(game_path, VARIANT_DIR, v['file'])
+        if os.path.exists(path):
+            images.append((path, v.get('sha1') or hashes.sha1(path)))
+    return images
+
+
+def folder_image_bytes(game_path):
+    """Bytes of the images the firebase.json ignore rules keep out of the
+    deploy: image files directly in the folder and everything in variants/."""
+    total = 0
+    with os.scandir(game_path) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTS):
+                total += entry.stat().st_size
+    variant_dir = os.path.join(game_path, VARIANT_DIR)
+    if os.path.isdir(variant_dir):
+        with os.scandir(variant_dir) as it:
+            total += sum(e.stat().st_size for e in it if e.is_file())
+    return total
+
+
+def build_store(game_dir=GAME_DIR, cas_dir=CAS_DIR, gc=False):
+    os.makedirs(cas_dir, exist_ok=True)
+    existing = list_blobs(cas_dir)
+    writer = OutputWriter()
+    hashes = HashCache()
+    referenced = set()
+    files = folder_bytes = 0
+
+    for d in sorted(os.listdir(game_dir)):
+        game_path = os.path.join(game_dir, d)
+        if not os.path.isdir(game_path):
+            continue
+        folder_bytes += folder_image_bytes(game_path)
+        for path, sha1 in game_images(game_path, hashes):
+            name = blob_name(sha1, path)
+            files += 1
+            if name in referenced:
+                continue
+            referenced.add(name)
+            # a blob's name is its content, so an existing one never needs rewriting
+            if name not in existing:
+                with open(path, 'rb') as f:
+                    writer.write_bytes(os.path.join(cas_dir, name), f.read())
+
+    removed = 0
+    if gc:
+        for name in existing - referenced:
+            try:
+                os.remove(os.path.join(cas_dir, name))
+                removed += 1
+            except OSError:
+                pass
+
+    hashes.save()
+    # every blob in the store is deployed, referenced or not
+    deployed_bytes = sum(os.path.getsize(os.path.join(cas_dir, n)) for n in list_blobs(cas_dir))
+    print(f"Cover store: {files} images -> {len(referenced)} blobs")
+    print(f"Deployed image bytes: {folder_bytes:,} in game folders (not deployed) -> "
+          f"{deployed_bytes:,} in the store ({deployed_bytes - folder_bytes:+,})")
+    print(f"{writer.written} new blobs, {len(existing & referenced)} already stored"
+          + (f", {removed} unreferenced removed" if gc else ''))
+    return referenced
+
+
+def check_catalog(data_dir=DATA_DIR):
+    """{path: count} of the catalog files generate_game_data writes that still
+    link per-folder images, which firebase.json keeps out of the deploy."""
+    # games.json is the default single-file layout, the index and shards the sharded one
+    paths = [os.path.join(data_dir, 'games.json'), os.path.join(data_dir, 'games-index.json')]
+    paths += sorted(glob.glob(os.path.join(data_dir, 'shards', 'games-*.json')))
+    found = {}
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                n = f.read().count('"/asset/Game/')
+        except OSError:
+            continue
+        if n:
+            found[path] = n
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Copy covers and their variants into the content-addressed store')
+    parser.add_argument('--game-dir', dest='game_dir', default=GAME_DIR, help='Folder holding one directory per game')
+    parser.add_argument('--cas-dir', dest='cas_dir', default=CAS_DIR, help='Blob directory (default: docs/asset/cas)')
+    parser.add_argument('--gc', action='store_true', help='Delete blobs no game references any more')
+    parser.add_argument('--check', action='store_true',
+                        help='Only check that the generated catalog links no per-folder images (run before deploying)')
+    parser.add_argument('--data-dir', dest='data_dir', default=DATA_DIR,
+                        help='Catalog output folder --check reads (default: docs/assets/data)')
+    args = parser.parse_args()
+    if args.check:
+        found = check_catalog(args.data_dir)
+        for path, n in found.items():
+            print(f"{os.path.relpath(path, ROOT)}: {n} images outside the cover store")
+        if found:
+            sys.exit('Per-folder images are not deployed; run scripts/cover_store.py, then generate_game_data.py')
+        return
+    build_store(args.game_dir, args.cas_dir, args.gc)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,35 +1,88 @@
 import os
 import json
 import re
-import urllib.request
 import urllib.parse
-import time
 import argparse
-import html as _html
+import threading
+import time
+from contextlib import contextmanager
+
+from catalog_db import Catalog, scan_images
+from cover_records import CoverRecords
+from fetch_archive import FetchArchive
+from fetch_guard import DEFAULT_TTLS as FAILURE_TTLS, FailureGuard, is_transient
+from fetch_pool import HostLimiter
+from http_cache import DEFAULT_TTLS, HttpCache, parse_ttl
+from http_client import HTTPError, HttpClient, redirect_method, redirect_target
+from json_stream import load_json_array
+from listing_manifest import ListingManifest, hash_record
+from output_writer import OutputWriter
+from pipeline import Pipeline, Stage
+from profiler import PROFILE, cache_report
+from store_html import strip_tags
+from steam_provider import STEAM_APPDETAILS_CONCURRENCY, STEAM_APPDETAILS_RATE, STEAM_APPDETAILS_URL, SteamAppDetails
+from store_pages import PageMemo, parse_html
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 GAME_DIR = os.path.join(ROOT, 'docs', 'asset', 'Game')
+MANIFEST_PATH = os.path.join(ROOT, '.cache', 'listing_manifest.json')
+FAILURES_PATH = os.path.join(ROOT, '.cache', 'fetch_failures.json')
+COVER_RECORDS_PATH = os.path.join(ROOT, '.cache', 'cover_records.json')
+PROFILE_PATH = os.path.join(ROOT, '.cache', 'profile', 'create_game_listings.json')
 
 SOURCE_FILES = []
-for fn in os.listdir(GAME_DIR):
+for fn in sorted(os.listdir(GAME_DIR)):
     if fn.startswith('_') and fn.endswith('_game_list.json'):
         SOURCE_FILES.append(os.path.join(GAME_DIR, fn))
 
+# shared by every worker thread; main() applies the command line limits
+LIMITER = HostLimiter()
+# keep-alive connections reused across requests to the same host; redirects
+# come back to request_url so each hop goes through the limiter and guard
+CLIENT = HttpClient(follow_redirects=False)
+# meta.json, synopsis.txt and covers are only rewritten when they change
+WRITER = OutputWriter()
+# persistent response cache, set up by main() unless --no-cache is given
+CACHE = None
+# negative cache, per-host circuit breaker and Retry-After handling; main()
+# swaps in one that remembers failures between runs
+GUARD = FailureGuard()
+# Steam appdetails provider, set up by main() unless --no-steam-api is given
+STEAM = None
+# response recording being written (--record) or served instead of the network (--replay)
+ARCHIVE = None
+# catalog database kept in step with the rebuilt folders (--catalog)
+CATALOG = None
+# source URL and validators of every downloaded cover, so covers are only
+# downloaded again when they changed; None downloads them in full (--redownload-covers)
+COVERS = None
+# fetch failures of the group the current pipeline worker is handling
+_WORK = threading.local()
+
+
+# Fields of a source entry that aggregate_games reads. Entries are trimmed to
+# these while streaming, so heavy export blobs are dropped as soon as each
+# entry is parsed; a field read by aggregate_games must be listed here.
+_METADATA_FIELDS = {k: None for k in (
+    'title', 'url', 'store_url', 'permalink', 'page', 'link', 'website', 'appid', 'productSlug', 'slug',
+    'id', 'description', 'longDescription', 'shortDescription', 'desc', 'summary', 'short_description',
+    'about', 'developer', 'publisher', 'datePublished', 'genre', 'platforms', 'tags')}
+_METADATA_FIELDS['keyImages'] = _METADATA_FIELDS['key_images'] = {'type': None, 'url': None, 'image': None}
+SOURCE_FIELDS = {k: None for k in (
+    'name', 'app_title', 'store_link', 'storeUrl', 'store_url', 'link', 'url', 'game_url', 'website', 'page',
+    'storepage', 'store_page', 'permalink', 'epic_link', 'primary_link', 'base_urls', 'storefronts', 'appid',
+    'productSlug', 'slug', 'offerId', 'catalogOfferId', 'image', 'id', 'description', 'desc', 'summary',
+    'short_description', 'about', 'developer', 'dev', 'publisher', 'pub', 'releaseDate', 'release_date',
+    'released', 'genre', 'genres', 'platforms', 'platform', 'os', 'tags', 'categories')}
+SOURCE_FIELDS['metadata'] = _METADATA_FIELDS
+
 
 def load_json(path):
+    """Entries of a store export, read one at a time and trimmed to SOURCE_FIELDS."""
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception:
-        return []
-
-
-def strip_tags(s):
-    # remove HTML tags and unescape entities
-    s = re.sub(r'<[^>]+>', ' ', s or '')
-    s = _html.unescape(s)
-    s = re.sub(r'\s+', ' ', s).strip()
-    return s
+        yield from load_json_array(path, SOURCE_FIELDS)
+    except Exception as e:
+        print(f"Could not read {path}: {e}")
 
 
 def slug(name):
@@ -38,14 +91,124 @@ def slug(name):
     return s
 
 
-def fetch_url_bytes(url, timeout=15):
-    req = urllib.request.Request(url, headers={
+def send_request(url, headers, timeout, queued, method='GET'):
+    # runs inside the host's LIMITER slot; queued is when the caller asked for it
+    started = time.perf_counter()
+    try:
+        resp = CLIENT.request(url, headers, method=method, timeout=timeout)
+    except Exception as e:
+        PROFILE.request(url, time.perf_counter() - started, wait=started - queued,
+                        status=getattr(e, 'status', None), error=True)
+        if method == 'HEAD' and getattr(e, 'status', None) in (405, 501):
+            # the server does not do HEAD; the caller falls back to GET, and
+            # the guard must not remember the URL as failed
+            return e.status, e.headers, b''
+        if ARCHIVE is not None:
+            ARCHIVE.record_error(url, e)
+        raise
+    PROFILE.request(url, time.perf_counter() - started, len(resp.body), resp.status, wait=started - queued)
+    if ARCHIVE is not None:
+        ARCHIVE.record(url, resp.status, resp.reason, resp.headers, resp.body)
+    return resp.status, resp.headers, resp.body
+
+
+@contextmanager
+def track_failures(group):
+    """Collect in group['failures'] the URLs whose requests fail, or are
+    skipped by the guard, while this thread works on the group, so the
+    manifest can tell a complete build from one that only got partial data.
+    Pages and appdetails fetched for another group report their remembered
+    failure to each group that reads them (note_failure as on_error)."""
+    _WORK.failures = group.setdefault('failures', set())
+    try:
+        yield
+    finally:
+        _WORK.failures = None
+
+
+def note_failure(url, error):
+    failures = getattr(_WORK, 'failures', None)
+    # a 4xx is the server's answer for the URL, not a failure to get one
+    if failures is not None and is_transient(error):
+        failures.add(url)
+
+
+def request_url(url, extra_headers=None, method='GET', timeout=15):
+    """(status, headers, body) of one request, sent through the failure guard
+    and the host limiter or served from the recording being replayed.
+    Redirects are followed here, one hop at a time, so a hop to another host
+    waits for that host's slot and counts against its breaker."""
+    headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
                       'Chrome/120.0.0.0 Safari/537.36',
         'Accept-Language': 'en-US,en;q=0.9'
-    })
-    with urllib.request.urlopen(req, timeout=timeout) as resp:
-        return resp.read()
+    }
+    headers.update(extra_headers or {})
+    for _ in range(CLIENT.max_redirects + 1):
+        try:
+            if ARCHIVE is not None and ARCHIVE.mode == 'replay':
+                status, resp_headers, body = ARCHIVE.replay(url)
+            else:
+                queued = time.perf_counter()
+                status, resp_headers, body = GUARD.call(
+                    url, lambda: send_request(url, headers, timeout, queued, method), LIMITER.slot)
+        except Exception as e:
+            note_failure(url, e)
+            raise
+        target = redirect_target(url, status, resp_headers)
+        if not target:
+            return status, resp_headers, body
+        url = target
+        method = redirect_method(status, method)
+    raise HTTPError(url, status, 'too many redirects', resp_headers)
+
+
+def fetch_url_bytes(url, timeout=15):
+    def do_request(extra_headers):
+        return request_url(url, extra_headers, timeout=timeout)
+
+    with PROFILE.phase('fetch'):
+        if CACHE is None:
+            return do_request({})[2]
+        return CACHE.get(url, do_request)
+
+
+def parse_page(body, url):
+    with PROFILE.phase('parse_html'):
+        return parse_html(body, url)
+
+
+# every store page is downloaded and parsed at most once per run
+PAGES = PageMemo(fetch_url_bytes, parse_page, note_failure)
+
+
+def write_cover(path, data):
+    with PROFILE.phase('image_write'):
+        WRITER.write_bytes(path, data)
+
+
+def fetch_cover(path, url):
+    """Make the cover at path hold the image at url. With COVERS set, an image
+    the server reports unchanged is not downloaded again."""
+    if COVERS is None:
+        write_cover(path, fetch_url_bytes(url))
+        return
+    action, validators = COVERS.plan(path, url)
+    if action == 'fresh':
+        return
+    with PROFILE.phase('fetch'):
+        if action == 'head':
+            # identity, so Content-Length is the size of the file we would store
+            status, headers, _ = request_url(url, {'Accept-Encoding': 'identity'}, method='HEAD')
+            if status < 300 and COVERS.unchanged(path, url, headers):
+                return
+            validators = {}
+        status, headers, body = request_url(url, validators)
+    if status == 304:
+        COVERS.not_modified(path, url, headers)
+        return
+    write_cover(path, body)
+    COVERS.downloaded(path, url, headers, body)
 
 
 def load_existing_meta(path):
@@ -70,38 +233,40 @@ def merge_store_urls(existing_urls, new_urls):
 
 
 def detect_platforms_from_steam(appid):
-    """Try to detect available OS platforms from Steam store page for the appid.
+    """Try to detect available OS platforms for the Steam appid, from the
+    appdetails API when enabled and from the store page otherwise.
     Returns a list like ['Windows', 'macOS', 'Linux'] or empty list on failure.
     """
-    try:
-        url = f'https://store.steampowered.com/app/{appid}/'
-        raw = fetch_url_bytes(url, timeout=10)
-        html = raw.decode('utf-8', errors='ignore')
-        platforms = []
-        if re.search(r'Windows', html, re.I):
-            platforms.append('Windows')
-        if re.search(r'macOS|OS X|Mac OS X|Mac', html, re.I):
-            platforms.append('macOS')
-        if re.search(r'Linux', html, re.I):
-            platforms.append('Linux')
-        return list(dict.fromkeys(platforms))
-    except Exception:
-        return []
+    details = STEAM.get(appid) if STEAM is not None else None
+    if details and details.get('platforms'):
+        return details['platforms']
+    return detect_platforms_from_url(f'https://store.steampowered.com/app/{appid}/')
+
+
+def apply_steam_details(meta, details):
+    """Fill fields still empty in meta from a Steam appdetails record."""
+    if not details:
+        return
+    if not meta.get('description') and details.get('description'):
+        meta['description'] = details['description']
+    if not meta.get('developer') and details.get('developers'):
+        meta['developer'] = details['developers'][0]
+    if not meta.get('publisher') and details.get('publishers'):
+        meta['publisher'] = details['publishers'][0]
+    if not meta.get('releaseDate') and details.get('releaseDate'):
+        meta['releaseDate'] = details['releaseDate']
+    if details.get('genres') and (not meta.get('genre') or meta.get('genre') == ['']):
+        meta['genre'] = details['genres']
+    if details.get('platforms') and not meta.get('platforms'):
+        meta['platforms'] = details['platforms']
+    if details.get('tags') and (not meta.get('tags') or meta.get('tags') == ['']):
+        meta['tags'] = details['tags']
 
 
 def detect_platforms_from_url(url):
     """Fetch a store page and try to infer supported OS platforms from its HTML."""
     try:
-        raw = fetch_url_bytes(url, timeout=10)
-        html = raw.decode('utf-8', errors='ignore')
-        platforms = []
-        if re.search(r'Windows', html, re.I):
-            platforms.append('Windows')
-        if re.search(r'macOS|OS X|Mac OS X|Mac', html, re.I):
-            platforms.append('macOS')
-        if re.search(r'Linux', html, re.I):
-            platforms.append('Linux')
-        return list(dict.fromkeys(platforms))
+        return PAGES.get(url).platforms
     except Exception:
         return []
 
@@ -141,122 +306,6 @@ def build_store_url_from_appid(store_key, appid):
     return ''
 
 
-def find_og_image(html):
-    # search for og:image or twitter:image meta tag
-    m = re.search(r'''<meta[^>]+property=["']og:image["'][^>]+content=["']([^"']+)["']''', html, re.I)
-    if not m:
-        m = re.search(r'''<meta[^>]+name=["']twitter:image["'][^>]+content=["']([^"']+)["']''', html, re.I)
-    if not m:
-        m = re.search(r'''<meta[^>]+content=["']([^"']+)["'][^>]+property=["']og:image["']''', html, re.I)
-    return m.group(1) if m else None
-
-
-def find_description_from_html(html, url=None):
-    # Try JSON-LD description blocks first
-    for m in re.finditer(r"<script[^>]+type=[\"']application/ld\+json[\"'][^>]*>(.*?)</script>", html, re.I | re.S):
-        try:
-            data = json.loads(m.group(1))
-            if isinstance(data, dict) and data.get('description'):
-                return strip_tags(data.get('description'))
-        except Exception:
-            pass
-
-    # try common meta tags next
-    m = re.search(r'''<meta[^>]+property=["']og:description["'][^>]+content=["']([^"']+)["']''', html, re.I)
-    if not m:
-        m = re.search(r'''<meta[^>]+name=["']description["'][^>]+content=["']([^"']+)["']''', html, re.I)
-    if not m:
-        m = re.search(r'''<meta[^>]+name=["']twitter:description["'][^>]+content=["']([^"']+)["']''', html, re.I)
-    if m:
-        return strip_tags(m.group(1))
-
-    # steam-specific: try description blocks (id or class) and snippets
-    if url and 'store.steampowered.com' in (url or '').lower():
-        # id-based block
-        m = re.search(r"<div[^>]+id=[\"']game_area_description[\"'][^>]*>([\s\S]*?)</div>", html, re.I)
-        if not m:
-            # class-based variants
-            m = re.search(r"<div[^>]+class=[\"']game_area_description[\"'][^>]*>([\s\S]*?)</div>", html, re.I)
-        if not m:
-            m = re.search(r"<div[^>]+class=[\"']game_description_snippet[\"'][^>]*>([\s\S]*?)</div>", html, re.I)
-        if m:
-            return strip_tags(m.group(1))
-
-    # fallback: first sizeable paragraph-like chunk
-    m = re.search(r'<p[^>]*>(.{40,500})<\/p>', html, re.I | re.S)
-    if m:
-        return strip_tags(m.group(1))
-
-    return ''
-
-
-def find_metadata_from_html(html, url=None):
-    """Best-effort extraction of developer, publisher, releaseDate, genres, platforms, tags from page HTML.
-    Returns dict with keys: developer, publisher, releaseDate, genres(list), platforms(list), tags(list)
-    """
-    out = {'developer': '', 'publisher': '', 'releaseDate': '', 'genres': [], 'platforms': [], 'tags': []}
-
-    # try JSON-LD blocks first
-    for m in re.finditer(r"""<script[^>]+type=["']application/ld\+json["'][^>]*>(.*?)</script>""", html, re.I | re.S):
-        try:
-            data = json.loads(m.group(1))
-            if isinstance(data, dict):
-                if not out['developer'] and data.get('author'):
-                    if isinstance(data.get('author'), dict):
-                        out['developer'] = data['author'].get('name') or out['developer']
-                    elif isinstance(data.get('author'), str):
-                        out['developer'] = data.get('author')
-                if not out['publisher'] and data.get('publisher'):
-                    if isinstance(data.get('publisher'), dict):
-                        out['publisher'] = data['publisher'].get('name') or out['publisher']
-                    elif isinstance(data.get('publisher'), str):
-                        out['publisher'] = data.get('publisher')
-                if not out['releaseDate'] and data.get('datePublished'):
-                    out['releaseDate'] = data.get('datePublished')
-                if not out['genres'] and data.get('genre'):
-                    ge = data.get('genre')
-                    if isinstance(ge, list):
-                        out['genres'] = ge
-                    elif isinstance(ge, str):
-                        out['genres'] = [x.strip() for x in re.split(r'[,/|;]', ge) if x.strip()]
-        except Exception:
-            continue
-
-    # steam-specific: look for details_block content
-    if url and 'store.steampowered.com' in (url or '').lower():
-        m = re.search(r"<div[^>]+class=[\"']details_block[\"'][^>]*>(.*?)</div>", html, re.I | re.S)
-        block = m.group(1) if m else ''
-        if block:
-            # Developer
-            mdev = re.search(r'Developer:\s*</?[^>]*>\s*<a[^>]*>([^<]+)</a>', block, re.I)
-            if not mdev:
-                mdev = re.search(r'Developer:\s*([^<\n]+)<', block, re.I)
-            if mdev:
-                out['developer'] = strip_tags(mdev.group(1))
-            # Publisher
-            mpub = re.search(r'Publisher:\s*</?[^>]*>\s*<a[^>]*>([^<]+)</a>', block, re.I)
-            if not mpub:
-                mpub = re.search(r'Publisher:\s*([^<\n]+)<', block, re.I)
-            if mpub:
-                out['publisher'] = strip_tags(mpub.group(1))
-            # Release Date
-            mrel = re.search(r'Release Date:\s*([^<\n]+)<', block, re.I)
-            if mrel:
-                out['releaseDate'] = strip_tags(mrel.group(1))
-            # genres/tags
-            tags = re.findall(r"""<a[^>]+href=["'][^"']*(?:tag|genre|tags)[^"']*["'][^>]*>([^<]+)</a>""", block, re.I)
-            if tags:
-                out['genres'] = [t.strip() for t in tags]
-
-    # fallback: meta tags for publisher/author
-    if not out['publisher']:
-        m = re.search(r"""<meta[^>]+name=["']publisher["'][^>]+content=["']([^"']+)["']""", html, re.I)
-        if m:
-            out['publisher'] = strip_tags(m.group(1))
-
-    return out
-
-
 def download_cover_for_game(name, primary_store_link, store_urls=None, appids=None, info_image=None):
     # returns local filename or empty string
     dest_dir = os.path.join(GAME_DIR, slug(name))
@@ -269,21 +318,19 @@ def download_cover_for_game(name, primary_store_link, store_urls=None, appids=No
             img = info_image
             if primary_store_link:
                 img = urllib.parse.urljoin(primary_store_link, img)
-            data = fetch_url_bytes(img)
-            with open(cover_path, 'wb') as f:
-                f.write(data)
+            fetch_cover(cover_path, img)
             return 'cover.jpg'
         except Exception:
             pass
 
-    # Steam CDN is easiest
+    # Steam: the header image named by appdetails, else the usual CDN path
     if appids and appids.get('steam'):
         try:
             steam_appid = appids.get('steam')
-            url = f'https://cdn.cloudflare.steamstatic.com/steam/apps/{steam_appid}/header.jpg'
-            data = fetch_url_bytes(url)
-            with open(cover_path, 'wb') as f:
-                f.write(data)
+            details = STEAM.get(steam_appid) if STEAM is not None else None
+            url = (details or {}).get('header_image') or \
+                f'https://cdn.cloudflare.steamstatic.com/steam/apps/{steam_appid}/header.jpg'
+            fetch_cover(cover_path, url)
             return 'cover.jpg'
         except Exception:
             pass
@@ -292,14 +339,10 @@ def download_cover_for_game(name, primary_store_link, store_urls=None, appids=No
     tried = set()
     if primary_store_link:
         try:
-            raw = fetch_url_bytes(primary_store_link)
-            html = raw.decode('utf-8', errors='ignore')
-            img = find_og_image(html)
+            img = PAGES.get(primary_store_link).og_image
             if img:
                 img = urllib.parse.urljoin(primary_store_link, img)
-                data = fetch_url_bytes(img)
-                with open(cover_path, 'wb') as f:
-                    f.write(data)
+                fetch_cover(cover_path, img)
                 return 'cover.jpg'
         except Exception:
             pass
@@ -311,14 +354,10 @@ def download_cover_for_game(name, primary_store_link, store_urls=None, appids=No
             if not url or url in tried:
                 continue
             try:
-                raw = fetch_url_bytes(url)
-                html = raw.decode('utf-8', errors='ignore')
-                img = find_og_image(html)
+                img = PAGES.get(url).og_image
                 if img:
                     img = urllib.parse.urljoin(url, img)
-                    data = fetch_url_bytes(img)
-                    with open(cover_path, 'wb') as f:
-                        f.write(data)
+                    fetch_cover(cover_path, img)
                     return 'cover.jpg'
             except Exception:
                 continue
@@ -326,19 +365,7 @@ def download_cover_for_game(name, primary_store_link, store_urls=None, appids=No
     return ''
 
 
-def main():
-    parser = argparse.ArgumentParser(description='Generate game folders and meta files')
-    parser.add_argument('--no-download-covers', dest='download_covers', action='store_false', help='Do not download cover images')
-    parser.add_argument('--overwrite-meta', dest='overwrite_meta', action='store_true', help='Overwrite existing meta.json entirely')
-    parser.add_argument('--fetch-descriptions', dest='fetch_descriptions', action='store_true', help='Fetch descriptions from store pages when missing')
-    args = parser.parse_args()
-
-    # Load all discovered source lists into a dict keyed by the store name (filename)
-    store_lists = {}
-    for path in SOURCE_FILES:
-        key = os.path.basename(path).lstrip('_').split('_game_list.json')[0]
-        store_lists[key] = load_json(path)
-
+def aggregate_games(store_lists):
     # Aggregate games by name and collect per-store links and ids
     games = {}
     for store_key, entries in store_lists.items():
@@ -352,13 +379,15 @@ def main():
                     'store_links': {},  # map store_key -> url
                     'appids': {},       # map store_key -> id
                     'description': '',
-                    'developers': set(),
-                    'publishers': set(),
+                    'developers': {},
+                    'publishers': {},
                     'releaseDate': '',
-                    'genres': set(),
-                    'platforms': set(),
-                    'tags': set()
+                    'genres': {},
+                    'platforms': {},
+                    'tags': {}
                 }
+                # developers..tags are dicts used as insertion-ordered sets so
+                # the emitted lists do not depend on string hash randomization
 
             # find a URL in common fields (sources have inconsistent keys)
             possible_url_fields = ['store_link', 'storeUrl', 'store_url', 'link', 'url', 'game_url', 'website', 'page', 'storepage', 'store_page', 'permalink', 'epic_link', 'primary_link']
@@ -480,13 +509,13 @@ def main():
                 if isinstance(val, list):
                     for x in val:
                         if isinstance(x, str) and x.strip():
-                            target_set.add(x.strip())
+                            target_set[x.strip()] = None
                 elif isinstance(val, str):
                     # split common separators
                     for part in re.split(r"[,/|;]", val):
                         part = part.strip()
                         if part:
-                            target_set.add(part)
+                            target_set[part] = None
 
             # developer
             dev = e.get('developer') or e.get('dev') or (e.get('metadata') or {}).get('developer')
@@ -507,223 +536,523 @@ def main():
             t = e.get('tags') or e.get('categories') or (e.get('metadata') or {}).get('tags')
             collect_list_field(t, games[name]['tags'])
 
-    # create files and download covers
-    out_count = 0
-    for name, info in games.items():
-        dest_dir = os.path.join(GAME_DIR, slug(name))
-        os.makedirs(dest_dir, exist_ok=True)
-        # gather store urls collected earlier for this game
-        store_urls = {k: '' for k in ['steam', 'itchIo', 'epicGames', 'gog', 'xbox', 'playstation', 'nintendo', 'newgrounds', 'other']}
-        for sk, url in info.get('store_links', {}).items():
-            if not url:
-                continue
-            classified = classify_store_from_url(url)
-            if classified == 'steam':
-                store_urls['steam'] = store_urls.get('steam') or url
-            elif classified == 'epicGames':
-                store_urls['epicGames'] = store_urls.get('epicGames') or url
-            elif classified == 'itchIo':
-                store_urls['itchIo'] = store_urls.get('itchIo') or url
-            elif classified == 'gog':
-                store_urls['gog'] = store_urls.get('gog') or url
-            elif classified == 'xbox':
-                store_urls['xbox'] = store_urls.get('xbox') or url
-            elif classified == 'playstation':
-                store_urls['playstation'] = store_urls.get('playstation') or url
-            elif classified == 'nintendo':
-                store_urls['nintendo'] = store_urls.get('nintendo') or url
-            elif classified == 'newgrounds':
-                store_urls['newgrounds'] = store_urls.get('newgrounds') or url
-            else:
-                store_urls['other'] = store_urls.get('other') or url
-
-        # decide a primary store link for cover download / fallback
-        primary_candidate = store_urls.get('other') or store_urls.get('steam') or store_urls.get('epicGames') or ''
-        store_link = primary_candidate
-
-        # Build meta.json following the provided template structure
-        # If an existing meta.json exists, load and merge unless overwrite requested
-        meta_path = os.path.join(dest_dir, 'meta.json')
-        existing_meta = load_existing_meta(meta_path)
-
-        base_meta = {
-            'name': info['name'],
-            'image': info.get('image') or '',
-            'appId': {
-                'steam': int((info.get('appids') or {}).get('steam') or 0),
-                'itchIo': (info.get('appids') or {}).get('itch') or 0,
-                'epicGames': (info.get('appids') or {}).get('epic') or (info.get('appids') or {}).get('epicGames') or 0,
-                'gog': (info.get('appids') or {}).get('gog') or 0,
-                'xbox': (info.get('appids') or {}).get('xbox') or 0,
-                'playstation': (info.get('appids') or {}).get('playstation') or 0,
-                'nintendo': (info.get('appids') or {}).get('nintendo') or 0,
-                'newgrounds': (info.get('appids') or {}).get('newgrounds') or 0,
-                'other': (info.get('appids') or {}).get('other') or 0
-            },
-            'description': info.get('description') or '',
-            'developer': (list(info.get('developers') or [])[:1] or [''])[0] if info.get('developers') else '',
-            'publisher': (list(info.get('publishers') or [])[:1] or [''])[0] if info.get('publishers') else '',
-            'releaseDate': info.get('releaseDate') or '',
-            'genre': list(info.get('genres') or []) if info.get('genres') else [''],
-            'platforms': list(info.get('platforms') or []),
-            'tags': list(info.get('tags') or []) if info.get('tags') else [''],
-            'storeUrl': store_urls
-        }
-
-        if existing_meta and not args.overwrite_meta:
-            # merge: prefer existing non-empty fields, but update appId steam and storeUrl
-            merged = existing_meta.copy()
-            # ensure name and appId steam are updated
-            merged['name'] = base_meta['name']
-            merged.setdefault('appId', {})
-            # update all known appId keys if not present
-            for ak, av in base_meta['appId'].items():
-                if not merged['appId'].get(ak) and av:
-                    merged['appId'][ak] = av
-            # merge storeUrl
-            merged['storeUrl'] = merge_store_urls(merged.get('storeUrl', {}), base_meta['storeUrl'])
-            # ensure description is set from sources when existing meta lacks it
-            if not merged.get('description') and base_meta.get('description'):
-                merged['description'] = base_meta.get('description')
-            # ensure description/developer/publisher/genres/platforms/tags are set from sources when existing meta lacks them
-            if not merged.get('description') and base_meta.get('description'):
-                merged['description'] = base_meta.get('description')
-            if not merged.get('developer') and base_meta.get('developer'):
-                merged['developer'] = base_meta.get('developer')
-            if not merged.get('publisher') and base_meta.get('publisher'):
-                merged['publisher'] = base_meta.get('publisher')
-            if not merged.get('releaseDate') and base_meta.get('releaseDate'):
-                merged['releaseDate'] = base_meta.get('releaseDate')
-            if (not merged.get('genre') or merged.get('genre') == ['']) and base_meta.get('genre'):
-                merged['genre'] = base_meta.get('genre')
-            if (not merged.get('platforms')) and base_meta.get('platforms'):
-                merged['platforms'] = base_meta.get('platforms')
-            if (not merged.get('tags') or merged.get('tags') == ['']) and base_meta.get('tags'):
-                merged['tags'] = base_meta.get('tags')
-            # ensure platforms: if empty, try to detect from steam
-            if not merged.get('platforms'):
-                merged['platforms'] = []
-            # ensure image: if existing meta lacks an image, take base image
-            if (not merged.get('image') or merged.get('image') == '') and base_meta.get('image'):
-                merged['image'] = base_meta.get('image')
-            meta = merged
-        else:
-            meta = base_meta
+    return games
 
-        # platform detection: try Steam first, else try any store URL to infer OS
-        try:
-            if (not meta.get('platforms')) or (isinstance(meta.get('platforms'), list) and len(meta.get('platforms')) == 0):
-                detected = []
-                # prefer Steam appid detection
-                if meta.get('appId', {}).get('steam'):
-                    detected = detect_platforms_from_steam(meta['appId']['steam'])
-
-                # if nothing from steam, try other store pages
-                if not detected:
-                    # check primary store link first
-                    primary = store_link
-                    if primary:
-                        detected = detect_platforms_from_url(primary)
-
-                if not detected:
-                    # try any available store urls
-                    for _, u in (store_urls or {}).items():
-                        if not u:
-                            continue
-                        detected = detect_platforms_from_url(u)
-                        if detected:
-                            break
 
-                if detected:
-                    meta['platforms'] = detected
+def resolve_store_urls(info):
+    """The game's store URLs keyed by store, and the primary link used for
+    covers and page fallbacks."""
+    # gather store urls collected earlier for this game
+    store_urls = {k: '' for k in ['steam', 'itchIo', 'epicGames', 'gog', 'xbox', 'playstation', 'nintendo', 'newgrounds', 'other']}
+    for sk, url in info.get('store_links', {}).items():
+        if not url:
+            continue
+        classified = classify_store_from_url(url)
+        if classified == 'steam':
+            store_urls['steam'] = store_urls.get('steam') or url
+        elif classified == 'epicGames':
+            store_urls['epicGames'] = store_urls.get('epicGames') or url
+        elif classified == 'itchIo':
+            store_urls['itchIo'] = store_urls.get('itchIo') or url
+        elif classified == 'gog':
+            store_urls['gog'] = store_urls.get('gog') or url
+        elif classified == 'xbox':
+            store_urls['xbox'] = store_urls.get('xbox') or url
+        elif classified == 'playstation':
+            store_urls['playstation'] = store_urls.get('playstation') or url
+        elif classified == 'nintendo':
+            store_urls['nintendo'] = store_urls.get('nintendo') or url
+        elif classified == 'newgrounds':
+            store_urls['newgrounds'] = store_urls.get('newgrounds') or url
+        else:
+            store_urls['other'] = store_urls.get('other') or url
+
+    # decide a primary store link for cover download / fallback
+    primary_candidate = store_urls.get('other') or store_urls.get('steam') or store_urls.get('epicGames') or ''
+    return store_urls, primary_candidate
+
+
+def build_meta(info, store_urls, existing_meta, args):
+    # Build meta.json following the provided template structure
+    # If an existing meta.json exists, merge into it unless overwrite requested
+    base_meta = {
+        'name': info['name'],
+        'image': info.get('image') or '',
+        'appId': {
+            'steam': int((info.get('appids') or {}).get('steam') or 0),
+            'itchIo': (info.get('appids') or {}).get('itch') or 0,
+            'epicGames': (info.get('appids') or {}).get('epic') or (info.get('appids') or {}).get('epicGames') or 0,
+            'gog': (info.get('appids') or {}).get('gog') or 0,
+            'xbox': (info.get('appids') or {}).get('xbox') or 0,
+            'playstation': (info.get('appids') or {}).get('playstation') or 0,
+            'nintendo': (info.get('appids') or {}).get('nintendo') or 0,
+            'newgrounds': (info.get('appids') or {}).get('newgrounds') or 0,
+            'other': (info.get('appids') or {}).get('other') or 0
+        },
+        'description': info.get('description') or '',
+        'developer': (list(info.get('developers') or [])[:1] or [''])[0] if info.get('developers') else '',
+        'publisher': (list(info.get('publishers') or [])[:1] or [''])[0] if info.get('publishers') else '',
+        'releaseDate': info.get('releaseDate') or '',
+        'genre': list(info.get('genres') or []) if info.get('genres') else [''],
+        'platforms': list(info.get('platforms') or []),
+        'tags': list(info.get('tags') or []) if info.get('tags') else [''],
+        'storeUrl': store_urls
+    }
+
+    if existing_meta and not args.overwrite_meta:
+        # merge: prefer existing non-empty fields, but update appId steam and storeUrl
+        merged = existing_meta.copy()
+        # ensure name and appId steam are updated
+        merged['name'] = base_meta['name']
+        merged.setdefault('appId', {})
+        # update all known appId keys if not present
+        for ak, av in base_meta['appId'].items():
+            if not merged['appId'].get(ak) and av:
+                merged['appId'][ak] = av
+        # merge storeUrl
+        merged['storeUrl'] = merge_store_urls(merged.get('storeUrl', {}), base_meta['storeUrl'])
+        # ensure description is set from sources when existing meta lacks it
+        if not merged.get('description') and base_meta.get('description'):
+            merged['description'] = base_meta.get('description')
+        # ensure description/developer/publisher/genres/platforms/tags are set from sources when existing meta lacks them
+        if not merged.get('description') and base_meta.get('description'):
+            merged['description'] = base_meta.get('description')
+        if not merged.get('developer') and base_meta.get('developer'):
+            merged['developer'] = base_meta.get('developer')
+        if not merged.get('publisher') and base_meta.get('publisher'):
+            merged['publisher'] = base_meta.get('publisher')
+        if not merged.get('releaseDate') and base_meta.get('releaseDate'):
+            merged['releaseDate'] = base_meta.get('releaseDate')
+        if (not merged.get('genre') or merged.get('genre') == ['']) and base_meta.get('genre'):
+            merged['genre'] = base_meta.get('genre')
+        if (not merged.get('platforms')) and base_meta.get('platforms'):
+            merged['platforms'] = base_meta.get('platforms')
+        if (not merged.get('tags') or merged.get('tags') == ['']) and base_meta.get('tags'):
+            merged['tags'] = base_meta.get('tags')
+        # ensure platforms: if empty, try to detect from steam
+        if not merged.get('platforms'):
+            merged['platforms'] = []
+        # ensure image: if existing meta lacks an image, take base image
+        if (not merged.get('image') or merged.get('image') == '') and base_meta.get('image'):
+            merged['image'] = base_meta.get('image')
+        meta = merged
+    else:
+        meta = base_meta
+    return meta
+
+
+def store_pages_needed(meta, info, store_link, args):
+    """Store pages complete_meta and write_game are sure to read for this game,
+    so they can be downloaded ahead; fallback pages tried only when these
+    fail are left to be fetched on demand."""
+    pages = []
+    steam_appid = meta.get('appId', {}).get('steam')
+
+    def steam_details():
+        return STEAM.get(steam_appid) if STEAM is not None and steam_appid else None
+
+    if not meta.get('platforms'):
+        if steam_appid and not (steam_details() or {}).get('platforms'):
+            pages.append(f'https://store.steampowered.com/app/{steam_appid}/')
+        elif not steam_appid and store_link:
+            pages.append(store_link)
+    if args.download_covers and not info.get('image') and not (info.get('appids') or {}).get('steam') and store_link:
+        pages.append(store_link)
+    if args.fetch_descriptions and store_link:
+        current_desc = meta.get('description') or info.get('description') or ''
+        if not current_desc:
+            current_desc = (steam_details() or {}).get('description') or ''
+        if not current_desc:
+            pages.append(store_link)
+    return list(dict.fromkeys(pages))
+
+
+def complete_meta(meta, info, store_urls, store_link, args):
+    """Fill in platforms and, with --fetch-descriptions, missing descriptions
+    from Steam and the store pages."""
+    # platform detection: try Steam first, else try any store URL to infer OS
+    try:
+        if (not meta.get('platforms')) or (isinstance(meta.get('platforms'), list) and len(meta.get('platforms')) == 0):
+            detected = []
+            # prefer Steam appid detection
+            if meta.get('appId', {}).get('steam'):
+                detected = detect_platforms_from_steam(meta['appId']['steam'])
+
+            # if nothing from steam, try other store pages
+            if not detected:
+                # check primary store link first
+                primary = store_link
+                if primary:
+                    detected = detect_platforms_from_url(primary)
+
+            if not detected:
+                # try any available store urls
+                for _, u in (store_urls or {}).items():
+                    if not u:
+                        continue
+                    detected = detect_platforms_from_url(u)
+                    if detected:
+                        break
+
+            if detected:
+                meta['platforms'] = detected
+            else:
+                # fallback default if we have any store link
+                if any((v for v in (store_urls or {}).values())):
+                    meta['platforms'] = ['Windows']
                 else:
-                    # fallback default if we have any store link
-                    if any((v for v in (store_urls or {}).values())):
-                        meta['platforms'] = ['Windows']
-                    else:
-                        meta['platforms'] = []
-        except Exception:
-            meta['platforms'] = meta.get('platforms') or []
-
-        # attempt to download cover (saved as cover.jpg in the game's folder) if enabled
-        cover = ''
-        if args.download_covers:
-            cover = download_cover_for_game(info['name'], store_link, store_urls, info.get('appids'), info.get('image'))
-
-        # fetch descriptions from store pages if requested and description is empty
-        if args.fetch_descriptions:
-            # prefer any description already aggregated from sources
-            current_desc = meta.get('description') or info.get('description') or ''
-            if not current_desc:
-                # try primary link first
-                tried = set()
-                if store_link:
+                    meta['platforms'] = []
+    except Exception:
+        meta['platforms'] = meta.get('platforms') or []
+
+    # fetch descriptions from store pages if requested and description is empty
+    if args.fetch_descriptions:
+        # prefer any description already aggregated from sources
+        current_desc = meta.get('description') or info.get('description') or ''
+        # Steam's structured appdetails first; it is far cheaper than scraping a page
+        if not current_desc and STEAM is not None and meta.get('appId', {}).get('steam'):
+            apply_steam_details(meta, STEAM.get(meta['appId']['steam']))
+            current_desc = meta.get('description') or ''
+        if not current_desc:
+            # try primary link first
+            tried = set()
+            if store_link:
+                try:
+                    page = PAGES.get(store_link)
+                    desc = page.description
+                    if desc:
+                        meta['description'] = desc
+                    # also try to extract metadata (developer/publisher/release/genres/platforms/tags)
+                    meta_info = page.metadata
+                    if meta_info:
+                        if not meta.get('developer') and meta_info.get('developer'):
+                            meta['developer'] = meta_info.get('developer')
+                        if not meta.get('publisher') and meta_info.get('publisher'):
+                            meta['publisher'] = meta_info.get('publisher')
+                        if not meta.get('releaseDate') and meta_info.get('releaseDate'):
+                            meta['releaseDate'] = meta_info.get('releaseDate')
+                        if meta_info.get('genres') and (not meta.get('genre') or meta.get('genre') == ['']):
+                            meta['genre'] = meta_info.get('genres')
+                        if meta_info.get('platforms') and (not meta.get('platforms')):
+                            meta['platforms'] = meta_info.get('platforms')
+                        if meta_info.get('tags') and (not meta.get('tags') or meta.get('tags') == ['']):
+                            meta['tags'] = meta_info.get('tags')
+                    tried.add(store_link)
+                except Exception:
+                    pass
+
+            if not meta.get('description') and store_urls:
+                for k, u in (store_urls or {}).items():
+                    if not u or u in tried:
+                        continue
                     try:
-                        raw = fetch_url_bytes(store_link)
-                        html = raw.decode('utf-8', errors='ignore')
-                        desc = find_description_from_html(html, store_link)
+                        page = PAGES.get(u)
+                        desc = page.description
                         if desc:
                             meta['description'] = desc
-                        # also try to extract metadata (developer/publisher/release/genres/platforms/tags)
-                        meta_info = find_metadata_from_html(html, store_link)
-                        if meta_info:
-                            if not meta.get('developer') and meta_info.get('developer'):
-                                meta['developer'] = meta_info.get('developer')
-                            if not meta.get('publisher') and meta_info.get('publisher'):
-                                meta['publisher'] = meta_info.get('publisher')
-                            if not meta.get('releaseDate') and meta_info.get('releaseDate'):
-                                meta['releaseDate'] = meta_info.get('releaseDate')
-                            if meta_info.get('genres') and (not meta.get('genre') or meta.get('genre') == ['']):
-                                meta['genre'] = meta_info.get('genres')
-                            if meta_info.get('platforms') and (not meta.get('platforms')):
-                                meta['platforms'] = meta_info.get('platforms')
-                            if meta_info.get('tags') and (not meta.get('tags') or meta.get('tags') == ['']):
-                                meta['tags'] = meta_info.get('tags')
-                        tried.add(store_link)
+                            meta_info = page.metadata
+                            if meta_info:
+                                if not meta.get('developer') and meta_info.get('developer'):
+                                    meta['developer'] = meta_info.get('developer')
+                                if not meta.get('publisher') and meta_info.get('publisher'):
+                                    meta['publisher'] = meta_info.get('publisher')
+                                if not meta.get('releaseDate') and meta_info.get('releaseDate'):
+                                    meta['releaseDate'] = meta_info.get('releaseDate')
+                                if meta_info.get('genres') and (not meta.get('genre') or meta.get('genre') == ['']):
+                                    meta['genre'] = meta_info.get('genres')
+                                if meta_info.get('platforms') and (not meta.get('platforms')):
+                                    meta['platforms'] = meta_info.get('platforms')
+                                if meta_info.get('tags') and (not meta.get('tags') or meta.get('tags') == ['']):
+                                    meta['tags'] = meta_info.get('tags')
+                            break
                     except Exception:
-                        pass
-
-                if not meta.get('description') and store_urls:
-                    for k, u in (store_urls or {}).items():
-                        if not u or u in tried:
-                            continue
-                        try:
-                            raw = fetch_url_bytes(u)
-                            html = raw.decode('utf-8', errors='ignore')
-                            desc = find_description_from_html(html, u)
-                            if desc:
-                                meta['description'] = desc
-                                meta_info = find_metadata_from_html(html, u)
-                                if meta_info:
-                                    if not meta.get('developer') and meta_info.get('developer'):
-                                        meta['developer'] = meta_info.get('developer')
-                                    if not meta.get('publisher') and meta_info.get('publisher'):
-                                        meta['publisher'] = meta_info.get('publisher')
-                                    if not meta.get('releaseDate') and meta_info.get('releaseDate'):
-                                        meta['releaseDate'] = meta_info.get('releaseDate')
-                                    if meta_info.get('genres') and (not meta.get('genre') or meta.get('genre') == ['']):
-                                        meta['genre'] = meta_info.get('genres')
-                                    if meta_info.get('platforms') and (not meta.get('platforms')):
-                                        meta['platforms'] = meta_info.get('platforms')
-                                    if meta_info.get('tags') and (not meta.get('tags') or meta.get('tags') == ['']):
-                                        meta['tags'] = meta_info.get('tags')
-                                break
-                        except Exception:
-                            continue
-
-        with open(os.path.join(dest_dir, 'meta.json'), 'w', encoding='utf-8') as f:
-            json.dump(meta, f, indent=2, ensure_ascii=False)
-
-        syn_path = os.path.join(dest_dir, 'synopsis.txt')
-        if not os.path.exists(syn_path):
-            with open(syn_path, 'w', encoding='utf-8') as f:
-                f.write(f"{info['name']}: Add your synopsis here.\n")
-
-        out_count += 1
-        # be polite to servers
-        time.sleep(0.15)
-
-    print(f"Created {out_count} game folders under {GAME_DIR}")
+                        continue
+
+
+def forget_group(group):
+    """Drop the store pages and appdetails a finished group may have read
+    from PAGES and STEAM, so they are not held for the rest of the run."""
+    urls = set(group.get('pages') or ())
+    appids = set()
+    for game in group['games']:
+        urls.update(u for u in game['store_urls'].values() if u)
+        if game['store_link']:
+            urls.add(game['store_link'])
+        for appid in ((game['meta'] or {}).get('appId', {}).get('steam'), game['info']['appids'].get('steam')):
+            if appid:
+                appids.add(appid)
+                urls.add(f'https://store.steampowered.com/app/{appid}/')
+    PAGES.forget(urls)
+    if STEAM is not None:
+        STEAM.forget(appids)
+
+
+def write_game(name, info, meta, store_urls, store_link, args):
+    dest_dir = os.path.join(GAME_DIR, slug(name))
+    os.makedirs(dest_dir, exist_ok=True)
+
+    # attempt to download cover (saved as cover.jpg in the game's folder) if enabled
+    if args.download_covers:
+        download_cover_for_game(info['name'], store_link, store_urls, info.get('appids'), info.get('image'))
+
+    with PROFILE.phase('json_dump'):
+        WRITER.write_json(os.path.join(dest_dir, 'meta.json'), meta, indent=2, ensure_ascii=False)
+
+    syn_path = os.path.join(dest_dir, 'synopsis.txt')
+    synopsis = None
+    if not os.path.exists(syn_path):
+        synopsis = f"{info['name']}: Add your synopsis here.\n"
+        WRITER.write_text(syn_path, synopsis)
+
+    if CATALOG is not None:
+        CATALOG.put_game(slug(name), meta, synopsis, scan_images(dest_dir))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate game folders and meta files')
+    parser.add_argument('--no-download-covers', dest='download_covers', action='store_false', help='Do not download cover images')
+    parser.add_argument('--overwrite-meta', dest='overwrite_meta', action='store_true', help='Overwrite existing meta.json entirely')
+    parser.add_argument('--fetch-descriptions', dest='fetch_descriptions', action='store_true', help='Fetch descriptions from store pages when missing')
+    parser.add_argument('--jobs', type=int, default=8, help='Worker threads for each of the fetch, merge and write stages (default: 8)')
+    parser.add_argument('--queue-size', dest='queue_size', type=int, default=32,
+                        help='Games that may wait between two pipeline stages (default: 32)')
+    parser.add_argument('--per-host', dest='per_host', type=int, default=2, help='Maximum concurrent requests per host (default: 2)')
+    parser.add_argument('--host-rate', dest='host_rate', type=float, default=4.0, help='Maximum requests per second per host, 0 for no cap (default: 4)')
+    parser.add_argument('--cache-dir', dest='cache_dir', default=os.path.join(ROOT, '.cache', 'http'), help='Directory for the persistent HTTP response cache')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false', help='Do not read or write the HTTP response cache')
+    parser.add_argument('--cache-max-mb', dest='cache_max_mb', type=int, default=512, help='Evict least recently used responses above this size (default: 512)')
+    parser.add_argument('--cache-ttl', dest='cache_ttls', action='append', default=[], metavar='TYPE=SECONDS',
+                        help='Serve cached responses of this content-type prefix without revalidating for SECONDS (suffix s/m/h/d allowed); repeatable')
+    parser.add_argument('--failure-ttl', dest='failure_ttls', action='append', default=[], metavar='KIND=SECONDS',
+                        help='Do not retry URLs that failed this way for SECONDS (suffix s/m/h/d allowed); KIND is '
+                             f"one of {', '.join(FAILURE_TTLS)}; repeatable")
+    parser.add_argument('--retry-failed', dest='retry_failed', action='store_true',
+                        help='Forget remembered URL failures and request those URLs again')
+    parser.add_argument('--breaker-threshold', dest='breaker_threshold', type=int, default=5,
+                        help='Skip a host for a while after this many consecutive errors from it (default: 5)')
+    parser.add_argument('--max-retry-wait', dest='max_retry_wait', type=float, default=60,
+                        help='Longest Retry-After in seconds to wait out; longer ones skip the host (default: 60)')
+    parser.add_argument('--redownload-covers', dest='cover_refresh', action='store_false',
+                        help='Download every cover in full instead of asking the server whether it changed')
+    parser.add_argument('--full', action='store_true', help='Rebuild every game even if its source entries and meta.json are unchanged')
+    parser.add_argument('--steam-api', dest='steam_api', default=STEAM_APPDETAILS_URL, metavar='URL',
+                        help='Steam appdetails endpoint, e.g. a local stand-in server for testing')
+    parser.add_argument('--steam-api-rate', dest='steam_api_rate', type=float, default=STEAM_APPDETAILS_RATE,
+                        help='Maximum appdetails requests per second, limited apart from --host-rate; 0 for no cap '
+                             f'(default: {STEAM_APPDETAILS_RATE}, Steam allows about 200 per 5 minutes)')
+    parser.add_argument('--no-steam-api', dest='use_steam_api', action='store_false',
+                        help='Scrape Steam store pages instead of using the appdetails API')
+    parser.add_argument('--catalog', metavar='DB',
+                        help='Also store every rebuilt game in this catalog database (see catalog_db.py)')
+    archive = parser.add_mutually_exclusive_group()
+    archive.add_argument('--record', metavar='DIR',
+                         help='Save every response (status, headers, body) to a recording in DIR; implies --no-cache')
+    archive.add_argument('--replay', metavar='DIR',
+                         help='Serve every request from the recording in DIR without touching the network; implies --no-cache '
+                              '(add --full to rebuild games the manifest considers current)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Record per-phase timings, per-host request latencies, cache hit ratio and memory peaks (tracing memory slows the run)')
+    parser.add_argument('--profile-out', dest='profile_out', default=PROFILE_PATH,
+                        help='Where --profile writes its JSON report (default: .cache/profile/create_game_listings.json)')
+    args = parser.parse_args()
+    if args.profile:
+        PROFILE.start()
+
+    global CACHE, STEAM, ARCHIVE, CATALOG, GUARD, COVERS
+    overrides = {}
+    if args.use_steam_api:
+        overrides[args.steam_api] = (STEAM_APPDETAILS_CONCURRENCY, args.steam_api_rate)
+    LIMITER.configure(args.per_host, args.host_rate, overrides)
+    if args.record or args.replay:
+        # every response has to reach the recording, and a replay must not
+        # depend on what the cache happens to hold
+        args.use_cache = False
+        try:
+            ARCHIVE = FetchArchive(args.record or args.replay, 'record' if args.record else 'replay')
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f'cannot open recording {args.record or args.replay}: {e}')
+    if args.use_cache:
+        ttls = None
+        if args.cache_ttls:
+            ttls = dict(DEFAULT_TTLS)
+            ttls.update(parse_ttl(spec) for spec in args.cache_ttls)
+        CACHE = HttpCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024, ttls=ttls)
+    failure_ttls = dict(FAILURE_TTLS)
+    for spec in args.failure_ttls:
+        try:
+            kind, ttl = parse_ttl(spec)
+        except ValueError as e:
+            parser.error(str(e))
+        if kind not in FAILURE_TTLS:
+            parser.error(f"unknown failure kind '{kind}' in --failure-ttl")
+        failure_ttls[kind] = ttl
+    # a recording has to see every failure happen, so it starts from a clean slate
+    GUARD = FailureGuard(None if args.record else FAILURES_PATH, failure_ttls,
+                         args.breaker_threshold, max_wait=args.max_retry_wait)
+    if args.retry_failed:
+        GUARD.forget()
+    if args.use_steam_api:
+        STEAM = SteamAppDetails(fetch_url_bytes, args.steam_api, on_error=note_failure)
+    if args.catalog:
+        CATALOG = Catalog(args.catalog)
+    if args.cover_refresh and ARCHIVE is None:
+        # covers are checked with conditional and HEAD requests instead of
+        # going through the response cache; they are only left unchecked for
+        # as long as the cache would serve an image without revalidating.
+        # Recordings keep plain GETs so a replay sees the same requests.
+        COVERS = CoverRecords(COVER_RECORDS_PATH, GAME_DIR, CACHE.ttl_for('image/jpeg') if CACHE is not None else 0)
+
+    # Load all discovered source lists into a dict keyed by the store name
+    # (filename); each is a generator that aggregate_games consumes entry by entry
+    store_lists = {}
+    for path in SOURCE_FILES:
+        key = os.path.basename(path).lstrip('_').split('_game_list.json')[0]
+        store_lists[key] = load_json(path)
+
+    manifest = ListingManifest(MANIFEST_PATH)
+    # output options are part of the hash so changing them triggers a rebuild
+    options = {'download_covers': args.download_covers, 'overwrite_meta': args.overwrite_meta,
+               'fetch_descriptions': args.fetch_descriptions, 'steam_api': args.use_steam_api}
+    # filled in by plan() once every source list has been read
+    planned = {}
+
+    def plan():
+        # a game can have entries in every source list, so the (trimmed)
+        # entries are aggregated before the first group can be handed out
+        games = aggregate_games(store_lists)
+        # Games whose names slug to the same folder travel the pipeline as one
+        # group and are handled in source order, so the folder ends up exactly
+        # as a sequential run leaves it.
+        groups = {}
+        for name in games:
+            groups.setdefault(slug(name), []).append(name)
+        planned.update(games=len(games), groups=set(groups))
+        for key in list(groups):
+            # each game's aggregate leaves `games` with its group, so what is
+            # held shrinks as the pipeline works through the catalog
+            items = [(name, games.pop(name)) for name in groups.pop(key)]
+            source_hash = hash_record({'options': options, 'games': [info for _, info in items]})
+            meta_path = os.path.join(GAME_DIR, key, 'meta.json')
+            if args.full or not manifest.is_current(key, source_hash, meta_path):
+                yield {'key': key, 'items': items, 'source_hash': source_hash, 'meta_path': meta_path}
+
+    def resolve(group):
+        group['games'] = []
+        for name, info in group['items']:
+            store_urls, store_link = resolve_store_urls(info)
+            group['games'].append({'name': name, 'info': info, 'store_urls': store_urls,
+                                   'store_link': store_link, 'meta': None})
+        # later games of the group merge into what the one before them leaves
+        # in meta.json, so only the first can be merged before anything is written
+        first = group['games'][0]
+        first['meta'] = build_meta(first['info'], first['store_urls'], load_existing_meta(group['meta_path']), args)
+        return group
+
+    def fetch(group):
+        if STEAM is not None and (args.download_covers or args.fetch_descriptions):
+            for game in group['games']:
+                if game['info']['appids'].get('steam'):
+                    STEAM.get(game['info']['appids']['steam'])
+        first = group['games'][0]
+        group['pages'] = store_pages_needed(first['meta'], first['info'], first['store_link'], args)
+        for url in group['pages']:
+            PAGES.get(url).prefetch()
+        return group
+
+    def parse(group):
+        for url in group['pages']:
+            try:
+                PAGES.get(url).info
+            except Exception:
+                pass
+        return group
+
+    def merge(group):
+        previous = None
+        for game in group['games']:
+            if game['meta'] is None:
+                # a deep copy, as if read back from the meta.json just written
+                game['meta'] = build_meta(game['info'], game['store_urls'], json.loads(json.dumps(previous)), args)
+            complete_meta(game['meta'], game['info'], game['store_urls'], game['store_link'], args)
+            previous = game['meta']
+        return group
+
+    incomplete = []
+
+    def write(group):
+        for game in group['games']:
+            write_game(game['name'], game['info'], game['meta'], game['store_urls'], game['store_link'], args)
+        # a game built while requests failed is written with what was found,
+        # but not recorded as current, so a later run completes it
+        complete = not group['failures']
+        manifest.record(group['key'], group['source_hash'], group['meta_path'], complete)
+        if not complete:
+            incomplete.append(group['key'])
+        forget_group(group)
+        return len(group['items'])
+
+    def tracked(func):
+        def run(group):
+            with track_failures(group):
+                return func(group)
+        return run
+
+    # network-bound stages get --jobs workers; resolve and parse are CPU work
+    # that threads cannot speed up
+    pipeline = Pipeline([
+        Stage('resolve', resolve),
+        Stage('fetch', tracked(fetch), args.jobs),
+        Stage('parse', tracked(parse)),
+        Stage('merge', tracked(merge), args.jobs),
+        Stage('write', tracked(write), args.jobs),
+    ], args.queue_size)
+    try:
+        with PROFILE.stage('pipeline'):
+            out_count = sum(pipeline.run(plan(), 'aggregate'))
+    finally:
+        with PROFILE.stage('save'):
+            # pruning needs every group; skip it if reading the sources failed
+            if 'groups' in planned:
+                manifest.prune(planned['groups'])
+            manifest.save()
+            if CACHE is not None:
+                CACHE.save()
+            if ARCHIVE is not None:
+                ARCHIVE.save()
+            GUARD.save()
+            if COVERS is not None:
+                COVERS.save()
+            if CATALOG is not None:
+                CATALOG.close()
+
+    print(f"Created {out_count} game folders under {GAME_DIR} ({planned['games'] - out_count} unchanged games skipped)")
+    if incomplete:
+        print(f"{len(incomplete)} game folders are incomplete after failed requests and will be built again next run "
+              f"(--retry-failed requests the failed URLs again)")
+    print(f"Fetched {PAGES.fetched_count()} distinct store pages")
+    if STEAM is not None:
+        print(f"Fetched Steam appdetails for {STEAM.fetched_count()} apps")
+    print(WRITER.summary())
+    if CACHE is not None:
+        print(CACHE.summary())
+    if ARCHIVE is not None:
+        print(ARCHIVE.summary())
+    print(GUARD.summary())
+    if COVERS is not None:
+        print(COVERS.summary())
+    if args.profile:
+        PROFILE.extra['games'] = {'total': planned['games'], 'rebuilt': out_count, 'incomplete': len(incomplete),
+                                  'store_pages': PAGES.fetched_count()}
+        PROFILE.extra['outputs'] = {'written': WRITER.written, 'unchanged': WRITER.skipped}
+        if CACHE is not None:
+            PROFILE.extra['cache'] = cache_report(CACHE.stats)
+        PROFILE.extra['failures'] = GUARD.report()
+        if COVERS is not None:
+            PROFILE.extra['covers'] = dict(COVERS.stats)
+        PROFILE.extra['pipeline'] = pipeline.stats()
+        print(pipeline.summary())
+        print(PROFILE.summary(PROFILE.write(args.profile_out)))
+        print(f"Profile report written to {args.profile_out}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,146 @@
+"""Record and replay the HTTP responses of a run (--record / --replay).
+
+A recording is a directory holding index.json, which maps each requested
+URL to its status, reason and headers, and a bodies/ folder of
+gzip-compressed bodies named by the SHA-1 of their content, so a body served
+under several URLs is stored once. Failed requests are recorded too: an HTTP
+error keeps its status and body, a network error its class name and message,
+and replay raises the same kind of exception the live run saw, so the failure
+guard and the manifest treat it alike. Error classes replay does not know
+are raised as OSError.
+
+Replaying serves every request from the recording without touching the
+network; a URL that was not recorded raises ArchiveMiss.
+"""
+import gzip
+import hashlib
+import http.client
+import json
+import os
+import socket
+import ssl
+import threading
+
+from http_client import HTTPError
+
+INDEX_NAME = 'index.json'
+BODY_DIR = 'bodies'
+# describe the connection or the encoded body, not the decoded body we keep
+SKIP_HEADERS = {'connection', 'keep-alive', 'transfer-encoding', 'content-encoding', 'content-length', 'date'}
+
+
+# exceptions a live request can end with, by the class name recorded for them
+REPLAYED_ERRORS = {cls.__name__: cls for cls in (
+    OSError, TimeoutError, socket.timeout, socket.gaierror, socket.herror,
+    ConnectionError, ConnectionRefusedError, ConnectionResetError, ConnectionAbortedError, BrokenPipeError,
+    ssl.SSLError, ssl.SSLCertVerificationError, ssl.SSLEOFError,
+    http.client.HTTPException, http.client.RemoteDisconnected, http.client.BadStatusLine,
+    http.client.ImproperConnectionState,
+    ValueError, EOFError,
+)}
+
+
+class ArchiveMiss(OSError):
+    """The URL is not in the recording being replayed."""
+
+
+def make_headers(pairs):
+    msg = http.client.HTTPMessage()
+    for k, v in pairs:
+        msg[k] = v
+    return msg
+
+
+class FetchArchive:
+    """A recording directory opened for 'record' or 'replay'.
+
+    Recording starts a fresh index; body files already present are reused
+    when their content matches and the rest are removed by save().
+    """
+
+    def __init__(self, directory, mode):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f'unknown archive mode: {mode}')
+        self.directory = directory
+        self.mode = mode
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        self.body_dir = os.path.join(directory, BODY_DIR)
+        self.stats = {'recorded': 0, 'replayed': 0, 'missing': 0}
+        self._lock = threading.Lock()
+        self._entries = {}
+        if mode == 'replay':
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)['responses']
+        else:
+            os.makedirs(self.body_dir, exist_ok=True)
+
+    def _body_path(self, digest):
+        return os.path.join(self.body_dir, digest + '.gz')
+
+    def _store_body(self, body):
+        digest = hashlib.sha1(body).hexdigest()
+        path = self._body_path(digest)
+        if not os.path.exists(path):
+            tmp = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp, 'wb') as f:
+                # mtime=0 keeps the file identical across recordings
+                f.write(gzip.compress(body, mtime=0))
+            os.replace(tmp, path)
+        return digest
+
+    def _put(self, url, entry):
+        with self._lock:
+            self._entries[url] = entry
+            self.stats['recorded'] += 1
+
+    def record(self, url, status, reason, headers, body):
+        self._put(url, {
+            'status': status,
+            'reason': reason,
+            'headers': [[k, v] for k, v in headers.items() if k.lower() not in SKIP_HEADERS],
+            'body': self._store_body(body),
+        })
+
+    def record_error(self, url, error):
+        if isinstance(error, HTTPError):
+            self.record(url, error.status, error.reason, error.headers or {}, error.body or b'')
+        else:
+            self._put(url, {'error': f'{type(error).__name__}: {error}', 'error_type': type(error).__name__})
+
+    def replay(self, url):
+        """(status, headers, body) as recorded; recorded failures are raised."""
+        with self._lock:
+            entry = self._entries.get(url)
+            self.stats['replayed' if entry else 'missing'] += 1
+        if entry is None:
+            raise ArchiveMiss(f'not in recording: {url}')
+        if 'error' in entry:
+            error_type = REPLAYED_ERRORS.get(entry.get('error_type'), OSError)
+            raise error_type(f"recorded failure for {url}: {entry['error']}")
+        with open(self._body_path(entry['body']), 'rb') as f:
+            body = gzip.decompress(f.read())
+        headers = make_headers(entry['headers'])
+        if entry['status'] >= 400:
+            raise HTTPError(url, entry['status'], entry['reason'], headers, body)
+        return entry['status'], headers, body
+
+    def save(self):
+        """Write the index of a recording and drop bodies nothing refers to."""
+        if self.mode != 'record':
+            return
+        with self._lock:
+            entries = dict(sorted(self._entries.items()))
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'responses': entries}, f, separators=(',', ':'))
+        os.replace(tmp, self.index_path)
+        used = {e['body'] + '.gz' for e in entries.values() if 'body' in e}
+        for fn in os.listdir(self.body_dir):
+            if fn not in used:
+                os.remove(os.path.join(self.body_dir, fn))
+
+    def summary(self):
+        s = self.stats
+        if self.mode == 'record':
+            return f"Recorded {len(self._entries)} responses to {self.directory}"
+        return f"Replayed {s['replayed']} responses from {self.directory} ({s['missing']} not recorded)"
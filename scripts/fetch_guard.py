@@ -0,0 +1,238 @@
+"""Failure-aware wrapper around outgoing requests.
+
+FailureGuard.call(url, send) runs one request and remembers how it failed:
+
+  negative cache   a URL that answered 404/410, another 4xx, a 5xx or timed
+                   out is not requested again until a TTL for that kind of
+                   failure runs out; entries are kept in a JSON file so they
+                   survive between runs
+  circuit breaker  after `threshold` consecutive network errors or 5xx
+                   answers from one host, further requests to it fail at once
+                   for `cooldown` seconds; then a single probe is let through
+                   and either closes the circuit or opens it again
+  Retry-After      a 429 (or 503) with Retry-After holds every request to the
+                   host until that time; waits up to max_wait are slept out
+                   and the request retried, longer ones skip the host
+
+Requests refused by the guard raise SkippedFetch, whose kind says why: the
+failure kind remembered for the URL, 'circuit_open' or 'rate_limited'.
+is_transient() tells failures that may clear up (network errors, 5xx and
+skips because of them) from a 4xx, which is the server's answer for the URL;
+callers use it to tell a result built from partial data from a complete one.
+report() lists the hosts and URLs that were skipped and why.
+"""
+import email.utils
+import json
+import os
+import socket
+import threading
+import time
+import urllib.parse
+from contextlib import nullcontext
+
+from http_client import HTTPError
+
+# seconds a failed URL is not retried, by kind of failure
+DEFAULT_TTLS = {
+    'gone': 7 * 86400,     # 404, 410
+    'refused': 86400,      # other 4xx
+    'server': 3600,        # 5xx
+    'network': 6 * 3600,   # timeouts, refused connections, DNS errors
+}
+# how long a 429 without a Retry-After header holds the host
+DEFAULT_RETRY_AFTER = 30
+
+
+class SkippedFetch(OSError):
+    """The guard refused to send the request."""
+
+    def __init__(self, url, reason, kind):
+        super().__init__(f'skipped {url}: {reason}')
+        self.url = url
+        self.reason = reason
+        self.kind = kind
+
+
+def host_of(url):
+    return urllib.parse.urlsplit(url).netloc.lower()
+
+
+def retry_after_seconds(value, now=None):
+    """Seconds to wait for a Retry-After header value (delta or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+def classify(error):
+    """Failure kind for an exception raised by a request, or None for errors
+    that say nothing about the URL or host (bad content, programming errors)."""
+    if isinstance(error, HTTPError):
+        if error.status in (404, 410):
+            return 'gone'
+        if error.status >= 500:
+            return 'server'
+        return 'refused'
+    if isinstance(error, (socket.timeout, TimeoutError, ConnectionError, OSError)):
+        return 'network'
+    return None
+
+
+def is_transient(error):
+    """Whether a failed request may succeed when tried again: a network error,
+    a 5xx or 429, or a request the guard skipped because of one of those.
+    False for a 4xx, remembered or not, and for errors not about fetching."""
+    if isinstance(error, SkippedFetch):
+        return error.kind not in ('gone', 'refused')
+    if isinstance(error, HTTPError) and error.status == 429:
+        return True
+    return classify(error) in ('server', 'network')
+
+
+class FailureGuard:
+    def __init__(self, path=None, ttls=None, threshold=5, cooldown=60.0, max_wait=60.0, retries=2):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_wait = max_wait
+        self.retries = retries
+        self._lock = threading.Lock()
+        self._failed = {}       # url -> {'kind', 'detail', 'until'}
+        self._streak = {}       # host -> consecutive failures
+        self._open_until = {}   # host -> monotonic time the breaker allows a probe
+        self._hold_until = {}   # host -> wall time Retry-After allows requests again
+        self._skipped = {}      # host -> {'requests': n, 'reason': str}
+        self._remembered = 0    # requests answered from the negative cache
+        self._dirty = False
+        if path:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    now = time.time()
+                    self._failed = {u: e for u, e in json.load(f).items() if e.get('until', 0) > now}
+            except (OSError, ValueError):
+                pass
+
+    def forget(self):
+        """Drop every remembered URL failure (--retry-failed)."""
+        with self._lock:
+            self._dirty = self._dirty or bool(self._failed)
+            self._failed = {}
+
+    def _skip(self, url, host, reason, kind):
+        # caller holds the lock
+        entry = self._skipped.setdefault(host, {'requests': 0, 'reason': reason})
+        entry['requests'] += 1
+        entry['reason'] = reason
+        return SkippedFetch(url, reason, kind)
+
+    def _admit(self, url, claim_probe):
+        """Raise SkippedFetch or return the seconds to wait before sending."""
+        host = host_of(url)
+        with self._lock:
+            failed = self._failed.get(url)
+            if failed and failed['until'] > time.time():
+                self._remembered += 1
+                raise SkippedFetch(url, f"failed recently ({failed['detail']})", failed['kind'])
+            hold = self._hold_until.get(host, 0) - time.time()
+            if hold > self.max_wait:
+                raise self._skip(url, host, f'rate limited, Retry-After {hold:.0f} s', 'rate_limited')
+            opened = self._open_until.get(host)
+            if opened is not None:
+                now = time.monotonic()
+                if now < opened:
+                    raise self._skip(url, host, f'circuit open after {self._streak.get(host, 0)} consecutive failures',
+                                     'circuit_open')
+                if claim_probe:
+                    # half-open: this request is the probe, the rest are
+                    # skipped until its outcome closes or reopens the circuit
+                    self._open_until[host] = now + self.cooldown
+            return max(0.0, hold)
+
+    def _succeeded(self, url):
+        host = host_of(url)
+        with self._lock:
+            self._streak.pop(host, None)
+            self._open_until.pop(host, None)
+            if self._failed.pop(url, None) is not None:
+                self._dirty = True
+
+    def _failed_with(self, url, error):
+        """Record a failure; returns True when the request should be retried."""
+        host = host_of(url)
+        kind = classify(error)
+        if kind is None:
+            return False
+        with self._lock:
+            if isinstance(error, HTTPError) and error.status in (429, 503):
+                wait = retry_after_seconds((error.headers or {}).get('Retry-After'))
+                if wait is None and error.status == 429:
+                    wait = DEFAULT_RETRY_AFTER
+                if wait is not None:
+                    self._hold_until[host] = max(self._hold_until.get(host, 0), time.time() + wait)
+                    return True
+            if kind in ('server', 'network'):
+                streak = self._streak[host] = self._streak.get(host, 0) + 1
+                if streak >= self.threshold:
+                    self._open_until[host] = time.monotonic() + self.cooldown
+            detail = f'HTTP {error.status}' if isinstance(error, HTTPError) else type(error).__name__
+            self._failed[url] = {'kind': kind, 'detail': detail, 'until': time.time() + self.ttls.get(kind, 0)}
+            self._dirty = True
+        return False
+
+    def call(self, url, send, slot=None):
+        """send() unless the guard skips url; Retry-After responses are waited
+        out and retried up to `retries` times. slot(url), e.g. HostLimiter.slot,
+        is held around each attempt."""
+        for attempt in range(self.retries + 1):
+            # checked before queuing for the slot and again once it is ours,
+            # since requests ahead in the queue may have tripped the breaker
+            self._admit(url, False)
+            with slot(url) if slot is not None else nullcontext():
+                wait = self._admit(url, True)
+                if wait > 0:
+                    time.sleep(wait)
+                try:
+                    result = send()
+                except Exception as e:
+                    if self._failed_with(url, e) and attempt < self.retries:
+                        continue
+                    raise
+            self._succeeded(url)
+            return result
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._failed, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+    def report(self):
+        with self._lock:
+            return {
+                'skipped_hosts': {h: dict(e) for h, e in sorted(self._skipped.items())},
+                'remembered_failures': self._remembered,
+                'failed_urls': len(self._failed),
+            }
+
+    def summary(self):
+        report = self.report()
+        lines = [f"Skipped {report['remembered_failures']} requests to URLs that failed recently "
+                 f"({report['failed_urls']} URLs remembered)"]
+        for host, e in report['skipped_hosts'].items():
+            lines.append(f"Skipped {e['requests']} requests to {host}: {e['reason']}")
+        return '\n'.join(lines)
@@ -0,0 +1,68 @@
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+
+
+class HostLimiter:
+    """Caps concurrent requests and request rate per host.
+
+    per_host is the number of requests allowed in flight against one host,
+    rate is the maximum number of request starts per second for one host
+    (0 disables the rate cap). overrides maps a URL prefix to its own
+    (per_host, rate) for endpoints with a tighter allowance than the rest of
+    their host, e.g. an API under a store's domain; URLs under such a prefix
+    are limited separately from the host they live on.
+    """
+
+    def __init__(self, per_host=2, rate=4.0, overrides=None):
+        self._lock = threading.Lock()
+        self._sems = {}
+        self._next_start = {}
+        self.configure(per_host, rate, overrides)
+
+    def configure(self, per_host=2, rate=4.0, overrides=None):
+        with self._lock:
+            self.per_host = max(1, int(per_host))
+            self.interval = self._interval(rate)
+            self.overrides = {prefix: (max(1, int(n)), self._interval(r))
+                              for prefix, (n, r) in (overrides or {}).items()}
+            self._sems = {}
+            self._next_start = {}
+
+    @staticmethod
+    def _interval(rate):
+        return (1.0 / rate) if rate and rate > 0 else 0.0
+
+    def _limits(self, url):
+        """(key, per_host, interval) the url is limited under."""
+        for prefix, (per_host, interval) in self.overrides.items():
+            if url.startswith(prefix):
+                return prefix, per_host, interval
+        return urllib.parse.urlsplit(url).netloc.lower(), self.per_host, self.interval
+
+    def _host_state(self, key, per_host):
+        with self._lock:
+            sem = self._sems.get(key)
+            if sem is None:
+                sem = self._sems[key] = threading.BoundedSemaphore(per_host)
+            return sem
+
+    def _reserve_start(self, key, interval):
+        # returns how long the caller has to wait before it may start
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(key, now))
+            self._next_start[key] = start + interval
+            return start - now
+
+    @contextmanager
+    def slot(self, url):
+        key, per_host, interval = self._limits(url)
+        sem = self._host_state(key, per_host)
+        with sem:
+            if interval:
+                wait = self._reserve_start(key, interval)
+                if wait > 0:
+                    time.sleep(wait)
+            yield
@@ -0,0 +1,190 @@
+import math
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+
+# same cut-off generate_game_data.find_best_match uses
+MATCH_THRESHOLD = 0.7
+
+
+def sanitize(name):
+    return re.sub(r'[^\w]', '', name).lower()
+
+
+def _trigrams(s):
+    s = f'  {s.lower()} '
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def _bitset(indices, size):
+    buf = bytearray((size + 7) // 8)
+    for i in indices:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, 'little')
+
+
+def _bit_indices(bits):
+    # positions of the set bits, lowest first
+    s = bin(bits)[:1:-1]
+    i = s.find('1')
+    while i >= 0:
+        yield i
+        i = s.find('1', i + 1)
+
+
+class MatcherIndex:
+    """Game name -> directory matcher built once per run.
+
+    Returns exactly what generate_game_data.find_best_match returns for the
+    same directory list, in the same order of precedence:
+
+    1. exact match on the sanitized name (dict lookup),
+    2. best SequenceMatcher ratio >= MATCH_THRESHOLD, earliest directory on ties,
+    3. first directory whose sanitized name is a prefix of the game's.
+
+    For (2) a character-trigram index shortlists a few likely directories,
+    which are scored first to get a good score to beat. The remaining
+    directories are filtered all at once with SequenceMatcher.quick_ratio's
+    upper bound: the number of the name's characters a folder can match is
+    computed for every folder in parallel from per-character bitsets, and
+    only folders whose bound still reaches the best score are scored. The
+    answer is the same as scoring every folder.
+    """
+
+    def __init__(self, dir_list, shortlist=8):
+        self.dirs = list(dir_list)
+        self.shortlist = shortlist
+        self._exact = {}
+        self._trigrams = defaultdict(list)
+        by_len = defaultdict(list)
+        # (char, k) -> folders containing char at least k times
+        has = defaultdict(list)
+        for i, d in enumerate(self.dirs):
+            self._exact.setdefault(sanitize(d), i)
+            by_len[len(d)].append(i)
+            for g in _trigrams(d):
+                self._trigrams[g].append(i)
+            for c, n in Counter(d).items():
+                for k in range(1, n + 1):
+                    has[(c, k)].append(i)
+        size = len(self.dirs)
+        self._all = (1 << size) - 1
+        self._by_len = {lb: _bitset(ix, size) for lb, ix in by_len.items()}
+        self._has = {key: _bitset(ix, size) for key, ix in has.items()}
+        # trigrams shared by a large part of the tree do not discriminate
+        self._common = max(64, size // 10)
+        # SequenceMatcher caches its analysis of the second sequence, so one
+        # matcher per directory is reused across every game of the run
+        self._matchers = {}
+
+    def _matcher(self, i):
+        sm = self._matchers.get(i)
+        if sm is None:
+            sm = self._matchers[i] = SequenceMatcher(None, '', self.dirs[i])
+        return sm
+
+    def _candidates(self, game_name):
+        counts = defaultdict(int)
+        for g in _trigrams(game_name):
+            postings = self._trigrams.get(g)
+            if postings and len(postings) <= self._common:
+                for i in postings:
+                    counts[i] += 1
+        ranked = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+        return [i for i, _ in ranked[:self.shortlist]]
+
+    def _unmatchable_counts(self, game_name):
+        """Bit-sliced per-folder count of the name's characters the folder
+        cannot match (the quick_ratio deficit), plus a count shared by all
+        folders for characters no folder has."""
+        full = self._all
+        planes = []
+        shared = 0
+        for c, n in Counter(game_name).items():
+            for k in range(1, n + 1):
+                has = self._has.get((c, k))
+                if has is None:
+                    shared += 1
+                    continue
+                # add one to the counter of every folder lacking the k-th c
+                carry = full ^ has
+                for p in range(len(planes)):
+                    planes[p], carry = planes[p] ^ carry, planes[p] & carry
+                    if not carry:
+                        break
+                if carry:
+                    planes.append(carry)
+        return planes, shared
+
+    def _at_most(self, planes, k):
+        """Folders whose bit-sliced counter is <= k."""
+        if k >= (1 << len(planes)):
+            return self._all
+        greater = 0
+        equal = self._all
+        for p in reversed(range(len(planes))):
+            if (k >> p) & 1:
+                equal &= planes[p]
+            else:
+                greater |= equal & planes[p]
+                equal &= ~planes[p]
+        return self._all & ~greater
+
+    def _best_fuzzy(self, game_name):
+        la = len(game_name)
+        best_ratio, best_i = 0.0, None
+        scored = set()
+
+        def consider(i):
+            nonlocal best_ratio, best_i
+            scored.add(i)
+            floor = max(MATCH_THRESHOLD, best_ratio)
+            sm = self._matcher(i)
+            sm.set_seq1(game_name)
+            # a bound equal to the best score only matters for an earlier directory
+            q = sm.quick_ratio()
+            if q < floor or (best_i is not None and q == best_ratio and i > best_i):
+                return
+            r = sm.ratio()
+            if r > best_ratio or (r == best_ratio and r > 0 and i < best_i):
+                best_ratio, best_i = r, i
+
+        for i in self._candidates(game_name):
+            consider(i)
+
+        # quick_ratio(name, folder) = 2 * (la - deficit) / (la + lb), so a folder
+        # of length lb can only reach `floor` if deficit <= la - floor * (la + lb) / 2
+        floor = max(MATCH_THRESHOLD, best_ratio)
+        planes, shared = self._unmatchable_counts(game_name)
+        survivors = 0
+        limits = {}
+        for lb, folders in self._by_len.items():
+            # small epsilon keeps float rounding from dropping a folder exactly at the bound
+            k = math.floor(la - floor * (la + lb) / 2 + 1e-9) - shared
+            if k < 0:
+                continue
+            if k not in limits:
+                limits[k] = self._at_most(planes, k)
+            survivors |= folders & limits[k]
+
+        for i in _bit_indices(survivors):
+            if i not in scored:
+                consider(i)
+
+        if best_i is not None and best_ratio >= MATCH_THRESHOLD:
+            return best_i
+        return None
+
+    def find(self, game_name):
+        sanitized = sanitize(game_name)
+        i = self._exact.get(sanitized)
+        if i is not None:
+            return self.dirs[i]
+
+        i = self._best_fuzzy(game_name)
+        if i is not None:
+            return self.dirs[i]
+
+        # earliest directory whose sanitized name is a prefix of the game's
+        found = [self._exact[sanitized[:k]] for k in range(len(sanitized) + 1) if sanitized[:k] in self._exact]
+        return self.dirs[min(found)] if found else None
@@ -1,9 +1,20 @@
+import argparse
 import json
 import os
-import sys
 import re
+from concurrent.futures import ProcessPoolExecutor
 from difflib import SequenceMatcher
 
+from catalog_db import Catalog
+from catalog_shards import dump_index, render_shards, write_shards
+from compact_catalog import FORMAT as COMPACT_FORMAT, STORE_NAMES, compact_game, size_line
+from cover_store import CAS_URL, blob_name, list_blobs
+from game_matcher import MatcherIndex
+from optimize_covers import VARIANT_DIR, HashCache, load_variants, pick_cover
+from output_writer import OutputWriter
+from profiler import PROFILE
+from search_index import build_search_index
+
 PRIORITY = [
     "other",
     "steam",
@@ -16,6 +27,9 @@ PRIORITY = [
     "gog",
 ]
 
+# below this many meta.json files a process pool costs more than it saves
+PARALLEL_META_MIN = 1000
+
 def choose_primary(store_urls: dict):
     for key in PRIORITY:
         for k in store_urls:
@@ -57,7 +71,45 @@ def find_best_match(game_name, dir_list):
 
     return None
 
-def generate_game_data(game_list_path):
+def scan_game_dirs(game_dir):
+    """Folder name -> file names (in listing order) for every folder under
+    game_dir, read in one scandir pass so nothing is stat'ed per game later."""
+    folders = {}
+    with os.scandir(game_dir) as it:
+        for entry in it:
+            if entry.is_dir():
+                with os.scandir(entry.path) as files:
+                    folders[entry.name] = [f.name for f in files]
+    return folders
+
+def read_meta(path):
+    """(meta, None), or (None, error message) when the file cannot be parsed."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f), None
+    except Exception as e:
+        return None, str(e)
+
+def read_metas(paths, jobs):
+    """read_meta for every path, in order; large batches use a process pool."""
+    if jobs > 1 and len(paths) >= PARALLEL_META_MIN:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            return list(pool.map(read_meta, paths, chunksize=max(1, len(paths) // (jobs * 8))))
+    return [read_meta(path) for path in paths]
+
+def cover_info(game_path, files, hashes):
+    """(file, sha1, variants index) of the folder's cover, or (None, None, None).
+    hashes is a HashCache, so unchanged covers are not read and hashed again."""
+    image_file = pick_cover(files)
+    if not image_file:
+        return None, None, None
+    image_hash = hashes.sha1(os.path.join(game_path, image_file))
+    # resized variants from optimize_covers.py, unless the cover changed since
+    variants = load_variants(game_path, image_hash) if VARIANT_DIR in files else None
+    return image_file, image_hash, variants
+
+def generate_game_data(game_list_path, layout="single", shard_size=50, shard_by="page", catalog_path=None, jobs=1,
+                       production=False):
     if not os.path.exists(game_list_path):
         print(f"Error: Game list file not found: {game_list_path}")
         return
@@ -65,48 +117,148 @@ def generate_game_data(game_list_path):
     with open(game_list_path, "r", encoding="utf-8") as f:
         game_names_from_file = [line.strip() for line in f if line.strip()]
 
-    games = []
     game_dir = "docs/asset/Game"
     if not os.path.isdir(game_dir):
         print(f"Game dir not found: {game_dir}")
         return
 
-    available_dirs = [d for d in os.listdir(game_dir) if os.path.isdir(os.path.join(game_dir, d))]
+    # with a catalog database, folders, meta and covers come from its indexed
+    # tables instead of listing the game directory and parsing every file
+    catalog = Catalog(catalog_path) if catalog_path else None
+    try:
+        with PROFILE.stage("scan"):
+            folders = None
+            if catalog is not None:
+                available_dirs = catalog.folders()
+            else:
+                folders = scan_game_dirs(game_dir)
+                available_dirs = list(folders)
+            # same answers as find_best_match, without rescanning every folder per game
+            matcher = MatcherIndex(available_dirs)
+            # blobs published by cover_store.py; images found there are linked by hash
+            blobs = list_blobs(os.path.join("docs", "asset", "cas"))
+
+        with PROFILE.stage("build"):
+            games, search_entries = build_entries(game_names_from_file, game_dir, matcher, blobs, catalog, folders, jobs)
+    finally:
+        if catalog is not None:
+            catalog.close()
+
+    out_dir = os.path.join("docs", "assets", "data")
+    os.makedirs(out_dir, exist_ok=True)
+    writer = OutputWriter()
+    # (label, development bytes, production bytes) per output, for --production
+    sizes = []
+    with PROFILE.stage("json_dump"):
+        entries = [compact_game(g) for g in games] if production else games
+        if layout == "sharded":
+            extra = {"format": COMPACT_FORMAT, "stores": STORE_NAMES} if production else None
+            index = write_shards(entries, out_dir, writer, shard_size, shard_by, extra=extra, minify=production)
+            if production:
+                dev_shards, dev_index = render_shards(games, shard_size, shard_by)
+                shards, _ = render_shards(entries, shard_size, shard_by, extra)
+                sizes.append(("games-index.json", [dump_index(dev_index)], [dump_index(index, True)]))
+                sizes.append((f"shards/ ({len(shards)} files)", [d for _, d in dev_shards], [d for _, d in shards]))
+            print(f"Successfully generated games-index.json with {len(games)} games in {len(index['shards'])} shards.")
+        else:
+            out_path = os.path.join(out_dir, "games.json")
+            if production:
+                data = json.dumps(entries, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+                writer.write_bytes(out_path, data)
+                sizes.append(("games.json", [json.dumps(games, indent=2, ensure_ascii=False).encode("utf-8")], [data]))
+            else:
+                writer.write_json(out_path, games, indent=2, ensure_ascii=False)
+            print(f"Successfully generated games.json with {len(games)} games.")
+    with PROFILE.stage("search_index"):
+        search = build_search_index(search_entries)
+        data = json.dumps(search, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        writer.write_bytes(os.path.join(out_dir, "search-index.json"), data)
+        # already minified in both forms
+        sizes.append(("search-index.json", [data], [data]))
+    print(f"Search index: {sum(len(p) for p in search['fields'].values())} keys over {search['count']} games.")
+    if production:
+        print("Production output, development -> production size:")
+        for label, before, after in sizes:
+            print(size_line(label, before, after))
+    print(writer.summary())
+    PROFILE.extra["games"] = {"listed": len(game_names_from_file), "emitted": len(games), "folders": len(available_dirs)}
+    PROFILE.extra["outputs"] = {"written": writer.written, "unchanged": writer.skipped}
+
 
+def build_entries(game_names_from_file, game_dir, matcher, blobs, catalog=None, folders=None, jobs=1):
+    """Catalog entries for the listed games that have a folder and a readable
+    meta.json (or a row in catalog), plus (name, meta) pairs for the search index.
+    folders is the scan_game_dirs listing; without a catalog every listed
+    meta.json is read up front, in parallel for large catalogs."""
+    games = []
+    # (name, meta) per emitted game, for the search index
+    search_entries = []
+    matches = []
     for game_name in game_names_from_file:
-        matched_dir = find_best_match(game_name, available_dirs)
+        with PROFILE.phase("match"):
+            matches.append(matcher.find(game_name))
+
+    metas = {}
+    hashes = HashCache() if catalog is None else None
+    # per-folder images are not deployed (firebase.json) once a cover store exists
+    missing_blobs = 0
+    if catalog is None:
+        with_meta = list(dict.fromkeys(d for d in matches if d and "meta.json" in folders[d]))
+        with PROFILE.phase("read_meta"):
+            paths = [os.path.join(game_dir, d, "meta.json") for d in with_meta]
+            metas = dict(zip(with_meta, read_metas(paths, jobs)))
 
+    for game_name, matched_dir in zip(game_names_from_file, matches):
         if not matched_dir:
             print(f"Warning: No matching game directory found for '{game_name}'. Skipping.")
             continue
 
         game_path = os.path.join(game_dir, matched_dir)
-        meta_path = os.path.join(game_path, "meta.json")
 
-        if not os.path.exists(meta_path):
-            print(f"Warning: meta.json not found for '{game_name}'. Skipping.")
-            continue
+        if catalog is not None:
+            with PROFILE.phase("read_meta"):
+                meta = catalog.meta(matched_dir)
+        else:
+            if matched_dir not in metas:
+                print(f"Warning: meta.json not found for '{game_name}'. Skipping.")
+                continue
 
-        try:
-            with open(meta_path, "r", encoding="utf-8") as f:
-                meta = json.load(f)
-        except Exception as e:
-            print(f"Error reading meta.json for '{game_name}': {e}. Skipping.")
-            continue
+            meta, error = metas[matched_dir]
+            if error is not None:
+                print(f"Error reading meta.json for '{game_name}': {error}. Skipping.")
+                continue
 
         description = meta.get("description") or ""
 
-        image_file = None
-        preferred = os.path.join(game_path, "cover.jpg")
-        if os.path.exists(preferred):
-            image_file = "cover.jpg"
-        else:
-            for file in os.listdir(game_path):
-                if file.lower().endswith((".png", ".jpg", ".jpeg", ".gif")):
-                    image_file = file
-                    break
+        with PROFILE.phase("covers"):
+            if catalog is not None:
+                image_file, image_hash, variants = catalog.cover(matched_dir)
+            else:
+                image_file, image_hash, variants = cover_info(game_path, folders[matched_dir], hashes)
+            image_path = ""
+            if image_file:
+                image_path = f"/asset/Game/{matched_dir}/{image_file}"
+                if blob_name(image_hash, image_file) in blobs:
+                    image_path = f"{CAS_URL}/{blob_name(image_hash, image_file)}"
+                else:
+                    missing_blobs += 1
 
-        image_path = f"/asset/Game/{matched_dir}/{image_file}" if image_file else ""
+        image_variants = []
+        if variants:
+            for v in variants.get("variants", []):
+                src = f"/asset/Game/{matched_dir}/{VARIANT_DIR}/{v['file']}"
+                if v.get("sha1") and blob_name(v["sha1"], v["file"]) in blobs:
+                    src = f"{CAS_URL}/{blob_name(v['sha1'], v['file'])}"
+                else:
+                    missing_blobs += 1
+                image_variants.append(
+                    {
+                        "src": src,
+                        "type": v["type"],
+                        "width": v["width"],
+                        "height": v["height"],
+                    }
+                )
 
         store_urls = meta.get("storeUrl") or {}
         primary_store, primary_link = choose_primary(store_urls)
@@ -117,28 +269,59 @@ def generate_game_data(game_list_path):
                 continue
             storefronts.append({"store": k, "url": v})
 
+        search_entries.append((meta.get("name") or game_name, meta))
         games.append(
             {
                 "name": meta.get("name") or game_name,
                 "description": description,
                 "image": image_path,
+                "image_width": variants["width"] if variants else None,
+                "image_height": variants["height"] if variants else None,
+                "image_variants": image_variants,
                 "primary_store": primary_store or "",
                 "primary_link": primary_link or "",
                 "storefronts": storefronts,
             }
         )
 
-    out_dir = os.path.join("docs", "assets", "data")
-    os.makedirs(out_dir, exist_ok=True)
-    out_path = os.path.join(out_dir, "games.json")
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(games, f, indent=2, ensure_ascii=False)
+    if hashes is not None:
+        hashes.save()
+    if missing_blobs:
+        print(f"Warning: {missing_blobs} cover images are not in the cover store and will not be deployed; "
+              f"run scripts/cover_store.py first.")
+    return games, search_entries
+
 
-    print(f"Successfully generated games.json with {len(games)} games.")
+def main():
+    parser = argparse.ArgumentParser(description="Build the site's game catalog from a list of game names")
+    parser.add_argument("game_list", help="Text file with one game name per line")
+    parser.add_argument("--layout", choices=("single", "sharded"), default="single",
+                        help="single writes games.json; sharded writes games-index.json plus content-hashed shards (default: single)")
+    parser.add_argument("--shard-size", dest="shard_size", type=int, default=50, help="Games per shard (default: 50)")
+    parser.add_argument("--shard-by", dest="shard_by", choices=("page", "letter"), default="page",
+                        help="Split in catalog order or by first letter of the name (default: page)")
+    parser.add_argument("--production", action="store_true",
+                        help="Write the compact production form (minified, empty fields left out, short store codes; "
+                             "see compact_catalog.py) and report the bytes saved per output file")
+    parser.add_argument("--catalog", metavar="DB",
+                        help="Read games from this catalog database (see catalog_db.py) instead of the game folders")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help=f"Processes parsing meta.json once a catalog has {PARALLEL_META_MIN} or more (default: CPU count)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-phase timings and memory peaks (tracing memory slows the run)")
+    parser.add_argument("--profile-out", dest="profile_out", default=os.path.join(".cache", "profile", "generate_game_data.json"),
+                        help="Where --profile writes its JSON report (default: .cache/profile/generate_game_data.json)")
+    args = parser.parse_args()
+    if args.shard_size < 1:
+        parser.error("--shard-size must be at least 1")
+    if args.profile:
+        PROFILE.start()
+    generate_game_data(args.game_list, args.layout, args.shard_size, args.shard_by, args.catalog, args.jobs,
+                       args.production)
+    if args.profile:
+        print(PROFILE.summary(PROFILE.write(args.profile_out)))
+        print(f"Profile report written to {args.profile_out}")
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python generate_game_data.py <path_to_game_list_file>")
-    else:
-        generate_game_data(sys.argv[1])
+    main()
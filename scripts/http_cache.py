@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+# seconds a stored response is served without asking the server again, by
+# content-type prefix; anything not listed is always revalidated
+DEFAULT_TTLS = {
+    'image/': 30 * 86400,
+    'text/html': 86400,
+    'application/json': 86400,
+}
+
+
+def parse_ttl(spec):
+    """Parse a 'content/type=SECONDS' option value; SECONDS may end in s/m/h/d."""
+    ctype, _, value = spec.partition('=')
+    if not ctype or not value:
+        raise ValueError(f"expected TYPE=SECONDS, got '{spec}'")
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    mult = units.get(value[-1].lower())
+    if mult:
+        value = value[:-1]
+    return ctype.strip().lower(), int(float(value) * (mult or 1))
+
+
+class HttpCache:
+    """Persistent URL-keyed response cache with validator revalidation.
+
+    Bodies are stored one file per URL under `directory`, the validators and
+    bookkeeping live in index.json next to them. Entries are evicted least
+    recently used first once the stored bodies exceed max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, ttls=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.index_path = os.path.join(directory, 'index.json')
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        self._dirty = False
+        os.makedirs(directory, exist_ok=True)
+        self._entries = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except Exception:
+            return {}
+        # drop entries whose body went missing
+        return {u: e for u, e in entries.items() if os.path.exists(self._body_path(u))}
+
+    def _body_path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.bin')
+
+    def ttl_for(self, content_type):
+        """Seconds a response of this content type is served without revalidating."""
+        ctype = (content_type or '').split(';')[0].strip().lower()
+        best = None
+        for prefix, ttl in self.ttls.items():
+            if ctype.startswith(prefix) and (best is None or len(prefix) > len(best[0])):
+                best = (prefix, ttl)
+        return best[1] if best else 0
+
+    def _read_body(self, url):
+        with open(self._body_path(url), 'rb') as f:
+            return f.read()
+
+    def _write_body(self, url, body):
+        path = self._body_path(url)
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+    def _touch(self, url, entry):
+        entry['accessed'] = time.time()
+        self._dirty = True
+
+    def _evict(self):
+        # caller holds the lock
+        total = sum(e.get('size', 0) for e in self._entries.values())
+        if total <= self.max_bytes:
+            return
+        for url, entry in sorted(self._entries.items(), key=lambda kv: kv[1].get('accessed', 0)):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._body_path(url))
+            except OSError:
+                pass
+            total -= entry.get('size', 0)
+            del self._entries[url]
+            self.stats['evicted'] += 1
+
+    def get(self, url, fetch):
+        """Return the body for url, using the cache where possible.
+
+        fetch(extra_headers) performs the real request and must return
+        (status, headers, body); status 304 means the stored copy is current.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            entry = dict(entry) if entry else None
+        if entry:
+            age = time.time() - entry.get('stored', 0)
+            if age < self.ttl_for(entry.get('content_type')):
+                try:
+                    body = self._read_body(url)
+                    with self._lock:
+                        if url in self._entries:
+                            self._touch(url, self._entries[url])
+                        self.stats['hits'] += 1
+                    return body
+                except OSError:
+                    entry = None
+
+        validators = {}
+        if entry and entry.get('etag'):
+            validators['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            validators['If-Modified-Since'] = entry['last_modified']
+
+        status, headers, body = fetch(validators)
+        if status == 304 and entry:
+            body = self._read_body(url)
+            with self._lock:
+                current = self._entries.get(url)
+                if current is not None:
+                    current['stored'] = time.time()
+                    current['etag'] = headers.get('ETag') or current.get('etag', '')
+                    current['last_modified'] = headers.get('Last-Modified') or current.get('last_modified', '')
+                    self._touch(url, current)
+                self.stats['revalidated'] += 1
+            return body
+
+        self._write_body(url, body)
+        now = time.time()
+        with self._lock:
+            self._entries[url] = {
+                'etag': headers.get('ETag') or '',
+                'last_modified': headers.get('Last-Modified') or '',
+                'content_type': headers.get('Content-Type') or '',
+                'size': len(body),
+                'stored': now,
+                'accessed': now,
+            }
+            self._dirty = True
+            self.stats['misses'] += 1
+            self._evict()
+        return body
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp = self.index_path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp, self.index_path)
+            self._dirty = False
+
+    def summary(self):
+        s = self.stats
+        return (f"HTTP cache: {s['hits']} local hits, {s['revalidated']} revalidated (304), "
+                f"{s['misses']} downloaded, {s['evicted']} evicted")
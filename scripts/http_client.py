@@ -0,0 +1,225 @@
+"""Shared HTTP client with per-host keep-alive connection pools.
+
+urllib.request.urlopen opens a new TCP (and TLS) connection for every
+request. HttpClient keeps finished connections open per scheme/host/port and
+hands them to the next request for the same host, so consecutive requests to
+store.steampowered.com or the Steam CDN skip the connect and TLS handshake.
+It also asks for gzip/deflate and decodes the body and applies a
+connect/read timeout. It is safe to share between threads: a connection is
+only ever used by one request at a time.
+
+Redirects are followed unless the client is made with
+follow_redirects=False; then a 3xx comes back as a Response, and a caller
+that rate-limits per host sends the next hop through its own limiter, since
+the target may be a different host. Proxies come from the environment
+(HTTP_PROXY, HTTPS_PROXY, NO_PROXY, read with urllib.request.getproxies) as
+with urlopen: plain HTTP is sent to the proxy with the full URL, HTTPS is
+tunnelled with CONNECT. The proxy itself is always spoken to in plain HTTP.
+"""
+import base64
+import gzip
+import http.client
+import ssl
+import threading
+import urllib.parse
+import urllib.request
+import zlib
+
+DEFAULT_HEADERS = {
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+# errors meaning a pooled connection was closed by the server while idle
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                 ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+
+
+class HTTPError(Exception):
+    """A response with a 4xx/5xx status (or a redirect loop)."""
+
+    def __init__(self, url, status, reason, headers, body=b''):
+        super().__init__(f'HTTP {status} {reason} for {url}')
+        self.url = url
+        self.status = status
+        self.code = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+
+class Response:
+    def __init__(self, url, status, reason, headers, body):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+
+def redirect_target(url, status, headers):
+    """Absolute URL a redirect response points to, or None."""
+    location = headers.get('Location') if status in REDIRECT_CODES else None
+    return urllib.parse.urljoin(url, location) if location else None
+
+
+def redirect_method(status, method):
+    return 'GET' if status == 303 else method
+
+
+def decode_body(body, encoding):
+    encoding = (encoding or '').strip().lower()
+    if encoding in ('gzip', 'x-gzip'):
+        return gzip.decompress(body)
+    if encoding == 'deflate':
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            # some servers send raw deflate without the zlib header
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+
+class HttpClient:
+    """Pooled HTTP/1.1 client.
+
+    timeout is the connect and per-read timeout in seconds, max_idle the
+    number of idle connections kept per host. pooled=False opens a fresh
+    connection for every request (for comparison in benchmarks).
+    follow_redirects=False returns redirects to the caller. proxies maps a
+    scheme to a proxy URL (default: urllib.request.getproxies()).
+    """
+
+    def __init__(self, timeout=15, max_idle=8, max_redirects=5, headers=None, pooled=True,
+                 follow_redirects=True, proxies=None):
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_redirects = max_redirects
+        self.follow_redirects = follow_redirects
+        self.proxies = urllib.request.getproxies() if proxies is None else proxies
+        self.headers = dict(DEFAULT_HEADERS)
+        self.headers.update(headers or {})
+        self.pooled = pooled
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._ssl = ssl.create_default_context()
+        self.stats = {'requests': 0, 'connections': 0, 'reused': 0}
+
+    def _key(self, parts):
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        return parts.scheme, parts.hostname, port
+
+    def _proxy(self, scheme, host):
+        """(host, port, extra headers) of the proxy for this target, or None."""
+        proxy = self.proxies.get(scheme)
+        if not proxy or urllib.request.proxy_bypass(host):
+            return None
+        parts = urllib.parse.urlsplit(proxy if '://' in proxy else 'http://' + proxy)
+        headers = {}
+        if parts.username:
+            creds = f'{urllib.parse.unquote(parts.username)}:{urllib.parse.unquote(parts.password or "")}'
+            headers['Proxy-Authorization'] = 'Basic ' + base64.b64encode(creds.encode()).decode('ascii')
+        return parts.hostname, parts.port or 80, headers
+
+    def _acquire(self, key, timeout):
+        if self.pooled:
+            with self._lock:
+                idle = self._idle.get(key)
+                if idle:
+                    conn = idle.pop()
+                    self.stats['reused'] += 1
+                    if conn.sock is not None:
+                        conn.sock.settimeout(timeout)
+                    conn.timeout = timeout
+                    return conn, True
+        scheme, host, port = key
+        proxy = self._proxy(scheme, host)
+        if scheme == 'https':
+            if proxy:
+                conn = http.client.HTTPSConnection(proxy[0], proxy[1], timeout=timeout, context=self._ssl)
+                conn.set_tunnel(host, port, headers=proxy[2])
+            else:
+                conn = http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl)
+        else:
+            conn = http.client.HTTPConnection(*(proxy[:2] if proxy else (host, port)), timeout=timeout)
+        with self._lock:
+            self.stats['connections'] += 1
+        return conn, False
+
+    def _release(self, key, conn):
+        if self.pooled:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+    def _send(self, method, parts, headers, timeout):
+        key = self._key(parts)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        proxy = self._proxy(parts.scheme, parts.hostname) if parts.scheme == 'http' else None
+        if proxy:
+            # a plain HTTP proxy gets the absolute URL
+            path = f'http://{parts.netloc}{path}'
+            headers = dict(headers, **proxy[2])
+        while True:
+            conn, reused = self._acquire(key, timeout)
+            try:
+                conn.request(method, path, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except _STALE_ERRORS:
+                conn.close()
+                # the server dropped an idle connection; try the next one,
+                # ending with a fresh connection whose failure is real
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            return resp, body
+
+    def request(self, url, headers=None, method='GET', timeout=None):
+        """Perform the request, following redirects unless follow_redirects
+        is off. 4xx/5xx raise HTTPError; other statuses, including 304 and
+        unfollowed redirects, are returned as a Response."""
+        timeout = self.timeout if timeout is None else timeout
+        merged = dict(self.headers)
+        merged.update(headers or {})
+        for _ in range(self.max_redirects + 1):
+            parts = urllib.parse.urlsplit(url)
+            if parts.scheme not in ('http', 'https'):
+                raise ValueError(f'unsupported URL scheme: {url}')
+            with self._lock:
+                self.stats['requests'] += 1
+            resp, body = self._send(method, parts, merged, timeout)
+            target = redirect_target(url, resp.status, resp.headers) if self.follow_redirects else None
+            if target:
+                url = target
+                method = redirect_method(resp.status, method)
+                continue
+            body = decode_body(body, resp.getheader('Content-Encoding'))
+            if resp.status >= 400:
+                raise HTTPError(url, resp.status, resp.reason, resp.headers, body)
+            return Response(url, resp.status, resp.reason, resp.headers, body)
+        raise HTTPError(url, resp.status, 'too many redirects', resp.headers)
+
+    def get(self, url, headers=None, timeout=None):
+        """Body of a successful GET."""
+        return self.request(url, headers, timeout=timeout).body
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
@@ -0,0 +1,130 @@
+"""Incremental reader for large top-level JSON arrays.
+
+Store exports such as the Epic and Steam library dumps are one big array of
+entries, each carrying heavy metadata the listing scripts never read.
+iter_json_array() reads the file in chunks and yields one element at a
+time, optionally projected down to the fields the caller uses, so peak
+memory is one entry plus one chunk instead of the whole decoded file.
+
+Field specs are dicts naming the keys to keep. A key mapped to None keeps
+its value as is; a key mapped to another spec keeps only those keys of the
+nested object, or of every object in a nested list:
+
+    {'name': None, 'metadata': {'description': None, 'keyImages': {'type': None, 'url': None}}}
+
+dump_json_array() is the writing side: it yields a JSON array one element
+at a time, laid out exactly as json.dumps(list(items), indent=2), and is the
+one serializer for the _*_game_list.json files.
+"""
+import json
+
+_WS = ' \t\n\r'
+_NUMBER_CHARS = '0123456789+-.eE'
+
+
+def project(value, fields):
+    """Copy of value reduced to the keys named by the fields spec."""
+    if fields is None:
+        return value
+    if isinstance(value, list):
+        return [project(v, fields) for v in value]
+    if not isinstance(value, dict):
+        return value
+    out = {}
+    for key, sub in fields.items():
+        if key in value:
+            out[key] = project(value[key], sub)
+    return out
+
+
+def iter_json_array(f, fields=None, chunk_size=1 << 16):
+    """Yield the elements of the JSON array read from text file f.
+
+    An empty or whitespace-only file yields nothing. Anything else that is
+    not an array raises ValueError, as does malformed JSON; elements before
+    the error have already been yielded by then.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+
+    def fill(want):
+        # read at least `want` more characters; False once the file is exhausted
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        if pos:
+            buf = buf[pos:]
+            pos = 0
+        data = f.read(max(want, chunk_size))
+        if not data:
+            eof = True
+            return False
+        buf += data
+        return True
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WS:
+                pos += 1
+            if pos < len(buf) or not fill(chunk_size):
+                return
+
+    skip_ws()
+    if pos >= len(buf):
+        return
+    if buf[pos] != '[':
+        raise ValueError('expected a JSON array')
+    pos += 1
+
+    skip_ws()
+    if pos < len(buf) and buf[pos] == ']':
+        return
+
+    while True:
+        skip_ws()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # the element runs past the buffer: grow it geometrically so a
+                # huge element costs O(size log size), not one retry per chunk
+                if fill(len(buf) - pos):
+                    continue
+                raise
+            # a bare number running to the end of the buffer ('12' of '12.5e3')
+            # may continue in the next chunk
+            if isinstance(value, (int, float)) and not buf[end:].lstrip(_NUMBER_CHARS) \
+                    and fill(chunk_size):
+                continue
+            break
+        pos = end
+        yield project(value, fields)
+        value = None
+
+        skip_ws()
+        if pos >= len(buf):
+            raise ValueError('unterminated JSON array')
+        if buf[pos] == ']':
+            return
+        if buf[pos] != ',':
+            raise ValueError(f'expected , or ] in JSON array, got {buf[pos]!r}')
+        pos += 1
+
+
+def load_json_array(path, fields=None):
+    """iter_json_array over the file at path."""
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from iter_json_array(f, fields)
+
+
+def dump_json_array(items, indent=2):
+    """Yield the text of json.dumps(list(items), indent=indent) piece by piece."""
+    pad = '\n' + ' ' * indent
+    empty = True
+    for item in items:
+        yield ('[' if empty else ',') + pad + json.dumps(item, indent=indent).replace('\n', pad)
+        empty = False
+    yield '[]' if empty else '\n]'
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+import threading
+
+MANIFEST_VERSION = 1
+
+
+def hash_record(obj):
+    """Stable sha256 of a JSON-serialisable record (dicts keep their order)."""
+    data = json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=list)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def hash_file(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return ''
+
+
+class ListingManifest:
+    """Remembers, per game folder, the hash of the aggregated source records
+    that produced it and of the meta.json that was written.
+
+    A folder is current when both hashes still match, i.e. neither the
+    source lists nor the file on disk changed since the last build, and the
+    build that wrote it was complete. A folder recorded with complete=False
+    (some of its requests failed or were skipped) is never current, so the
+    next run builds it again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._games = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self._games = data.get('games') or {}
+        except Exception:
+            pass
+
+    def is_current(self, key, source_hash, meta_path):
+        with self._lock:
+            entry = self._games.get(key)
+        if not entry or entry.get('incomplete') or entry.get('source') != source_hash:
+            return False
+        return entry.get('meta') == hash_file(meta_path)
+
+    def record(self, key, source_hash, meta_path, complete=True):
+        meta_hash = hash_file(meta_path)
+        entry = {'source': source_hash, 'meta': meta_hash}
+        if not complete:
+            entry['incomplete'] = True
+        with self._lock:
+            self._games[key] = entry
+
+    def prune(self, keys):
+        """Forget folders that are no longer produced by any source entry."""
+        keys = set(keys)
+        with self._lock:
+            for k in [k for k in self._games if k not in keys]:
+                del self._games[k]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock:
+            data = {'version': MANIFEST_VERSION, 'games': dict(sorted(self._games.items()))}
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1, ensure_ascii=False)
+        os.replace(tmp, self.path)
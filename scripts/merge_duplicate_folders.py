@@ -3,7 +3,9 @@ import os
 import json
 import shutil
 
-def merge_meta_files(file1, file2, merged_file_path):
+from output_writer import OutputWriter
+
+def merge_meta_files(file1, file2, merged_file_path, writer):
     with open(file1, 'r') as f1, open(file2, 'r') as f2:
         meta1 = json.load(f1)
         meta2 = json.load(f2)
@@ -21,12 +23,12 @@ def merge_meta_files(file1, file2, merged_file_path):
     
     # you can add more merge logic here if needed
 
-    with open(merged_file_path, 'w') as f_merged:
-        json.dump(meta1, f_merged, indent=2)
+    writer.write_json(merged_file_path, meta1, indent=2)
 
 def merge_duplicate_folders():
     game_dir = 'docs/asset/Game/'
     files = os.listdir(game_dir)
+    writer = OutputWriter()
     
     # Create a dictionary to keep track of folder names and their variants
     folder_map = {}
@@ -54,7 +56,7 @@ def merge_duplicate_folders():
                 if os.path.exists(keep_meta) and os.path.exists(delete_meta):
                     print("    Merging meta.json files...")
                     merged_meta_path = os.path.join(keep_folder, 'meta.json') # will overwrite the keep_meta
-                    merge_meta_files(keep_meta, delete_meta, merged_meta_path)
+                    merge_meta_files(keep_meta, delete_meta, merged_meta_path, writer)
                 elif os.path.exists(delete_meta) and not os.path.exists(keep_meta):
                     shutil.move(delete_meta, keep_folder)
 
@@ -71,4 +73,6 @@ def merge_duplicate_folders():
                 print(f"  Deleting folder '{delete_folder}'...")
                 shutil.rmtree(delete_folder)
 
+    print(writer.summary())
+
 merge_duplicate_folders()
@@ -0,0 +1,272 @@
+"""Build resized, re-encoded variants of every game cover.
+
+Usage: python scripts/optimize_covers.py [--widths 320,640,1280] [--formats webp,jpeg] [--force]
+
+For each folder under docs/asset/Game the cover (cover.jpg, or the first
+image file as generate_game_data picks it) is resized to each width bucket
+no larger than the original, plus the original width when that is below the
+largest bucket, and saved in each format under
+<folder>/variants/. JPEG has no transparency, so a cover with transparent
+pixels gets lossless PNG variants in place of the JPEG ones rather than a
+black background. variants/index.json records the source hash, the
+original dimensions and every variant with its own dimensions;
+generate_game_data copies that into games.json. Folders whose cover hash
+matches the index are skipped.
+
+Needs Pillow (pip install Pillow). Without it the stage prints a notice and
+leaves the tree untouched.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+
+from output_writer import OutputWriter
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+GAME_DIR = os.path.join(ROOT, 'docs', 'asset', 'Game')
+
+HASH_CACHE_PATH = os.path.join(ROOT, '.cache', 'file_hashes.json')
+
+VARIANT_DIR = 'variants'
+INDEX_NAME = 'index.json'
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.gif')
+DEFAULT_WIDTHS = (320, 640, 1280)
+DEFAULT_FORMATS = ('webp', 'jpeg')
+
+# Pillow format name, file extension, MIME type, save options
+FORMATS = {
+    'avif': ('AVIF', 'avif', 'image/avif', {'quality': 60}),
+    'webp': ('WEBP', 'webp', 'image/webp', {'quality': 80, 'method': 6}),
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    # stands in for jpeg on covers with transparency
+    'png': ('PNG', 'png', 'image/png', {'optimize': True}),
+}
+# settings['alpha']: how covers with transparency are written; indexes from
+# before it was recorded flattened them onto black and are rebuilt
+ALPHA_FORMAT = 'png'
+
+
+def pick_cover(files):
+    """Cover image among a folder's file names (in listing order), or None."""
+    if 'cover.jpg' in files:
+        return 'cover.jpg'
+    for file in files:
+        if file.lower().endswith(IMAGE_EXTS):
+            return file
+    return None
+
+
+def find_cover_file(game_path):
+    """Cover image file name inside a game folder, or None."""
+    if os.path.exists(os.path.join(game_path, 'cover.jpg')):
+        return 'cover.jpg'
+    return pick_cover(os.listdir(game_path))
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class HashCache:
+    """file_sha1 remembered by path, size and mtime, so a file that has not
+    changed since the last run is not read again; kept in a JSON file."""
+
+    def __init__(self, path=HASH_CACHE_PATH):
+        self.path = path
+        self.stats = {'cached': 0, 'hashed': 0}
+        self._dirty = False
+        self._entries = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def sha1(self, path):
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        entry = self._entries.get(key)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            self.stats['cached'] += 1
+            return entry[2]
+        digest = file_sha1(key)
+        self._entries[key] = [st.st_size, st.st_mtime_ns, digest]
+        self._dirty = True
+        self.stats['hashed'] += 1
+        return digest
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # forget files that are gone
+        self._entries = {k: e for k, e in self._entries.items() if os.path.exists(k)}
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+
+def load_variants(game_path, source_hash=None):
+    """The folder's variants index, or None when missing, unreadable or,
+    if source_hash is given, built from a different cover."""
+    try:
+        with open(os.path.join(game_path, VARIANT_DIR, INDEX_NAME), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if source_hash is not None and index.get('source_hash') != source_hash:
+        return None
+    return index
+
+
+def bucket_widths(width, widths):
+    out = [w for w in sorted(set(widths)) if w <= width]
+    # a cover narrower than the largest bucket also gets a re-encoded copy at
+    # its own width, so the biggest slot is never served the raw original
+    if widths and width < max(widths) and width not in out:
+        out.append(width)
+    return out
+
+
+def encode(img, fmt):
+    pil_format, _, _, options = FORMATS[fmt]
+    if pil_format == 'JPEG' and img.mode != 'RGB':
+        img = img.convert('RGB')
+    buf = io.BytesIO()
+    img.save(buf, pil_format, **options)
+    return buf.getvalue()
+
+
+def has_transparency(img):
+    """Whether an RGBA image has any pixel that is not fully opaque."""
+    return img.mode == 'RGBA' and img.getextrema()[3][0] < 255
+
+
+def build_variants(game_path, cover, source_hash, settings, writer):
+    with Image.open(os.path.join(game_path, cover)) as src:
+        src.seek(0)
+        img = src.convert('RGBA' if src.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    if img.mode == 'RGBA' and not has_transparency(img):
+        img = img.convert('RGB')
+    width, height = img.size
+    formats = settings['formats']
+    if img.mode == 'RGBA':
+        formats = [settings['alpha'] if fmt == 'jpeg' else fmt for fmt in formats]
+
+    variants = []
+    for w in bucket_widths(width, settings['widths']):
+        h = max(1, round(height * w / width))
+        resized = img if w == width else img.resize((w, h), Image.LANCZOS)
+        for fmt in formats:
+            ext, mime = FORMATS[fmt][1], FORMATS[fmt][2]
+            name = f'cover-{w}.{ext}'
+            data = encode(resized, fmt)
+            writer.write_bytes(os.path.join(game_path, VARIANT_DIR, name), data)
+            variants.append({'file': name, 'type': mime, 'width': w, 'height': h,
+                             'sha1': hashlib.sha1(data).hexdigest()})
+
+    index = {
+        'source': cover,
+        'source_hash': source_hash,
+        'width': width,
+        'height': height,
+        'settings': settings,
+        'variants': variants,
+    }
+    writer.write_json(os.path.join(game_path, VARIANT_DIR, INDEX_NAME), index, indent=2)
+    return index
+
+
+def remove_stale(game_path, old, new):
+    keep = {v['file'] for v in new['variants']}
+    for v in (old or {}).get('variants', []):
+        if v.get('file') not in keep:
+            try:
+                os.remove(os.path.join(game_path, VARIANT_DIR, v['file']))
+            except OSError:
+                pass
+
+
+def optimize_covers(game_dir=GAME_DIR, widths=DEFAULT_WIDTHS, formats=DEFAULT_FORMATS, force=False):
+    if Image is None:
+        print("Pillow is not installed; skipping cover optimization (pip install Pillow).")
+        return None
+
+    usable = []
+    for fmt in formats:
+        if fmt not in FORMATS:
+            print(f"Unknown format '{fmt}', skipping it")
+        elif fmt in ('avif', 'webp') and not features.check(fmt):
+            print(f"This Pillow build cannot write {fmt}; skipping it")
+        else:
+            usable.append(fmt)
+    if not usable:
+        print("No usable output formats; nothing to do.")
+        return None
+
+    # a change of buckets or formats rebuilds every folder
+    settings = {'widths': sorted(set(widths)), 'formats': usable, 'alpha': ALPHA_FORMAT}
+    writer = OutputWriter()
+    hashes = HashCache()
+    stats = {'built': 0, 'unchanged': 0, 'no_cover': 0, 'failed': 0}
+    for d in sorted(os.listdir(game_dir)):
+        game_path = os.path.join(game_dir, d)
+        if not os.path.isdir(game_path):
+            continue
+        cover = find_cover_file(game_path)
+        if not cover:
+            stats['no_cover'] += 1
+            continue
+
+        source_hash = hashes.sha1(os.path.join(game_path, cover))
+        old = load_variants(game_path)
+        if not force and old and old.get('source_hash') == source_hash and old.get('source') == cover \
+                and old.get('settings') == settings \
+                and all(os.path.exists(os.path.join(game_path, VARIANT_DIR, v['file'])) for v in old['variants']):
+            stats['unchanged'] += 1
+            continue
+
+        try:
+            new = build_variants(game_path, cover, source_hash, settings, writer)
+        except Exception as e:
+            print(f"Could not optimize cover for {d}: {e}")
+            stats['failed'] += 1
+            continue
+        remove_stale(game_path, old, new)
+        stats['built'] += 1
+    hashes.save()
+
+    print(f"Covers: {stats['built']} rebuilt, {stats['unchanged']} unchanged, "
+          f"{stats['no_cover']} without a cover, {stats['failed']} failed")
+    print(writer.summary())
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build resized WebP/JPEG variants of game covers')
+    parser.add_argument('--game-dir', dest='game_dir', default=GAME_DIR, help='Folder holding one directory per game')
+    parser.add_argument('--widths', default=','.join(map(str, DEFAULT_WIDTHS)), help='Comma separated width buckets in pixels (default: 320,640,1280)')
+    parser.add_argument('--formats', default=','.join(DEFAULT_FORMATS), help='Comma separated output formats out of avif, webp, jpeg (default: webp,jpeg)')
+    parser.add_argument('--force', action='store_true', help='Rebuild variants even when the cover hash is unchanged')
+    args = parser.parse_args()
+
+    widths = [int(w) for w in args.widths.split(',') if w.strip()]
+    formats = [f.strip().lower() for f in args.formats.split(',') if f.strip()]
+    optimize_covers(args.game_dir, widths, formats, args.force)
+
+
+if __name__ == '__main__':
+    main()
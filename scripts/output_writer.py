@@ -0,0 +1,104 @@
+import filecmp
+import json
+import os
+import tempfile
+import threading
+
+
+class OutputWriter:
+    """Writes build outputs only when their bytes change, atomically.
+
+    New content is compared with the file on disk and identical writes are
+    skipped, so unchanged files keep their mtime and are not re-uploaded on
+    deploy. Real writes go to a temp file in the target directory that is
+    then renamed over the target, so a crash never leaves a truncated file.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.written = 0
+        self.skipped = 0
+
+    def _count(self, wrote):
+        with self._lock:
+            if wrote:
+                self.written += 1
+            else:
+                self.skipped += 1
+        return wrote
+
+    def write_bytes(self, path, data):
+        """Write data to path unless it already holds exactly these bytes.
+        Returns True when the file was written."""
+        try:
+            if os.path.getsize(path) == len(data):
+                with open(path, 'rb') as f:
+                    if f.read() == data:
+                        return self._count(False)
+        except OSError:
+            pass
+
+        fd, tmp = self._temp_for(path)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            self._install(tmp, path)
+        except BaseException:
+            self._discard(tmp)
+            raise
+        return self._count(True)
+
+    def write_chunks(self, path, chunks, encoding='utf-8'):
+        """Write text produced piece by piece (e.g. by json_stream.dump_json_array)
+        without assembling it in memory: the chunks go straight into the temp
+        file, which replaces path unless path already holds the same bytes."""
+        fd, tmp = self._temp_for(path)
+        try:
+            with os.fdopen(fd, 'w', encoding=encoding, newline='') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            try:
+                same = filecmp.cmp(tmp, path, shallow=False)
+            except OSError:
+                same = False
+            if same:
+                self._discard(tmp)
+                return self._count(False)
+            self._install(tmp, path)
+        except BaseException:
+            self._discard(tmp)
+            raise
+        return self._count(True)
+
+    @staticmethod
+    def _temp_for(path):
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        return tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+
+    @staticmethod
+    def _install(tmp, path):
+        # mkstemp creates the file private; keep the target's mode instead
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _discard(tmp):
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+    def write_text(self, path, text, encoding='utf-8'):
+        return self.write_bytes(path, text.encode(encoding))
+
+    def write_json(self, path, obj, **dump_kwargs):
+        """Serialise obj with json.dumps(obj, **dump_kwargs) and write it."""
+        return self.write_text(path, json.dumps(obj, **dump_kwargs))
+
+    def summary(self):
+        return f"Output files: {self.written} written, {self.skipped} unchanged"
@@ -2,6 +2,9 @@
 import re
 import json
 
+from json_stream import dump_json_array
+from output_writer import OutputWriter
+
 def extract_url(cell):
     match = re.search(r'\[.*\]\((.*)\)', cell)
     if match:
@@ -17,6 +20,22 @@ def extract_url(cell):
     else:
         return cell
 
+def load_store_list(filename):
+    """Load a store list as (entries, name -> entries with that name), or None if missing."""
+    try:
+        with open(filename, 'r') as f:
+            try:
+                game_list = json.load(f)
+            except json.JSONDecodeError:
+                game_list = []
+    except FileNotFoundError:
+        return None
+    by_name = {}
+    for game in game_list:
+        by_name.setdefault(game.get('name'), []).append(game)
+    return game_list, by_name
+
+
 def parse_and_update():
     store_map = {
         'Steam Link': '_steam_game_list.json',
@@ -25,6 +44,20 @@ def parse_and_update():
         'Itch.io Link': '_itch_game_list.json'
     }
 
+    # load every store list once; all table rows are applied in memory
+    lists = {}
+    for list_name in store_map.values():
+        filename = f"docs/asset/Game/{list_name}"
+        loaded = load_store_list(filename)
+        lists[filename] = {
+            'games': loaded[0] if loaded else [],
+            'by_name': loaded[1] if loaded else {},
+            'created': loaded is None,
+            'added': 0,
+            'updated': 0,
+            'unchanged': 0,
+        }
+
     with open('docs/asset/Game/games.md', 'r') as f:
         content = f.read()
 
@@ -49,53 +82,39 @@ def parse_and_update():
                 if i >= len(header): continue # if row has more columns than header
 
                 store_header = header[i]
-                if store_header in store_map:
-                    filename = f"docs/asset/Game/{store_map[store_header]}"
-                    url = extract_url(cell)
-
-                    if url:
-                        new_game_data = {
-                            "name": game_name,
-                            "storeUrl": url
-                        }
-
-                        try:
-                            with open(filename, 'r+') as f:
-                                try:
-                                    game_list = json.load(f)
-                                except json.JSONDecodeError:
-                                    game_list = []
-
-                                # Check if the game already exists
-                                found = False
-                                for game in game_list:
-                                    if game.get('name') == game_name:
-                                        # Game with same name exists, check if url is the same
-                                        if game.get('storeUrl') == url:
-                                            print(f"'{game_name}' already in '{filename}' with the same link. Skipping.")
-                                            found = True
-                                            break
-                                
-                                if not found:
-                                    # Check for game with same name but different URL and update it
-                                    for game in game_list:
-                                        if game.get('name') == game_name:
-                                            game['storeUrl'] = url
-                                            print(f"Updated URL for '{game_name}' in '{filename}'.")
-                                            found = True
-                                            break
-
-                                    if not found:
-                                        game_list.append(new_game_data)
-                                        print(f"Added '{game_name}' to '{filename}'.")
-
-                                f.seek(0)
-                                f.truncate()
-                                json.dump(game_list, f, indent=2)
-
-                        except FileNotFoundError:
-                            with open(filename, 'w') as f:
-                                json.dump([new_game_data], f, indent=2)
-                                print(f"Created '{filename}' and added '{game_name}'.")
-
-parse_and_update()
+                if store_header not in store_map:
+                    continue
+                url = extract_url(cell)
+                if not url:
+                    continue
+
+                store = lists[f"docs/asset/Game/{store_map[store_header]}"]
+                same_name = store['by_name'].get(game_name, [])
+                if any(game.get('storeUrl') == url for game in same_name):
+                    store['unchanged'] += 1
+                elif same_name:
+                    # game with the same name but a different URL: update the first one
+                    same_name[0]['storeUrl'] = url
+                    store['updated'] += 1
+                else:
+                    new_game_data = {
+                        "name": game_name,
+                        "storeUrl": url
+                    }
+                    store['games'].append(new_game_data)
+                    store['by_name'][game_name] = [new_game_data]
+                    store['added'] += 1
+
+    writer = OutputWriter()
+    for filename, store in lists.items():
+        changed = store['added'] or store['updated']
+        if changed:
+            writer.write_chunks(filename, dump_json_array(store['games']))
+        status = 'created' if store['created'] and changed else ('written' if changed else 'not changed')
+        print(f"{filename}: {store['added']} added, {store['updated']} updated, "
+              f"{store['unchanged']} already present ({status})")
+    print(writer.summary())
+
+
+if __name__ == '__main__':
+    parse_and_update()
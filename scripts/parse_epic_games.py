@@ -1,12 +1,19 @@
 import json
 import re
 
-with open("docs/asset/Game/_epic_game_list copy.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
+from json_stream import load_json_array
+
+# only these fields are kept from each export entry; the rest of the
+# metadata blob is dropped as soon as an entry is parsed
+EPIC_FIELDS = {
+    "app_title": None,
+    "app_name": None,
+    "metadata": {"description": None, "keyImages": {"type": None, "url": None}},
+}
 
 games_out = []
 
-for game in data:
+for game in load_json_array("docs/asset/Game/_epic_game_list copy.json", EPIC_FIELDS):
     name = game.get("app_title") or game.get("app_name")
     metadata = game.get("metadata", {})
 
@@ -0,0 +1,171 @@
+"""Staged worker pipeline connected by bounded queues.
+
+    Pipeline([Stage('resolve', resolve), Stage('fetch', fetch, workers=8), ...]).run(source)
+
+The source iterable is consumed on its own thread (reported as the 'source'
+stage, or whatever name run() is given). Every stage has its own worker
+threads that take an item from the stage's input queue, call func(item) and
+put the result on the next stage's queue. Queues hold at most queue_size
+items, so a slow stage makes the stages before it wait instead of letting
+work pile up in memory, and I/O-bound and CPU-bound stages run at the same
+time on different items.
+
+Per stage the pipeline counts items, busy seconds (summed over workers), time
+spent waiting for input and time blocked on a full output queue, and the
+deepest its input queue got; stats() returns them and summary() formats them.
+Items leave the last stage in completion order, not source order.
+
+If func raises, the error is remembered, the item is dropped and the rest of
+the pipeline drains normally; run() then re-raises the first error.
+"""
+import queue
+import threading
+import time
+
+_DONE = object()
+
+
+class Stage:
+    def __init__(self, name, func, workers=1):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+
+
+class _StageStats:
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+        self.max_depth = 0
+        self.started = None
+        self.finished = None
+
+
+class Pipeline:
+    def __init__(self, stages, queue_size=16):
+        self.stages = list(stages)
+        self.queue_size = max(1, int(queue_size))
+        self._lock = threading.Lock()
+        self._stats = []
+        self._error = None
+
+    def _put(self, q, item, stats):
+        t = time.perf_counter()
+        q.put(item)
+        with self._lock:
+            stats.blocked += time.perf_counter() - t
+
+    def _feed(self, source, out_q, stats, consumers):
+        stats.started = time.perf_counter()
+        it = iter(source)
+        try:
+            while True:
+                t = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    break
+                stats.busy += time.perf_counter() - t
+                stats.items += 1
+                self._put(out_q, item, stats)
+        except Exception as e:
+            with self._lock:
+                self._error = self._error or e
+        finally:
+            stats.finished = time.perf_counter()
+            for _ in range(consumers):
+                out_q.put(_DONE)
+
+    def _work(self, stage, in_q, out_q, stats, remaining, consumers, results):
+        while True:
+            t = time.perf_counter()
+            item = in_q.get()
+            waited = time.perf_counter() - t
+            with self._lock:
+                stats.starved += waited
+                stats.max_depth = max(stats.max_depth, in_q.qsize() + 1)
+                if stats.started is None:
+                    stats.started = t
+            if item is _DONE:
+                break
+            t = time.perf_counter()
+            try:
+                out = stage.func(item)
+            except Exception as e:
+                with self._lock:
+                    self._error = self._error or e
+                    stats.busy += time.perf_counter() - t
+                continue
+            with self._lock:
+                stats.busy += time.perf_counter() - t
+                stats.items += 1
+            if out_q is None:
+                with self._lock:
+                    results.append(out)
+            else:
+                self._put(out_q, out, stats)
+        with self._lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+            if last:
+                stats.finished = time.perf_counter()
+        if last and out_q is not None:
+            for _ in range(consumers):
+                out_q.put(_DONE)
+
+    def run(self, source, source_name='source'):
+        """Push every item of source through the stages; returns the results
+        of the last stage in completion order."""
+        queues = [queue.Queue(self.queue_size) for _ in self.stages]
+        source_stats = _StageStats(source_name, 1)
+        self._stats = [source_stats] + [_StageStats(s.name, s.workers) for s in self.stages]
+        self._error = None
+        results = []
+        threads = [threading.Thread(target=self._feed, args=(source, queues[0], source_stats, self.stages[0].workers),
+                                    name=f'pipeline-{source_name}', daemon=True)]
+        for i, stage in enumerate(self.stages):
+            last = i == len(self.stages) - 1
+            out_q = None if last else queues[i + 1]
+            consumers = 0 if last else self.stages[i + 1].workers
+            remaining = [stage.workers]
+            for w in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work,
+                    args=(stage, queues[i], out_q, self._stats[i + 1], remaining, consumers, results),
+                    name=f'pipeline-{stage.name}-{w}', daemon=True))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if self._error is not None:
+            raise self._error
+        return results
+
+    def stats(self):
+        out = []
+        for s in self._stats:
+            wall = (s.finished - s.started) if s.started is not None and s.finished is not None else 0.0
+            out.append({
+                'stage': s.name,
+                'workers': s.workers,
+                'items': s.items,
+                'wall_seconds': wall,
+                'busy_seconds': s.busy,
+                'waiting_for_input_seconds': s.starved,
+                'blocked_on_output_seconds': s.blocked,
+                'max_queue_depth': s.max_depth,
+                'items_per_second': s.items / wall if wall > 0 else 0.0,
+            })
+        return out
+
+    def summary(self):
+        lines = [f"{'stage':<10} {'workers':>7} {'items':>7} {'items/s':>9} {'busy s':>8} {'idle s':>8} {'blocked s':>9} {'max queue':>9}"]
+        for s in self.stats():
+            lines.append(f"{s['stage']:<10} {s['workers']:>7} {s['items']:>7} {s['items_per_second']:>9.1f} "
+                         f"{s['busy_seconds']:>8.2f} {s['waiting_for_input_seconds']:>8.2f} "
+                         f"{s['blocked_on_output_seconds']:>9.2f} {s['max_queue_depth']:>9}")
+        return '\n'.join(lines)
@@ -0,0 +1,187 @@
+"""Opt-in run profiling for the listing scripts (--profile).
+
+PROFILE is a process-wide Profiler that does nothing until a script calls
+PROFILE.start(). Once started it records:
+
+  stages   top-level phases of the run, in order: wall and CPU seconds and
+           the tracemalloc peak while the stage ran
+  phases   work repeated inside those stages, possibly on several worker
+           threads (fetch, HTML parsing, image and JSON writes): call count
+           and summed wall and thread CPU seconds
+  hosts    per-host request count, bytes, errors, latency percentiles, a
+           latency histogram and the time spent queued for a request slot
+
+report() returns everything as a dict, summary() a few readable lines.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+import urllib.parse
+from contextlib import contextmanager
+
+# upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def cache_report(stats):
+    """HttpCache.stats plus the share of lookups answered without a download."""
+    lookups = stats['hits'] + stats['revalidated'] + stats['misses']
+    return dict(stats, hit_ratio=(stats['hits'] + stats['revalidated']) / lookups if lookups else 0.0)
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._stages = []
+        self._phases = {}
+        self._hosts = {}
+        self._started = None
+        self.extra = {}
+
+    def start(self, trace_memory=True):
+        self.enabled = True
+        self._started = (time.perf_counter(), time.process_time())
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        """A top-level phase, run from the main thread."""
+        if not self.enabled:
+            yield
+            return
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            record = {
+                'name': name,
+                'wall_seconds': time.perf_counter() - wall,
+                'cpu_seconds': time.process_time() - cpu,
+            }
+            if tracing:
+                record['peak_traced_bytes'] = tracemalloc.get_traced_memory()[1]
+            self._stages.append(record)
+
+    @contextmanager
+    def phase(self, name):
+        """Repeated work inside a stage; safe to use from worker threads."""
+        if not self.enabled:
+            yield
+            return
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.thread_time() - cpu
+            with self._lock:
+                p = self._phases.setdefault(name, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+                p['calls'] += 1
+                p['wall_seconds'] += wall
+                p['cpu_seconds'] += cpu
+
+    def request(self, url, seconds, nbytes=0, status=None, error=False, wait=0.0):
+        """One request to url: seconds on the wire, nbytes of body, and wait
+        seconds spent queued before it could be sent."""
+        if not self.enabled:
+            return
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        with self._lock:
+            h = self._hosts.setdefault(host, {'latencies': [], 'bytes': 0, 'errors': 0, 'wait': 0.0, 'statuses': {}})
+            h['latencies'].append(seconds)
+            h['bytes'] += nbytes
+            h['wait'] += wait
+            if error:
+                h['errors'] += 1
+            if status is not None:
+                h['statuses'][str(status)] = h['statuses'].get(str(status), 0) + 1
+
+    def _host_report(self, h):
+        lat = sorted(h['latencies'])
+        buckets = {}
+        for bound in LATENCY_BUCKETS_MS:
+            buckets[f'<={bound}ms'] = 0
+        buckets[f'>{LATENCY_BUCKETS_MS[-1]}ms'] = 0
+        for s in lat:
+            ms = s * 1000
+            for bound in LATENCY_BUCKETS_MS:
+                if ms <= bound:
+                    buckets[f'<={bound}ms'] += 1
+                    break
+            else:
+                buckets[f'>{LATENCY_BUCKETS_MS[-1]}ms'] += 1
+        return {
+            'requests': len(lat),
+            'bytes': h['bytes'],
+            'errors': h['errors'],
+            'queued_seconds': h['wait'],
+            'statuses': h['statuses'],
+            'latency_ms': {
+                'p50': percentile(lat, 50) * 1000,
+                'p90': percentile(lat, 90) * 1000,
+                'p99': percentile(lat, 99) * 1000,
+                'max': (lat[-1] if lat else 0.0) * 1000,
+            },
+            'histogram': buckets,
+        }
+
+    def report(self):
+        total = {}
+        if self._started:
+            total = {'wall_seconds': time.perf_counter() - self._started[0],
+                     'cpu_seconds': time.process_time() - self._started[1]}
+            if tracemalloc.is_tracing():
+                total['peak_traced_bytes'] = max([s.get('peak_traced_bytes', 0) for s in self._stages] or [0])
+        with self._lock:
+            return {
+                'total': total,
+                'stages': list(self._stages),
+                'phases': {k: dict(v) for k, v in sorted(self._phases.items())},
+                'hosts': {host: self._host_report(h) for host, h in sorted(self._hosts.items())},
+                **self.extra,
+            }
+
+    def summary(self, report=None):
+        report = report or self.report()
+        total = report.get('total', {})
+        lines = [f"Profile: {total.get('wall_seconds', 0):.2f} s wall, {total.get('cpu_seconds', 0):.2f} s CPU"
+                 + (f", peak traced memory {total['peak_traced_bytes'] / 1048576:.1f} MB" if 'peak_traced_bytes' in total else '')]
+        for s in report['stages']:
+            mem = f", peak {s['peak_traced_bytes'] / 1048576:.1f} MB" if 'peak_traced_bytes' in s else ''
+            lines.append(f"  stage {s['name']:<16} {s['wall_seconds']:8.2f} s wall {s['cpu_seconds']:8.2f} s CPU{mem}")
+        for name, p in report['phases'].items():
+            lines.append(f"  phase {name:<16} {p['calls']:8d} calls {p['wall_seconds']:8.2f} s wall {p['cpu_seconds']:8.2f} s CPU")
+        for host, h in report['hosts'].items():
+            lat = h['latency_ms']
+            lines.append(f"  host  {host:<32} {h['requests']:6d} req {h['bytes'] / 1048576:8.1f} MB "
+                         f"p50 {lat['p50']:.0f} ms p90 {lat['p90']:.0f} ms p99 {lat['p99']:.0f} ms, "
+                         f"{h['queued_seconds']:.1f} s queued, {h['errors']} errors")
+        cache = report.get('cache')
+        if cache:
+            lines.append(f"  cache hit ratio {cache['hit_ratio']:.0%} ({cache['hits']} hits, "
+                         f"{cache['revalidated']} revalidated, {cache['misses']} downloaded)")
+        return '\n'.join(lines)
+
+    def write(self, path):
+        report = self.report()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+PROFILE = Profiler()
@@ -0,0 +1,74 @@
+"""Prebuilt inverted index over the game catalog.
+
+generate_game_data writes it next to the catalog as search-index.json so the
+site can answer a search or a filter by reading a few postings lists instead
+of scanning every entry. Every postings list is the ascending list of catalog
+ordinals (positions in games.json, or the ordinals used by the shard index)
+of the games carrying that key.
+
+Fields:
+  token     lower-cased words of the name
+  trigram   3-grams of each padded name word, for typo tolerant matching
+  genre, tag, platform, store
+            facet values, lower-cased; store is every store with a link
+"""
+import re
+
+INDEX_VERSION = 1
+FACETS = ('genre', 'tag', 'platform', 'store')
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return _WORD_RE.findall((text or '').lower())
+
+
+def token_trigrams(token):
+    padded = f' {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _values(value):
+    if isinstance(value, str):
+        value = [value]
+    out = set()
+    for v in value or []:
+        if isinstance(v, str) and v.strip():
+            out.add(v.strip().lower())
+    return out
+
+
+def game_keys(name, meta):
+    """Index keys of one game, as {field: set of keys}."""
+    tokens = set(tokenize(name))
+    trigrams = set()
+    for t in tokens:
+        trigrams |= token_trigrams(t)
+    store_urls = meta.get('storeUrl') or {}
+    return {
+        'token': tokens,
+        'trigram': trigrams,
+        'genre': _values(meta.get('genre')),
+        'tag': _values(meta.get('tags')),
+        'platform': _values(meta.get('platforms')),
+        'store': {k for k, v in store_urls.items() if v},
+    }
+
+
+def build_search_index(entries):
+    """entries: (name, meta) per game, in catalog order."""
+    fields = {f: {} for f in ('token', 'trigram') + FACETS}
+    count = 0
+    for ordinal, (name, meta) in enumerate(entries):
+        count += 1
+        for field, keys in game_keys(name, meta).items():
+            postings = fields[field]
+            for key in keys:
+                postings.setdefault(key, []).append(ordinal)
+    # ordinals are appended in increasing order, so every list is already sorted
+    return {
+        'version': INDEX_VERSION,
+        'count': count,
+        'fields': {f: dict(sorted(p.items())) for f, p in fields.items()},
+    }
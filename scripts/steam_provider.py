@@ -0,0 +1,99 @@
+"""Steam metadata from the store's appdetails JSON endpoint.
+
+One small JSON document per app carries everything the listing scripts
+otherwise scrape out of the full store page: platforms, short description,
+developers, publishers, genres, categories, release date and the header
+image. Responses go through the caller's fetch function, so they share the
+per-host limiter and the persistent HTTP cache, and each appid is fetched at
+most once per run.
+
+appdetails only accepts several appids in one request when the response is
+filtered down to price data, so every app is its own request; the fetch
+stage of create_game_listings asks for them as the games come through.
+"""
+import json
+import urllib.parse
+
+from store_html import strip_tags
+from store_pages import PageMemo
+
+STEAM_APPDETAILS_URL = 'https://store.steampowered.com/api/appdetails'
+# appdetails allows roughly 200 requests per 5 minutes per client; stay under it
+STEAM_APPDETAILS_RATE = 0.5
+STEAM_APPDETAILS_CONCURRENCY = 1
+
+_PLATFORM_NAMES = (('windows', 'Windows'), ('mac', 'macOS'), ('linux', 'Linux'))
+
+
+def parse_appdetails(body, appid):
+    """Fields of one appdetails response; {} when Steam has no data for the app."""
+    payload = json.loads(body.decode('utf-8'))
+    entry = (payload or {}).get(str(appid)) or {}
+    data = entry.get('data') if entry.get('success') else None
+    if not isinstance(data, dict):
+        return {}
+
+    platforms = data.get('platforms') or {}
+    release = data.get('release_date') or {}
+    return {
+        'name': data.get('name') or '',
+        'description': strip_tags(data.get('short_description') or ''),
+        'developers': [d for d in data.get('developers') or [] if d],
+        'publishers': [p for p in data.get('publishers') or [] if p],
+        'releaseDate': '' if release.get('coming_soon') else (release.get('date') or ''),
+        'genres': [g.get('description') for g in data.get('genres') or [] if g.get('description')],
+        'tags': [c.get('description') for c in data.get('categories') or [] if c.get('description')],
+        'platforms': [label for key, label in _PLATFORM_NAMES if platforms.get(key)],
+        'header_image': data.get('header_image') or '',
+    }
+
+
+class SteamAppDetails:
+    """Per-run, memoized access to appdetails by appid.
+
+    base_url can point at a local stand-in server for testing; requests are
+    base_url with appids=<appid>&l=english added to its query. get() turns
+    failures into None; on_error(url, error) hears about them (see StorePage).
+    """
+
+    def __init__(self, fetch, base_url=STEAM_APPDETAILS_URL, language='english', on_error=None):
+        self.base_url = base_url
+        self.language = language
+        self._pages = PageMemo(fetch, self._parse, on_error)
+
+    def url(self, appid):
+        # base_url may carry a query of its own (e.g. cc=us); keep it
+        parts = urllib.parse.urlsplit(self.base_url)
+        query = urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        query = [(k, v) for k, v in query if k not in ('appids', 'l')]
+        query += [('appids', str(int(appid))), ('l', self.language)]
+        return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
+    @staticmethod
+    def _parse(body, url):
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+        return parse_appdetails(body, query['appids'][0])
+
+    def get(self, appid):
+        """Details dict for appid, or None if the request failed or Steam has no data."""
+        try:
+            url = self.url(appid)
+        except (TypeError, ValueError):
+            return None
+        try:
+            return self._pages.get(url).info or None
+        except Exception:
+            return None
+
+    def forget(self, appids):
+        """Drop the memoized details of these apps (see PageMemo.forget)."""
+        urls = []
+        for appid in appids:
+            try:
+                urls.append(self.url(appid))
+            except (TypeError, ValueError):
+                pass
+        self._pages.forget(urls)
+
+    def fetched_count(self):
+        return self._pages.fetched_count()
@@ -0,0 +1,205 @@
+import json
+import re
+import html as _html
+
+
+def strip_tags(s):
+    # remove HTML tags and unescape entities
+    s = re.sub(r'<[^>]+>', ' ', s or '')
+    s = _html.unescape(s)
+    s = re.sub(r'\s+', ' ', s).strip()
+    return s
+
+
+# ---------------------------------------------------------------------------
+# Single-pass extractor
+#
+# extract_page() walks the document once with one tokenizer regex that only
+# stops on the tags it cares about: <meta>, JSON-LD scripts, the Steam
+# description/details blocks and platform markers. Script and style bodies
+# are jumped over with str.find, so the Python loop runs a few dozen times
+# per page instead of once per tag. Store markup uses
+# lowercase tag names, so the scan is case-sensitive, which keeps it cheap.
+# ---------------------------------------------------------------------------
+
+_TOKEN_RE = re.compile(r"""<(?:
+    (?P<skip>script|style)\b(?P<sattrs>[^>]*)>
+  | meta\b(?P<mattrs>[^>]*)>
+  | (?:div|span|a)\b(?P<attrs>[^>]*(?:game_area_description|game_description_snippet|details_block
+                                    |platform_img|data-os=|platform-(?:windows|osx|linux))[^>]*)>
+)""", re.S | re.X)
+_ATTR_RE = re.compile(r'''([\w:.-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''')
+_DIV_END_RE = re.compile(r'</div\s*>', re.I)
+_FIRST_P_RE = re.compile(r'<p[^>]*>(.{40,500})</p>', re.I | re.S)
+_STEAM_BLOCKS = ('game_area_description', 'game_description_snippet', 'details_block')
+_PLATFORM_ORDER = ('Windows', 'macOS', 'Linux')
+# Steam platform_img classes, Steam sysreq data-os values and itch.io
+# platform-* links all name the OS with one of these tokens
+_PLATFORM_TOKENS = {'win': 'Windows', 'windows': 'Windows', 'mac': 'macOS', 'osx': 'macOS',
+                    'macos': 'macOS', 'linux': 'Linux', 'steamos': 'Linux'}
+# pages without markers (GOG's "Works on:" row, plain system requirements)
+# fall back to OS names in the page text; whole words only, so 'machine'
+# is not macOS, and never inside scripts or styles
+_PLATFORM_NAMES = (
+    ('Windows', re.compile(r'\bWindows\b', re.I)),
+    ('macOS', re.compile(r'\b(?:macOS|OS X|Mac)\b', re.I)),
+    ('Linux', re.compile(r'\b(?:Linux|SteamOS)\b', re.I)),
+)
+_SCRIPT_STYLE_RE = re.compile(r'<(script|style)\b.*?</\1\s*>', re.I | re.S)
+
+
+def _parse_attrs(raw):
+    return {k.lower(): _html.unescape(a or b or c) for k, a, b, c in _ATTR_RE.findall(raw)}
+
+
+def _person_name(value):
+    if isinstance(value, dict):
+        return value.get('name') or ''
+    if isinstance(value, list):
+        return next((n for n in (_person_name(v) for v in value) if n), '')
+    return value if isinstance(value, str) else ''
+
+
+def _ld_platforms(data):
+    out = set()
+    for key in ('gamePlatform', 'operatingSystem'):
+        val = data.get(key)
+        for item in (val if isinstance(val, list) else [val]):
+            if isinstance(item, str):
+                for word in re.findall(r'[A-Za-z]+', item):
+                    if word.lower() in _PLATFORM_TOKENS:
+                        out.add(_PLATFORM_TOKENS[word.lower()])
+    return out
+
+
+def platforms_from_text(html):
+    """OS platforms named in the text of a page, in _PLATFORM_ORDER."""
+    text = _SCRIPT_STYLE_RE.sub(' ', html)
+    return [name for name, pattern in _PLATFORM_NAMES if pattern.search(text)]
+
+
+def extract_page(html, url=None):
+    """Extract everything the listing scripts need from a store page in one pass.
+
+    Returns a dict with:
+      og_image     og:image (or twitter:image) URL, or None
+      description  best description found (JSON-LD, meta tags, Steam blocks, first <p>)
+      metadata     developer/publisher/releaseDate/genres/platforms/tags as find_metadata_from_html
+      platforms    OS platforms named by Steam platform icons and sysreq tabs,
+                   itch.io platform links or JSON-LD gamePlatform/operatingSystem;
+                   on pages with none of those, by the page text
+      meta         first content of every og:/twitter:/name meta tag, keyed lowercase
+      json_ld      parsed JSON-LD blocks in document order
+    """
+    meta = {}
+    json_ld = []
+    blocks = {}
+    platforms = set()
+
+    search = _TOKEN_RE.search
+    pos = 0
+    while True:
+        m = search(html, pos)
+        if not m:
+            break
+        pos = m.end()
+        if m.group('mattrs') is not None:
+            attrs = _parse_attrs(m.group('mattrs'))
+            key = (attrs.get('property') or attrs.get('name') or '').lower()
+            content = attrs.get('content')
+            if key and content and key not in meta:
+                meta[key] = content
+        elif m.group('skip') is not None:
+            close = html.find('</' + m.group('skip'), pos)
+            body_end = close if close >= 0 else len(html)
+            if 'ld+json' in m.group('sattrs').lower():
+                try:
+                    json_ld.append(json.loads(html[pos:body_end]))
+                except Exception:
+                    pass
+            pos = body_end
+        else:
+            attrs = _parse_attrs(m.group('attrs'))
+            classes = attrs.get('class', '').split()
+            if 'platform_img' in classes:
+                platforms.update(_PLATFORM_TOKENS[c] for c in classes if c in _PLATFORM_TOKENS)
+            if attrs.get('data-os') in _PLATFORM_TOKENS:
+                platforms.add(_PLATFORM_TOKENS[attrs['data-os']])
+            href = attrs.get('href', '')
+            if '/platform-' in href:
+                token = href.rsplit('/platform-', 1)[1].split('?')[0].strip('/')
+                if token in _PLATFORM_TOKENS:
+                    platforms.add(_PLATFORM_TOKENS[token])
+            names = classes + [attrs.get('id', '')]
+            for key in _STEAM_BLOCKS:
+                if key in names and key not in blocks:
+                    close = _DIV_END_RE.search(html, pos)
+                    blocks[key] = html[pos:close.start()] if close else ''
+
+    is_steam = bool(url) and 'store.steampowered.com' in url.lower()
+    ld_dicts = [d for d in json_ld if isinstance(d, dict)]
+    for data in ld_dicts:
+        platforms |= _ld_platforms(data)
+
+    description = ''
+    for data in ld_dicts:
+        if data.get('description'):
+            description = strip_tags(data['description'])
+            break
+    if not description:
+        for key in ('og:description', 'description', 'twitter:description'):
+            if meta.get(key):
+                description = strip_tags(meta[key])
+                break
+    if not description and is_steam:
+        for key in ('game_area_description', 'game_description_snippet'):
+            if blocks.get(key):
+                description = strip_tags(blocks[key])
+                break
+    if not description:
+        # last resort, so only paid for on pages without any real description
+        m = _FIRST_P_RE.search(html)
+        if m:
+            description = strip_tags(m.group(1))
+
+    metadata = {'developer': '', 'publisher': '', 'releaseDate': '', 'genres': [], 'platforms': [], 'tags': []}
+    for data in ld_dicts:
+        if not metadata['developer']:
+            metadata['developer'] = _person_name(data.get('author'))
+        if not metadata['publisher']:
+            metadata['publisher'] = _person_name(data.get('publisher'))
+        if not metadata['releaseDate'] and isinstance(data.get('datePublished'), str):
+            metadata['releaseDate'] = data['datePublished']
+        if not metadata['genres'] and data.get('genre'):
+            ge = data['genre']
+            if isinstance(ge, list):
+                metadata['genres'] = ge
+            elif isinstance(ge, str):
+                metadata['genres'] = [x.strip() for x in re.split(r'[,/|;]', ge) if x.strip()]
+    block = blocks.get('details_block') if is_steam else ''
+    if block:
+        mdev = (re.search(r'Developer:\s*</?[^>]*>\s*<a[^>]*>([^<]+)</a>', block, re.I)
+                or re.search(r'Developer:\s*([^<\n]+)<', block, re.I))
+        if mdev:
+            metadata['developer'] = strip_tags(mdev.group(1))
+        mpub = (re.search(r'Publisher:\s*</?[^>]*>\s*<a[^>]*>([^<]+)</a>', block, re.I)
+                or re.search(r'Publisher:\s*([^<\n]+)<', block, re.I))
+        if mpub:
+            metadata['publisher'] = strip_tags(mpub.group(1))
+        mrel = re.search(r'Release Date:\s*([^<\n]+)<', block, re.I)
+        if mrel:
+            metadata['releaseDate'] = strip_tags(mrel.group(1))
+        tags = re.findall(r"""<a[^>]+href=["'][^"']*(?:tag|genre|tags)[^"']*["'][^>]*>([^<]+)</a>""", block, re.I)
+        if tags:
+            metadata['genres'] = [t.strip() for t in tags]
+    if not metadata['publisher'] and meta.get('publisher'):
+        metadata['publisher'] = strip_tags(meta['publisher'])
+
+    return {
+        'og_image': meta.get('og:image') or meta.get('twitter:image') or None,
+        'description': description,
+        'metadata': metadata,
+        'platforms': [p for p in _PLATFORM_ORDER if p in platforms] or platforms_from_text(html),
+        'meta': meta,
+        'json_ld': json_ld,
+    }
@@ -0,0 +1,120 @@
+import threading
+
+from store_html import extract_page
+
+
+def parse_html(body, url):
+    return extract_page(body.decode('utf-8', errors='ignore'), url)
+
+
+class StorePage:
+    """A store page fetched and parsed at most once.
+
+    The first caller to touch any field downloads the page and runs the
+    single-pass extractor over it; callers arriving while that is in flight
+    wait for it instead of issuing their own request. Only the extracted
+    fields are kept, not the page itself. A failed download is remembered
+    too and re-raised to every caller. `parse(body, url)` turns the response
+    body into the info dict; by default it is the HTML extractor.
+
+    prefetch() splits the two steps: it only downloads, and the body is kept
+    until the first reader of info parses it, so the download and the parse
+    can run on different threads.
+
+    on_error(url, error), if given, is called every time a reader is handed
+    the remembered error, on the reader's thread, so a failure reaches every
+    caller that depended on the page and not only the one that fetched it.
+    """
+
+    def __init__(self, url, fetch, parse=parse_html, on_error=None):
+        self.url = url
+        self._fetch = fetch
+        self._parse = parse
+        self._on_error = on_error
+        self._lock = threading.Lock()
+        self._body = None
+        self._info = None
+        self._error = None
+
+    @property
+    def done(self):
+        return self._info is not None or self._error is not None
+
+    def prefetch(self):
+        with self._lock:
+            if not self.done and self._body is None:
+                try:
+                    self._body = self._fetch(self.url)
+                except Exception as e:
+                    self._error = e
+
+    @property
+    def info(self):
+        with self._lock:
+            if not self.done:
+                body, self._body = self._body, None
+                try:
+                    if body is None:
+                        body = self._fetch(self.url)
+                    self._info = self._parse(body, self.url)
+                except Exception as e:
+                    self._error = e
+            error = self._error
+        if error is not None:
+            if self._on_error is not None:
+                self._on_error(self.url, error)
+            raise error
+        return self._info
+
+    @property
+    def og_image(self):
+        return self.info['og_image']
+
+    @property
+    def description(self):
+        return self.info['description']
+
+    @property
+    def metadata(self):
+        return self.info['metadata']
+
+    @property
+    def platforms(self):
+        return self.info['platforms']
+
+
+class PageMemo:
+    """Per-run registry handing out one StorePage per URL.
+
+    forget(urls) drops finished pages once nothing still needs them, so a
+    long run only holds the pages of the games in flight; a later get() of
+    a forgotten URL fetches it again.
+    """
+
+    def __init__(self, fetch, parse=parse_html, on_error=None):
+        self._fetch = fetch
+        self._parse = parse
+        self._on_error = on_error
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._forgotten = 0
+
+    def get(self, url):
+        with self._lock:
+            page = self._pages.get(url)
+            if page is None:
+                page = self._pages[url] = StorePage(url, self._fetch, self._parse, self._on_error)
+            return page
+
+    def forget(self, urls):
+        with self._lock:
+            for url in urls:
+                page = self._pages.get(url)
+                # pages still being fetched or waiting to be parsed stay
+                if page is not None and page.done:
+                    del self._pages[url]
+                    self._forgotten += 1
+
+    def fetched_count(self):
+        with self._lock:
+            return self._forgotten + sum(1 for p in self._pages.values() if p.done)
@@ -0,0 +1,57 @@
+"""cover_store.py --check, run by firebase.json before every deploy."""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS)
+
+from cover_store import check_catalog  # noqa: E402
+
+
+def game(image):
+    return {'name': 'Game', 'image': image, 'image_variants': [], 'primary_store': '', 'storefronts': []}
+
+
+class CheckCatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def write(self, name, games):
+        path = os.path.join(self.data_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(games, f, indent=2)
+        return path
+
+    def check(self):
+        return subprocess.run([sys.executable, os.path.join(SCRIPTS, 'cover_store.py'), '--check',
+                               '--data-dir', self.data_dir], capture_output=True, text=True, timeout=60)
+
+    def test_per_folder_link_in_games_json_fails(self):
+        path = self.write('games.json', [game('/asset/cas/ab/abcdef.jpg'), game('/asset/Game/Game/cover.jpg')])
+        self.assertEqual(check_catalog(self.data_dir), {path: 1})
+        out = self.check()
+        self.assertNotEqual(out.returncode, 0)
+        self.assertIn('games.json: 1 images outside the cover store', out.stdout)
+
+    def test_per_folder_link_in_shard_fails(self):
+        path = self.write(os.path.join('shards', 'games-0123456789ab.json'), [game('/asset/Game/Game/cover.jpg')])
+        self.assertEqual(check_catalog(self.data_dir), {path: 1})
+        self.assertNotEqual(self.check().returncode, 0)
+
+    def test_store_links_pass(self):
+        self.write('games.json', [game('/asset/cas/ab/abcdef.jpg'), game('')])
+        self.assertEqual(check_catalog(self.data_dir), {})
+        self.assertEqual(self.check().returncode, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
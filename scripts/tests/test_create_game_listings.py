@@ -0,0 +1,118 @@
+"""End-to-end runs of create_game_listings.py against a local image server.
+
+Each test copies the scripts into a scratch tree (the script works on the
+docs/asset/Game folder next to its own directory) and runs them there.
+"""
+import http.server
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COVER = b'\xff\xd8\xff\xe0' + b'cover' * 64
+
+
+class ImageServer(http.server.ThreadingHTTPServer):
+    """Serves COVER for every path while `up`, a 500 otherwise."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), ImageHandler)
+        self.up = False
+        self.requests = []
+        self.base = f'http://127.0.0.1:{self.server_port}'
+
+
+class ImageHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        status, body = (200, COVER) if self.server.up else (500, b'down')
+        self.send_response(status)
+        self.send_header('Content-Type', 'image/jpeg' if status == 200 else 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.send_response(405)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class RetryFailedTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ImageServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.root = tempfile.mkdtemp()
+        shutil.copytree(SCRIPTS, os.path.join(self.root, 'scripts'),
+                        ignore=shutil.ignore_patterns('__pycache__', 'tests', 'fixtures'))
+        self.game_dir = os.path.join(self.root, 'docs', 'asset', 'Game')
+        os.makedirs(self.game_dir)
+        self.names = [f'Game {i}' for i in range(3)]
+        with open(os.path.join(self.game_dir, '_other_game_list.json'), 'w', encoding='utf-8') as f:
+            json.dump([{'name': n, 'image': f'{self.server.base}/cover{i}.jpg'} for i, n in enumerate(self.names)], f)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def run_listings(self, *args):
+        out = subprocess.run([sys.executable, os.path.join('scripts', 'create_game_listings.py'), '--no-cache',
+                              '--no-steam-api', '--jobs', '1', '--breaker-threshold', '1', *args],
+                             cwd=self.root, capture_output=True, text=True, timeout=120)
+        self.assertEqual(out.returncode, 0, out.stderr)
+        return out.stdout
+
+    def covers(self):
+        found = {}
+        for n in self.names:
+            path = os.path.join(self.game_dir, n.replace(' ', '_'), 'cover.jpg')
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    found[n] = f.read()
+        return found
+
+    def test_retry_failed_fetches_covers_skipped_by_open_breaker(self):
+        out = self.run_listings()
+        self.assertIn('circuit open', out)
+        self.assertEqual(self.covers(), {})
+        # one request opened the breaker, the other covers were skipped
+        self.assertEqual(len(self.server.requests), 1)
+
+        self.server.up = True
+        out = self.run_listings('--retry-failed')
+        self.assertIn('Created 3 game folders', out)
+        self.assertEqual(self.covers(), {n: COVER for n in self.names})
+
+        out = self.run_listings()
+        self.assertIn('(3 unchanged games skipped)', out)
+
+    def test_remembered_failure_keeps_game_out_of_date(self):
+        self.run_listings()
+        # the cover that failed is remembered and not requested again, but its
+        # game is still not taken as current; the breaker skips are retried
+        self.server.up = True
+        out = self.run_listings()
+        self.assertIn('Created 3 game folders', out)
+        self.assertIn('1 game folders are incomplete', out)
+        self.assertEqual(sorted(self.covers()), ['Game 1', 'Game 2'])
+
+        out = self.run_listings()
+        self.assertIn('Created 1 game folders', out)
+        self.assertIn('1 game folders are incomplete', out)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""Recorded failures replay as the exception the live run saw."""
+import http.client
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import unittest
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS)
+
+from fetch_archive import FetchArchive  # noqa: E402
+from fetch_guard import classify, is_transient  # noqa: E402
+from http_client import HTTPError  # noqa: E402
+
+
+class ReplayErrorTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def record(self, errors):
+        archive = FetchArchive(self.dir, 'record')
+        for url, error in errors.items():
+            archive.record_error(url, error)
+        archive.save()
+        return FetchArchive(self.dir, 'replay')
+
+    def test_replays_recorded_error_types(self):
+        errors = {
+            'https://a.test/timeout': socket.timeout('timed out'),
+            'https://a.test/refused': ConnectionRefusedError(111, 'Connection refused'),
+            'https://a.test/dns': socket.gaierror(-2, 'Name or service not known'),
+            'https://a.test/closed': http.client.RemoteDisconnected('Remote end closed connection'),
+            'https://a.test/scheme': ValueError('unsupported URL scheme: ftp'),
+            'https://a.test/gone': HTTPError('https://a.test/gone', 404, 'Not Found', {}, b'missing'),
+        }
+        archive = self.record(errors)
+        for url, error in errors.items():
+            with self.assertRaises(type(error)) as caught:
+                archive.replay(url)
+            self.assertIs(type(caught.exception), type(error))
+            self.assertEqual(classify(caught.exception), classify(error))
+            self.assertEqual(is_transient(caught.exception), is_transient(error))
+
+    def test_unknown_error_type_replays_as_oserror(self):
+        class OddError(Exception):
+            pass
+
+        archive = self.record({'https://a.test/odd': OddError('odd')})
+        with self.assertRaises(OSError) as caught:
+            archive.replay('https://a.test/odd')
+        self.assertIn('OddError: odd', str(caught.exception))
+
+    def test_recording_without_error_type_replays_as_oserror(self):
+        os.makedirs(os.path.join(self.dir, 'bodies'))
+        with open(os.path.join(self.dir, 'index.json'), 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'responses': {'https://a.test/old': {'error': 'TimeoutError: timed out'}}}, f)
+        with self.assertRaises(OSError):
+            FetchArchive(self.dir, 'replay').replay('https://a.test/old')
+
+
+if __name__ == '__main__':
+    unittest.main()
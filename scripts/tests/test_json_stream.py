@@ -0,0 +1,57 @@
+"""json_stream.dump_json_array and OutputWriter.write_chunks, which write the game lists."""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS)
+
+from json_stream import dump_json_array, load_json_array  # noqa: E402
+from output_writer import OutputWriter  # noqa: E402
+
+
+class DumpJsonArrayTest(unittest.TestCase):
+    def test_matches_json_dumps(self):
+        for items in ([], [{}], [[]], [1, 'two', None],
+                      [{'name': 'Generation Zero®', 'appid': 704270, 'tags': ['a', {'b': []}]}, {'name': 'x'}]):
+            self.assertEqual(''.join(dump_json_array(iter(items))), json.dumps(items, indent=2))
+
+
+class WriteChunksTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, '_steam_game_list.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_rewrites_only_changed_lists(self):
+        games = [{'name': 'A', 'appid': 1}, {'name': 'B™', 'appid': 2}]
+        writer = OutputWriter()
+        self.assertTrue(writer.write_chunks(self.path, dump_json_array(games)))
+        # the list can be read and written back in one pass
+        self.assertFalse(writer.write_chunks(self.path, dump_json_array(load_json_array(self.path))))
+        self.assertEqual((writer.written, writer.skipped), (1, 1))
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), json.dumps(games, indent=2))
+        self.assertEqual(os.listdir(self.dir), ['_steam_game_list.json'])
+
+    def test_failed_write_keeps_old_list(self):
+        OutputWriter().write_chunks(self.path, dump_json_array([{'name': 'A'}]))
+
+        def broken():
+            yield '['
+            raise ValueError('bad entry')
+
+        with self.assertRaises(ValueError):
+            OutputWriter().write_chunks(self.path, broken())
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(json.load(f), [{'name': 'A'}])
+        self.assertEqual(os.listdir(self.dir), ['_steam_game_list.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""optimize_covers.py variants of covers with and without transparency."""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS)
+
+import optimize_covers  # noqa: E402
+from optimize_covers import HashCache, Image, optimize_covers as run_optimize  # noqa: E402
+
+
+@unittest.skipIf(Image is None, 'needs Pillow')
+class TransparencyTest(unittest.TestCase):
+    def setUp(self):
+        self.game_dir = tempfile.mkdtemp()
+        # keep the hash cache out of the repository's .cache
+        cache = os.path.join(self.game_dir, 'hashes.json')
+        patcher = mock.patch.object(optimize_covers, 'HashCache', lambda: HashCache(cache))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.game_dir, ignore_errors=True)
+
+    def cover(self, name, img):
+        os.makedirs(os.path.join(self.game_dir, name))
+        img.save(os.path.join(self.game_dir, name, 'cover.png'))
+
+    def variants(self, name):
+        with open(os.path.join(self.game_dir, name, 'variants', 'index.json'), encoding='utf-8') as f:
+            return {v['type']: v for v in json.load(f)['variants'] if v['width'] == 64}
+
+    def open_variant(self, name, variant):
+        return Image.open(os.path.join(self.game_dir, name, 'variants', variant['file']))
+
+    def test_transparent_cover_keeps_its_alpha(self):
+        img = Image.new('RGBA', (64, 32), (255, 255, 255, 0))
+        img.paste((200, 30, 30, 255), (16, 8, 48, 24))
+        self.cover('Logo', img)
+        self.cover('Palette', img.convert('P'))
+        run_optimize(self.game_dir, widths=[64], formats=['webp', 'jpeg'])
+
+        for name in ('Logo', 'Palette'):
+            variants = self.variants(name)
+            self.assertEqual(sorted(variants), ['image/png', 'image/webp'])
+            with self.open_variant(name, variants['image/png']) as png:
+                png = png.convert('RGBA')
+                self.assertEqual(png.getpixel((0, 0))[3], 0)
+                self.assertEqual(png.getpixel((32, 16)), (200, 30, 30, 255))
+
+    def test_opaque_cover_stays_jpeg(self):
+        self.cover('Opaque', Image.new('RGBA', (64, 32), (10, 120, 200, 255)))
+        run_optimize(self.game_dir, widths=[64], formats=['webp', 'jpeg'])
+        variants = self.variants('Opaque')
+        self.assertEqual(sorted(variants), ['image/jpeg', 'image/webp'])
+        with self.open_variant('Opaque', variants['image/jpeg']) as jpg:
+            self.assertEqual(jpg.mode, 'RGB')
+
+
+if __name__ == '__main__':
+    unittest.main()
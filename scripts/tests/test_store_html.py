@@ -0,0 +1,39 @@
+"""Platform detection in store_html.extract_page on the fixture store pages."""
+import os
+import sys
+import unittest
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS)
+
+from store_html import extract_page  # noqa: E402
+
+PAGES = os.path.join(SCRIPTS, 'fixtures', 'pages')
+
+
+def page(name):
+    with open(os.path.join(PAGES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+class PlatformsTest(unittest.TestCase):
+    def test_gog_page_without_markers_falls_back_to_page_text(self):
+        # GOG only says "Works on: Windows (7, 8, 10)"; the page scripts
+        # mention Mac and the filler text says "machine", neither is macOS
+        info = extract_page(page('gog_game.html'), 'https://www.gog.com/game/frostpunk')
+        self.assertEqual(info['platforms'], ['Windows'])
+
+    def test_markers_win_over_page_text(self):
+        html = ('<div class="game_area_purchase_platform"><span class="platform_img win"></span></div>'
+                '<p>Also runs on Linux through Proton.</p>')
+        self.assertEqual(extract_page(html, 'https://store.steampowered.com/app/1/')['platforms'], ['Windows'])
+
+    def test_page_text_fallback(self):
+        html = ('<script>if (navigator.platform == "Linux") {}</script>'
+                '<div class="requirements">OS: Windows 10 / Mac OS X 10.13</div>')
+        self.assertEqual(extract_page(html)['platforms'], ['Windows', 'macOS'])
+        self.assertEqual(extract_page('<p>A machine for the windowsill.</p>')['platforms'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()